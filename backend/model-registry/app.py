@@ -1,11 +1,23 @@
 """Flask application for Model Registry service"""
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+import json
 import logging
+import os
 from datetime import datetime
 
-from database import Database
+import columnar
+from storage import EXPORT_COLUMNS, create_database, parse_param_filter
+from events import EventBus
+from feature_spec import validate_feature_spec
+from instrumentation import PROMETHEUS_CONTENT_TYPE, Instrumentation
+from maintenance import MaintenanceJob
+from serialization import json_response, stream_response
+from wire import (
+    METRIC_FRAME_CONTENT_TYPE, NDJSON_CONTENT_TYPES, decode_body, decode_metric_frame, points_from_json,
+    records_from_ndjson
+)
 
 # Configure logging
 logging.basicConfig(
@@ -18,8 +30,88 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
-# Initialize database
-db = Database()
+# Initialize database (MLOPS_DATABASE_URL selects the driver, e.g. postgresql://...)
+db = create_database(
+    os.getenv("MLOPS_DATABASE_URL") or os.getenv("MLOPS_DB_PATH", "mlops.db"),
+    cache_size=int(os.environ["MLOPS_EXPERIMENT_CACHE_SIZE"]) if "MLOPS_EXPERIMENT_CACHE_SIZE" in os.environ else None,
+    metric_shards=int(os.getenv("MLOPS_METRIC_SHARDS", "0")),
+    pool_size=int(os.getenv("MLOPS_DB_POOL_SIZE", "10"))
+)
+
+# Request/storage timing for /metrics; storage operations slower than MLOPS_SLOW_QUERY_MS are logged
+instrumentation = Instrumentation(slow_query_seconds=float(os.getenv("MLOPS_SLOW_QUERY_MS", "500")) / 1000)
+instrumentation.init_app(app)
+instrumentation.instrument_storage(db)
+
+# Retention, downsampling and vacuum (MLOPS_MAINTENANCE_INTERVAL=0 disables the schedule)
+maintenance = MaintenanceJob(
+    db,
+    interval=float(os.getenv("MLOPS_MAINTENANCE_INTERVAL", "3600")),
+    downsample_after_days=float(os.getenv("MLOPS_DOWNSAMPLE_AFTER_DAYS", "30")),
+    bucket_seconds=int(os.getenv("MLOPS_DOWNSAMPLE_BUCKET_SECONDS", "300")),
+    deleted_retention_days=float(os.getenv("MLOPS_DELETED_RETENTION_DAYS", "7")),
+    failed_retention_days=float(os.getenv("MLOPS_FAILED_RETENTION_DAYS", "90")),
+    batch_size=int(os.getenv("MLOPS_MAINTENANCE_BATCH_SIZE", "1000"))
+)
+
+
+def start_maintenance():
+    """Start the maintenance schedule in this process (no-op if disabled or already running)
+
+    Not done at import: under the debug reloader the process that imports the
+    app first only watches files and serves from a child process, so a job
+    started there would run alongside the child's against the same database.
+    """
+    if maintenance.interval > 0:
+        maintenance.start()
+
+
+# WSGI servers import the app without running an entry point; start with the first request
+app.before_request(start_maintenance)
+
+# Live event fan-out for /api/stream subscribers
+events = EventBus()
+
+# Seconds between keep-alive comments on idle event streams
+STREAM_HEARTBEAT = 15
+
+# Largest /api/import upload accepted, in bytes and decoded rows (mlops import sends
+# chunks of about --chunk-rows rows, 100,000 by default)
+MAX_IMPORT_BYTES = int(os.getenv("MLOPS_MAX_IMPORT_BYTES", str(64 * 1024 * 1024)))
+MAX_IMPORT_ROWS = int(os.getenv("MLOPS_MAX_IMPORT_ROWS", "500000"))
+
+
+def _as_bool(value: str) -> bool:
+    """Parse a boolean query parameter"""
+    return value.lower() in ("1", "true", "yes")
+
+
+# The development server logs a line per request; MLOPS_ACCESS_LOG=false turns that off under load
+if not _as_bool(os.getenv("MLOPS_ACCESS_LOG", "true")):
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+instrumentation.add_gauge("mlops_registry_experiment_cache_entries", "Cached experiment documents",
+                          lambda: len(db.experiment_cache))
+instrumentation.add_gauge("mlops_registry_experiment_cache_hits_total", "Experiment cache hits",
+                          lambda: db.experiment_cache.hits, type="counter")
+instrumentation.add_gauge("mlops_registry_experiment_cache_misses_total", "Experiment cache misses",
+                          lambda: db.experiment_cache.misses, type="counter")
+if hasattr(db, "pool_stats"):
+    for stat, description in (("size", "Maximum pooled connections"), ("open", "Open pooled connections"),
+                              ("in_use", "Connections lent out"), ("waiting", "Requests waiting for a connection")):
+        instrumentation.add_gauge(f"mlops_registry_db_pool_{stat}", description, lambda stat=stat: db.pool_stats()[stat])
+    instrumentation.add_gauge("mlops_registry_db_pool_waits_total", "Times a request had to wait for a connection",
+                              lambda: db.pool_stats()["waits"], type="counter")
+    instrumentation.add_gauge("mlops_registry_db_pool_wait_seconds_total", "Time spent waiting for a connection",
+                              lambda: db.pool_stats()["wait_seconds"], type="counter")
+instrumentation.add_gauge("mlops_registry_event_subscribers", "Live event stream subscriptions",
+                          lambda: events.queue_stats()["subscribers"])
+instrumentation.add_gauge("mlops_registry_event_queue_depth", "Events queued for stream subscribers",
+                          lambda: events.queue_stats()["queued"])
+instrumentation.add_gauge("mlops_registry_event_subscribers_overflowed", "Subscriptions that fell behind",
+                          lambda: events.queue_stats()["overflowed"])
+instrumentation.add_gauge("mlops_registry_maintenance_last_duration_seconds", "Duration of the last maintenance run",
+                          lambda: maintenance.last_run["duration"] if maintenance.last_run else None)
 
 
 @app.route('/health', methods=['GET'])
@@ -32,6 +124,12 @@ def health_check():
     }), 200
 
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request latency, storage timing, pool and queue gauges in Prometheus text format"""
+    return Response(instrumentation.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.route('/api/experiments/track', methods=['POST'])
 def track_experiment():
     """
@@ -58,6 +156,15 @@ def track_experiment():
         
         logger.info(f"Tracked experiment: {experiment_id} - {data.get('experiment_name')}")
         
+        events.publish(experiment_id, {
+            "type": "status",
+            "experiment_id": experiment_id,
+            "experiment_name": data.get("experiment_name"),
+            "status": data.get("status", "running"),
+            "duration": data.get("duration"),
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        
         return jsonify({
             "status": "success",
             "experiment_id": experiment_id,
@@ -71,18 +178,72 @@ def track_experiment():
         }), 500
 
 
+@app.route('/api/experiments/compare', methods=['GET'])
+def compare_experiments():
+    """
+    Compare runs side by side or rank them by a metric (leaderboard)
+    
+    Query parameters:
+        experiment_name: Only runs of this experiment
+        experiment_id:   Only these runs (repeatable)
+        metric:          Metrics to include (repeatable; default all)
+        sort_by:         Rank by this metric; runs without it are excluded
+        agg:             Summary value to rank by: last (default), min or max
+        order:           desc (default) or asc
+        limit:           Maximum number of runs (default 100, at most 1000)
+        param:           Parameter filter, e.g. learning_rate<0.01 (repeatable)
+    
+    Example - best 20 runs by final accuracy:
+        /api/experiments/compare?experiment_name=hyperparameter_tuning&sort_by=accuracy&limit=20
+    """
+    try:
+        result = db.compare_experiments(
+            experiment_ids=request.args.getlist('experiment_id') or None,
+            experiment_name=request.args.get('experiment_name'),
+            metrics=request.args.getlist('metric') or None,
+            sort_by=request.args.get('sort_by'),
+            agg=request.args.get('agg', 'last'),
+            order=request.args.get('order', 'desc').lower(),
+            limit=request.args.get('limit', 100, type=int),
+            param_filters=[parse_param_filter(expr) for expr in request.args.getlist('param')]
+        )
+        return json_response(result)
+        
+    except ValueError as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error comparing experiments: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
 @app.route('/api/experiments/<experiment_id>', methods=['GET'])
 def get_experiment(experiment_id):
-    """Get experiment details by ID"""
+    """
+    Get experiment details by ID
+    
+    Responses carry an ETag; requests with a matching If-None-Match
+    get an empty 304 Not Modified.
+    """
     try:
-        experiment = db.get_experiment(experiment_id)
+        entry = db.get_experiment_with_etag(experiment_id)
         
-        if not experiment:
+        if not entry:
             return jsonify({
                 "error": "Experiment not found"
             }), 404
         
-        return jsonify(experiment), 200
+        experiment, etag, body = entry
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = json_response(experiment, body=body)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
         
     except Exception as e:
         logger.error(f"Error retrieving experiment: {e}")
@@ -91,17 +252,68 @@ def get_experiment(experiment_id):
         }), 500
 
 
+@app.route('/api/experiments/<experiment_id>', methods=['DELETE'])
+def delete_experiment(experiment_id):
+    """
+    Soft-delete an experiment
+    
+    It disappears from listings and summaries at once; its data is purged
+    by the maintenance job after the deleted-experiment retention period.
+    """
+    try:
+        if not db.delete_experiment(experiment_id):
+            return jsonify({
+                "error": "Experiment not found"
+            }), 404
+        
+        events.publish(experiment_id, {
+            "type": "status",
+            "experiment_id": experiment_id,
+            "status": "deleted",
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        
+        return jsonify({
+            "status": "success",
+            "message": f"Experiment {experiment_id} deleted"
+        })
+        
+    except Exception as e:
+        logger.error(f"Error deleting experiment: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
 @app.route('/api/experiments', methods=['GET'])
 def list_experiments():
-    """List all experiments"""
+    """
+    List all experiments
+    
+    Query parameters:
+        limit:  Maximum number of experiments (default 100; no limit when streaming)
+        stream: If true, encode rows straight from the database cursor in chunks
+        param:  Parameter filter, e.g. learning_rate<0.01 or optimizer=adam (repeatable)
+    """
     try:
+        param_filters = [parse_param_filter(expr) for expr in request.args.getlist('param')]
+        
+        if request.args.get('stream', False, type=_as_bool):
+            limit = request.args.get('limit', None, type=int)
+            return stream_response(db.iter_experiments(limit=limit, param_filters=param_filters), "experiments")
+        
         limit = request.args.get('limit', 100, type=int)
-        experiments = db.get_all_experiments(limit=limit)
+        experiments = db.get_all_experiments(limit=limit, param_filters=param_filters)
         
-        return jsonify({
+        return json_response({
             "experiments": experiments,
             "count": len(experiments)
-        }), 200
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
         
     except Exception as e:
         logger.error(f"Error listing experiments: {e}")
@@ -110,6 +322,169 @@ def list_experiments():
         }), 500
 
 
+@app.route('/api/export/<table>', methods=['GET'])
+def export_table(table):
+    """
+    Export experiments, parameters or metrics as a columnar file (see columnar.py)
+    
+    Query parameters:
+        format:     parquet (default) or arrow (an Arrow IPC stream)
+        id:         Experiment to export (repeatable); without it, every experiment matching
+        param:      Parameter filter, e.g. learning_rate<0.01 (repeatable)
+        limit:      Newest experiments to select by filter (default: all)
+        chunk_size: Rows per Parquet row group / Arrow record batch (default 50000)
+    
+    The file is streamed as it is read from the database.
+    """
+    if table not in EXPORT_COLUMNS:
+        return jsonify({
+            "error": f"Unknown table '{table}'; expected one of {', '.join(EXPORT_COLUMNS)}"
+        }), 404
+    if not columnar.available():
+        return jsonify({
+            "error": "Columnar export requires pyarrow on the registry"
+        }), 501
+    try:
+        file_format = request.args.get('format', 'parquet')
+        if file_format not in columnar.FORMATS:
+            raise ValueError(f"format must be one of {', '.join(columnar.FORMATS)}")
+        chunk_size = request.args.get('chunk_size', 50000, type=int)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        
+        experiment_ids = request.args.getlist('id')
+        if not experiment_ids:
+            param_filters = [parse_param_filter(expr) for expr in request.args.getlist('param')]
+            experiments = db.iter_experiments(limit=request.args.get('limit', None, type=int),
+                                              param_filters=param_filters)
+            experiment_ids = [experiment["experiment_id"] for experiment in experiments]
+        
+        content_type, extension = columnar.FORMATS[file_format]
+        chunks = db.export_rows(table, experiment_ids, chunk_size=chunk_size)
+        return Response(columnar.encode_chunks(table, chunks, file_format), content_type=content_type, headers={
+            "Content-Disposition": f'attachment; filename="{table}.{extension}"',
+            "X-Experiment-Count": str(len(experiment_ids))
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+        
+    except Exception as e:
+        logger.error(f"Error exporting {table}: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/import/<table>', methods=['POST'])
+def import_table(table):
+    """
+    Import experiments, parameters or metrics exported by /api/export/<table>
+    
+    The body is an Arrow IPC stream (Content-Type: application/vnd.apache.arrow.stream)
+    or a Parquet file (application/vnd.apache.parquet) and is inserted in one
+    transaction. Experiments already present are skipped and the response lists the
+    ids inserted; import their parameters and metrics afterwards.
+    
+    Parameter and metric rows come grouped by experiment, and rows an experiment
+    already holds are skipped, so re-posting an upload inserts nothing. When an
+    upload's first experiment continues one begun in an earlier upload, ?offset=
+    gives how many of its rows (metric samples, for metrics) came before; rows that
+    would overlap or leave a gap in what the registry holds are rejected with 400.
+    
+    Uploads over MLOPS_MAX_IMPORT_BYTES bytes or MLOPS_MAX_IMPORT_ROWS rows are
+    rejected with 413; split them with `mlops import --chunk-rows`.
+    """
+    if table not in EXPORT_COLUMNS:
+        return jsonify({
+            "error": f"Unknown table '{table}'; expected one of {', '.join(EXPORT_COLUMNS)}"
+        }), 404
+    if not columnar.available():
+        return jsonify({
+            "error": "Columnar import requires pyarrow on the registry"
+        }), 501
+    if request.mimetype not in (columnar.ARROW_STREAM_CONTENT_TYPE, columnar.PARQUET_CONTENT_TYPE):
+        response = jsonify({
+            "error": f"Unsupported content type '{request.mimetype}'"
+        })
+        response.headers["Accept-Post"] = f"{columnar.ARROW_STREAM_CONTENT_TYPE}, {columnar.PARQUET_CONTENT_TYPE}"
+        return response, 415
+    too_large = jsonify({
+        "error": f"Import uploads are limited to {MAX_IMPORT_BYTES} bytes and {MAX_IMPORT_ROWS} rows; "
+                 "send smaller chunks with `mlops import --chunk-rows`"
+    }), 413
+    if (request.content_length or 0) > MAX_IMPORT_BYTES:
+        return too_large
+    try:
+        body = request.stream.read(MAX_IMPORT_BYTES + 1)
+        if len(body) > MAX_IMPORT_BYTES:
+            return too_large
+        
+        rows = []
+        for batch in columnar.decode_rows(table, body, request.mimetype, max_rows=MAX_IMPORT_ROWS):
+            rows.extend(batch)
+        
+        if table == "experiments":
+            imported = db.import_experiments(rows) if rows else []
+            return jsonify({
+                "status": "success",
+                "imported": imported,
+                "skipped": len(rows) - len(imported),
+                "count": len(imported)
+            }), 201
+        
+        offset = int(request.args.get('offset', 0))
+        if offset < 0:
+            raise ValueError("offset must not be negative")
+        count = db.import_rows(table, rows, offset) if rows else 0
+        return jsonify({
+            "status": "success",
+            "count": count,
+            "skipped": len(rows) - count
+        }), 201
+        
+    except columnar.TooManyRows:
+        return too_large
+        
+    except ValueError as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+        
+    except Exception as e:
+        logger.error(f"Error importing {table}: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/summary', methods=['GET'])
+def summary():
+    """Aggregate experiment statistics (status counts, recent runs)"""
+    try:
+        recent_limit = request.args.get('recent', 10, type=int)
+        return jsonify(db.get_summary(recent_limit=recent_limit)), 200
+        
+    except Exception as e:
+        logger.error(f"Error building summary: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/experiments/<experiment_id>/metrics', methods=['GET'])
+def get_metrics(experiment_id):
+    """
+    Stream the metric history of an experiment
+    
+    Query parameters:
+        key: Only return points for this metric
+    """
+    return stream_response(db.iter_metrics(experiment_id, key=request.args.get('key')), "metrics")
+
+
 @app.route('/api/experiments/<experiment_id>/metrics', methods=['POST'])
 def log_metric(experiment_id):
     """
@@ -130,13 +505,23 @@ def log_metric(experiment_id):
                 "error": "key and value are required"
             }), 400
         
+        value = float(data["value"])
         db.log_metric(
             experiment_id,
             data["key"],
-            float(data["value"]),
+            value,
             data.get("step")
         )
         
+        events.publish(experiment_id, {
+            "type": "metric",
+            "experiment_id": experiment_id,
+            "key": data["key"],
+            "value": value,
+            "step": data.get("step"),
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        
         return jsonify({
             "status": "success",
             "message": f"Metric logged for experiment {experiment_id}"
@@ -149,6 +534,415 @@ def log_metric(experiment_id):
         }), 500
 
 
+@app.route('/api/experiments/<experiment_id>/profile', methods=['POST'])
+def save_profile(experiment_id):
+    """
+    Store timing spans and sampling profiler results for an experiment
+    
+    Request body (as sent by the SDK's track_experiment):
+    {
+        "spans": [{"path": "train/data_loading", "count": 1, "wall_s": 1.2, "cpu_s": 0.9, ...}],
+        "sampling": {"samples": 812, "stacks": [...], "functions": [...], "spans": {...}} or null
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not isinstance(data, dict) or not isinstance(data.get("spans"), list):
+            return jsonify({
+                "error": "spans list is required"
+            }), 400
+        
+        if not db.save_profile(experiment_id, {"spans": data["spans"], "sampling": data.get("sampling")}):
+            return jsonify({
+                "error": "Experiment not found"
+            }), 404
+        
+        return jsonify({
+            "status": "success",
+            "message": f"Profile saved for experiment {experiment_id}"
+        }), 201
+        
+    except Exception as e:
+        logger.error(f"Error saving profile: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/experiments/<experiment_id>/profile', methods=['GET'])
+def get_profile(experiment_id):
+    """Get an experiment's timing spans and sampling profile"""
+    try:
+        profile = db.get_profile(experiment_id)
+        
+        if profile is None:
+            return jsonify({
+                "error": "Profile not found"
+            }), 404
+        
+        return json_response(profile)
+        
+    except Exception as e:
+        logger.error(f"Error retrieving profile: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/experiments/<experiment_id>/metrics/batch', methods=['POST'])
+def log_metrics_batch(experiment_id):
+    """
+    Log many metric points for an experiment in one transaction
+    
+    Request body, as JSON:
+    {
+        "metrics": [
+            {"key": "loss", "value": 0.42, "step": 1},
+            {"key": "accuracy", "value": 0.91, "step": 1}
+        ]
+    }
+    or a packed metric frame (Content-Type: application/x-mlops-metric-frame,
+    see wire.py). Other content types get 415 with the accepted types in Accept-Post.
+    """
+    try:
+        if request.mimetype == METRIC_FRAME_CONTENT_TYPE:
+            points = decode_metric_frame(request.get_data())
+        elif request.is_json:
+            points = points_from_json(request.get_json())
+        else:
+            response = jsonify({
+                "error": f"Unsupported content type '{request.mimetype}'"
+            })
+            response.headers["Accept-Post"] = f"application/json, {METRIC_FRAME_CONTENT_TYPE}"
+            return response, 415
+        
+        if points:
+            db.log_metrics(experiment_id, points)
+        
+        if events.has_subscribers(experiment_id):
+            timestamp = datetime.utcnow().isoformat()
+            for key, value, step in points:
+                events.publish(experiment_id, {
+                    "type": "metric",
+                    "experiment_id": experiment_id,
+                    "key": key,
+                    "value": value,
+                    "step": step,
+                    "timestamp": timestamp
+                })
+        
+        return jsonify({
+            "status": "success",
+            "count": len(points),
+            "message": f"{len(points)} metrics logged for experiment {experiment_id}"
+        }), 201
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error logging metrics: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/models', methods=['GET'])
+def list_models():
+    """Every registered model version, ordered by model name"""
+    try:
+        return jsonify({
+            "versions": db.list_model_versions()
+        })
+    except Exception as e:
+        logger.error(f"Error listing model versions: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/models/<model_name>/versions', methods=['GET'])
+def list_model_versions(model_name):
+    """Registered versions of a model, oldest first"""
+    try:
+        versions = db.list_model_versions(model_name)
+        return jsonify({
+            "model_name": model_name,
+            "versions": versions,
+            "count": len(versions)
+        })
+    except Exception as e:
+        logger.error(f"Error listing model versions: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/models/<model_name>/versions', methods=['POST'])
+def register_model_version(model_name):
+    """
+    Register a model version (or update its experiment and metadata)
+    
+    Request body:
+    {
+        "version": "1.2.3",
+        "experiment_id": "exp_20260205_100000",
+        "metadata": {"framework": "sklearn", "feature_spec": {"version": 1, "features": [...]}}
+    }
+    
+    metadata.feature_spec (see mlops_sdk.features) is compiled by serving
+    into the version's input transform; a spec serving could not compile is
+    rejected with 400 (see feature_spec.py).
+    """
+    try:
+        data = request.get_json()
+        
+        if not isinstance(data, dict) or not data.get("version"):
+            return jsonify({
+                "error": "version is required"
+            }), 400
+        if data.get("metadata") is not None and not isinstance(data["metadata"], dict):
+            return jsonify({
+                "error": "metadata must be an object"
+            }), 400
+        spec = (data.get("metadata") or {}).get("feature_spec")
+        if spec is not None:
+            try:
+                validate_feature_spec(spec)
+            except ValueError as e:
+                return jsonify({
+                    "error": f"Invalid metadata.feature_spec: {e}"
+                }), 400
+        
+        version = db.save_model_version(model_name, str(data["version"]), data.get("experiment_id"),
+                                        data.get("metadata"))
+        return jsonify(version), 201
+        
+    except Exception as e:
+        logger.error(f"Error registering model version: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/models/<model_name>/versions/<version>', methods=['GET'])
+def get_model_version(model_name, version):
+    """Get a registered model version"""
+    try:
+        model_version = db.get_model_version(model_name, version)
+        
+        if model_version is None:
+            return jsonify({
+                "error": "Model version not found"
+            }), 404
+        
+        return jsonify(model_version)
+        
+    except Exception as e:
+        logger.error(f"Error retrieving model version: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/models/<model_name>/versions/<version>/reference', methods=['PUT'])
+def save_reference_profile(model_name, version):
+    """
+    Store the feature profile serving measures input drift against
+    
+    Request body (as built by mlops_sdk.drift.build_reference_profile):
+    {
+        "count": 10000,
+        "features": {
+            "amount": {"type": "numeric", "edges": [...], "fractions": [...], "mean": 52.1, ...},
+            "merchant": {"type": "categorical", "fractions": {"shop": 0.97, "__other__": 0.03}, ...}
+        }
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not isinstance(data, dict) or not isinstance(data.get("features"), dict):
+            return jsonify({
+                "error": "features object is required"
+            }), 400
+        
+        if not db.save_reference_profile(model_name, version, data):
+            return jsonify({
+                "error": "Model version not found"
+            }), 404
+        
+        return jsonify({
+            "status": "success",
+            "message": f"Reference profile saved for {model_name}:{version}"
+        }), 201
+        
+    except Exception as e:
+        logger.error(f"Error saving reference profile: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/models/<model_name>/versions/<version>/reference', methods=['GET'])
+def get_reference_profile(model_name, version):
+    """Get a model version's reference feature profile"""
+    try:
+        profile = db.get_reference_profile(model_name, version)
+        
+        if profile is None:
+            return jsonify({
+                "error": "Reference profile not found"
+            }), 404
+        
+        return json_response(profile)
+        
+    except Exception as e:
+        logger.error(f"Error retrieving reference profile: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/models/<model_name>/versions/<version>/predictions', methods=['POST'])
+def log_predictions(model_name, version):
+    """
+    Ingest predictions served by a model version
+    
+    Request body: NDJSON (Content-Type: application/x-ndjson), optionally
+    with Content-Encoding: gzip, one prediction per line:
+    {"prediction_id": "9f2c...-17", "timestamp": 1767225600.25, "request_id": "abc",
+     "features": {...}, "outputs": {...}, "latency_ms": 31.5}
+    or JSON {"predictions": [...]}. Predictions whose id is already stored
+    are skipped, so a batch can be re-sent after a timeout.
+    """
+    try:
+        if request.mimetype in NDJSON_CONTENT_TYPES:
+            records = records_from_ndjson(decode_body(request.get_data(), request.headers.get("Content-Encoding")))
+        elif request.is_json:
+            data = json.loads(decode_body(request.get_data(), request.headers.get("Content-Encoding")))
+            if not isinstance(data, dict) or not isinstance(data.get("predictions"), list):
+                raise ValueError("predictions list is required")
+            records = data["predictions"]
+        else:
+            response = jsonify({
+                "error": f"Unsupported content type '{request.mimetype}'"
+            })
+            response.headers["Accept-Post"] = "application/json, " + ", ".join(NDJSON_CONTENT_TYPES)
+            return response, 415
+        
+        stored = db.log_predictions(model_name, version, records) if records else 0
+        
+        return jsonify({
+            "status": "success",
+            "received": len(records),
+            "stored": stored
+        }), 201
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error logging predictions: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/models/<model_name>/versions/<version>/predictions', methods=['GET'])
+def get_predictions(model_name, version):
+    """
+    Logged predictions of a model version, oldest first
+    
+    Query parameters:
+        since: Only predictions logged after this time (seconds since the epoch);
+               pass the last timestamp of a page to fetch the next one
+        limit: Maximum number of predictions (default 1000, at most 10000)
+    """
+    try:
+        predictions = db.get_predictions(model_name, version,
+                                         since=request.args.get('since', None, type=float),
+                                         limit=request.args.get('limit', 1000, type=int))
+        return json_response({
+            "model_name": model_name,
+            "version": version,
+            "predictions": predictions,
+            "count": len(predictions)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error retrieving predictions: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/maintenance', methods=['GET'])
+def get_maintenance():
+    """Results of the last maintenance run"""
+    return jsonify({
+        "interval": maintenance.interval,
+        "last_run": maintenance.last_run
+    })
+
+
+@app.route('/api/maintenance/run', methods=['POST'])
+def run_maintenance():
+    """Run retention, downsampling and vacuum now (waits for a scheduled run in progress)"""
+    try:
+        return jsonify(maintenance.run_once())
+    except Exception as e:
+        logger.error(f"Error running maintenance: {e}")
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events stream of new metric points and status changes
+    
+    Query parameters:
+        experiment_id: Experiment to follow (repeatable). Omit to follow all.
+    
+    Events:
+        metric  - {"experiment_id", "key", "value", "step", "timestamp"}
+        status  - {"experiment_id", "experiment_name", "status", "duration", "timestamp"}
+        resync  - the client fell behind and should re-fetch current state
+    """
+    subscription = events.subscribe(request.args.getlist('experiment_id'))
+    
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if subscription.overflowed:
+                    while subscription.get(timeout=0) is not None:
+                        pass
+                    subscription.overflowed = False
+                    yield "event: resync\ndata: {}\n\n"
+                
+                event = subscription.get(timeout=STREAM_HEARTBEAT)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            events.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
 if __name__ == '__main__':
     logger.info("Starting Model Registry service...")
+    # debug=True serves from a reloader child process, marked with WERKZEUG_RUN_MAIN
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_maintenance()
     app.run(host='0.0.0.0', port=5000, debug=True)
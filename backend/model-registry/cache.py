@@ -0,0 +1,72 @@
+"""Size-bounded LRU cache for experiment documents"""
+
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with explicit invalidation
+
+    Read-through callers take a token() before loading from the database and
+    pass it to put(); if the key was invalidated in the meantime the stale
+    value is not stored. Invalidations are tracked in a fixed number of
+    stripes, so this costs constant memory however many keys are written.
+    """
+
+    STRIPES = 256
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._generations = [0] * self.STRIPES
+        self._lock = threading.Lock()
+
+    def _stripe(self, key: Hashable) -> int:
+        return zlib.crc32(str(key).encode()) % self.STRIPES
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for key, or None"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def token(self, key: Hashable) -> int:
+        """Invalidation generation for key, to pass to put()"""
+        with self._lock:
+            return self._generations[self._stripe(key)]
+
+    def put(self, key: Hashable, value: Any, token: int):
+        """Store value unless key was invalidated since token() was taken"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if self._generations[self._stripe(key)] != token:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Drop key and reject in-flight put()s for it"""
+        with self._lock:
+            self._generations[self._stripe(key)] += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._generations = [generation + 1 for generation in self._generations]
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
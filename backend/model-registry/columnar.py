@@ -0,0 +1,152 @@
+"""Columnar export and import of experiments
+
+Experiments, their parameters and their metric points are exported one
+table at a time as Apache Arrow IPC streams or Parquet files, built chunk by
+chunk from StorageBackend.export_rows so that memory use stays bounded by
+the chunk size however many metric points a selection holds. Each chunk
+becomes one Arrow record batch or one Parquet row group.
+
+Imports take the same tables back (Arrow IPC stream or Parquet bodies) and
+hand their rows to import_experiments/import_rows, which insert a whole
+body in one transaction. Columns are those of storage.EXPORT_COLUMNS;
+parameter values stay JSON-encoded text.
+
+Requires pyarrow (pip install pyarrow); without it the export and import
+endpoints answer 501.
+"""
+
+import io
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from storage import EXPORT_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+ARROW_STREAM_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_CONTENT_TYPE = "application/vnd.apache.parquet"
+
+# format name -> (content type, file extension)
+FORMATS = {
+    "arrow": (ARROW_STREAM_CONTENT_TYPE, "arrows"),
+    "parquet": (PARQUET_CONTENT_TYPE, "parquet"),
+}
+
+# Column types; every column not listed is a string
+_TYPES = {
+    ("experiments", "duration"): "float64",
+    ("metrics", "value"): "float64",
+    ("metrics", "step"): "int64",
+    ("metrics", "samples"): "int64",
+}
+
+
+def available() -> bool:
+    """Whether pyarrow is installed"""
+    return pa is not None
+
+
+def table_schema(table: str) -> "pa.Schema":
+    """Arrow schema of an exported table"""
+    if table not in EXPORT_COLUMNS:
+        raise KeyError(table)
+    return pa.schema([(column, getattr(pa, _TYPES.get((table, column), "string"))())
+                      for column in EXPORT_COLUMNS[table]])
+
+
+def _record_batch(schema: "pa.Schema", rows: List[Tuple]) -> "pa.RecordBatch":
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.record_batch([pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                           schema=schema)
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self.parts: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def encode_chunks(table: str, chunks: Iterable[List[Tuple]], format: str = "parquet") -> Iterator[bytes]:
+    """Encode chunks of EXPORT_COLUMNS rows as an Arrow IPC stream or a Parquet file, piece by piece"""
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    schema = table_schema(table)
+    sink = _Sink()
+    # zstd: experiment ids, keys and timestamps repeat from row to row
+    if format == "arrow":
+        writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+    else:
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in chunks:
+            writer.write_batch(_record_batch(schema, rows))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+class TooManyRows(ValueError):
+    """An upload holds more rows than decode_rows was allowed to return"""
+
+
+def decode_rows(table: str, body: bytes, content_type: str,
+                max_rows: Optional[int] = None) -> Iterator[List[Tuple]]:
+    """Rows, in EXPORT_COLUMNS order, of an uploaded Arrow IPC stream or Parquet file, one list per batch
+
+    Raises TooManyRows, before converting the batch that crosses it, if the
+    upload holds more than max_rows rows.
+    """
+    schema = table_schema(table)
+    try:
+        if content_type == ARROW_STREAM_CONTENT_TYPE:
+            reader = pa.ipc.open_stream(body)
+            batches = iter(reader)
+            names = reader.schema.names
+        elif content_type == PARQUET_CONTENT_TYPE:
+            parquet = pq.ParquetFile(pa.BufferReader(body))
+            names = parquet.schema_arrow.names
+            batches = parquet.iter_batches(columns=[name for name in schema.names if name in names])
+        else:
+            raise ValueError(f"Unsupported content type '{content_type}'")
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Invalid {table} upload: {e}")
+    missing = [name for name in schema.names if name not in names]
+    if missing:
+        raise ValueError(f"{table} upload is missing columns: {', '.join(missing)}")
+
+    decoded = 0
+    for batch in batches:
+        decoded += batch.num_rows
+        if max_rows is not None and decoded > max_rows:
+            raise TooManyRows(f"{table} upload holds more than {max_rows} rows")
+        try:
+            columns = [batch.column(name).cast(field.type).to_pylist() for name, field in zip(schema.names, schema)]
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise ValueError(f"Invalid {table} upload: {e}")
+        if columns[0] and None in columns[0]:
+            raise ValueError(f"{table} upload has rows without an experiment_id")
+        yield list(zip(*columns))
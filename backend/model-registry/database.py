@@ -1,32 +1,95 @@
 """Database models and setup for experiment tracking"""
 
 import sqlite3
+import heapq
 import json
+import os
+import re
+import time
+import zlib
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Mapping, Optional, Tuple
 import logging
 
+from storage import (
+    DELETED_STATUS, EXPORT_COLUMNS, MAX_COMPARE_RUNS, MAX_PREDICTIONS_PAGE, MODEL_VERSION_COLUMNS,
+    PREDICTION_COLUMNS, SUMMARY_COLUMNS, MetricPoint, ParamFilter, PointSummary, StorageBackend,
+    comparison_table, model_version_from_row, param_conditions, parameter_import_rows, placeholders,
+    prediction_from_row, prediction_rows, rollup_rows, rows_to_import, run_conditions, summarize_metric_rows,
+    summarize_points, typed_param, validate_comparison
+)
+
 logger = logging.getLogger(__name__)
 
+# Rows read at a time when moving an experiment's metrics to another file
+SHARD_MIGRATION_BATCH = 10000
+
 
-class Database:
-    """SQLite database manager for experiment tracking"""
+class Database(StorageBackend):
+    """SQLite database manager for experiment tracking
     
-    def __init__(self, db_path: str = "mlops.db"):
+    With metric_shards > 0, metric points and their summaries are partitioned
+    by experiment across that many additional SQLite files next to db_path
+    (mlops.metrics-00.db, ...). Each file has its own write lock, so metric
+    ingest for different experiments proceeds in parallel; experiments and
+    parameters stay in the main file. The count the files are laid out for is
+    recorded in the main file, and opening them with a different count
+    (including 0) moves metrics to where the new count puts them.
+    """
+    
+    def __init__(self, db_path: str = "mlops.db", cache_size: int = 1024, metric_shards: int = 0):
         self.db_path = db_path
+        self.metric_shards = metric_shards
+        self.shard_paths = [self._shard_path(i) for i in range(metric_shards)]
+        super().__init__(cache_size)
         self.init_db()
     
+    def _shard_path(self, shard: int) -> str:
+        root, ext = os.path.splitext(self.db_path)
+        return f"{root}.metrics-{shard:02d}{ext or '.db'}"
+    
     def get_connection(self):
         """Get database connection"""
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
     
+    def shard_for(self, experiment_id: str) -> Optional[int]:
+        """Index of the metrics shard holding an experiment (None when unsharded)"""
+        if not self.metric_shards:
+            return None
+        return zlib.crc32(experiment_id.encode()) % self.metric_shards
+    
+    def get_shard_connection(self, shard: int):
+        """Get a connection to one metrics shard"""
+        conn = sqlite3.connect(self.shard_paths[shard])
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def get_metrics_connection(self, experiment_id: str):
+        """Get a connection to the database holding an experiment's metrics"""
+        shard = self.shard_for(experiment_id)
+        return self.get_connection() if shard is None else self.get_shard_connection(shard)
+    
+    def metrics_connections(self) -> Iterator[sqlite3.Connection]:
+        """Connections to every database holding metrics, for fan-out queries"""
+        if not self.metric_shards:
+            yield self.get_connection()
+            return
+        for shard in range(self.metric_shards):
+            yield self.get_shard_connection(shard)
+    
     def init_db(self):
         """Initialize database schema"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # Lets maintenance return freed pages in small steps (only takes
+        # effect when the file is created), then WAL so long streaming reads
+        # run without blocking writers
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         # Experiments table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS experiments (
@@ -41,7 +104,8 @@ class Database:
                 duration REAL,
                 result TEXT,
                 error TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                deleted_at TEXT
             )
         """)
         
@@ -56,7 +120,122 @@ class Database:
             )
         """)
         
-        # Metrics table
+        # Metrics tables (unused in the main file when sharded, except as a
+        # migration source for metrics logged before sharding was enabled)
+        self._init_metrics_schema(cursor)
+        
+        # Soft-delete time, for databases created before soft deletes existed
+        cursor.execute("PRAGMA table_info(experiments)")
+        if "deleted_at" not in {row["name"] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE experiments ADD COLUMN deleted_at TEXT")
+        
+        # Typed copies of parameter values, for indexed filtering
+        cursor.execute("PRAGMA table_info(parameters)")
+        parameter_columns = {row["name"] for row in cursor.fetchall()}
+        if "value_num" not in parameter_columns:
+            cursor.execute("ALTER TABLE parameters ADD COLUMN value_num REAL")
+            cursor.execute("ALTER TABLE parameters ADD COLUMN value_text TEXT")
+            cursor.execute("""
+                UPDATE parameters SET
+                    value_num = CASE json_type(value)
+                        WHEN 'integer' THEN json_extract(value, '$')
+                        WHEN 'real' THEN json_extract(value, '$')
+                        WHEN 'true' THEN 1.0
+                        WHEN 'false' THEN 0.0
+                    END,
+                    value_text = CASE json_type(value)
+                        WHEN 'text' THEN json_extract(value, '$')
+                    END
+            """)
+        
+        # Timing spans and sampling profiles sent by the SDK, one document per run
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS experiment_profiles (
+                experiment_id TEXT PRIMARY KEY,
+                profile TEXT NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Registered model versions; metadata and the drift reference profile are JSON documents
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS model_versions (
+                model_name TEXT NOT NULL,
+                version TEXT NOT NULL,
+                experiment_id TEXT,
+                metadata TEXT NOT NULL DEFAULT '{}',
+                reference_profile TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (model_name, version)
+            )
+        """)
+        
+        # Predictions logged by serving, for joining with ground truth later
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                prediction_id TEXT PRIMARY KEY,
+                model_name TEXT NOT NULL,
+                version TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                request_id TEXT,
+                features TEXT,
+                outputs TEXT,
+                latency_ms REAL
+            )
+        """)
+        
+        # Materialized experiment counts per status, maintained by save_experiment
+        # so dashboards never have to scan the experiments table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS experiment_status_counts (
+                status TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        
+        # Settings the files on disk were laid out for (metric_shards)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS registry_settings (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_experiments_created_at ON experiments(created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_experiments_name ON experiments(experiment_name, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_parameters_experiment ON parameters(experiment_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_parameters_num ON parameters(key, value_num, experiment_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_parameters_text ON parameters(key, value_text, experiment_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_predictions_version ON predictions(model_name, version, timestamp)")
+        
+        # Backfill counts for databases created before the summary table existed
+        cursor.execute("SELECT COUNT(*) FROM experiment_status_counts")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("""
+                INSERT INTO experiment_status_counts (status, count)
+                SELECT status, COUNT(*) FROM experiments GROUP BY status
+            """)
+        
+        conn.commit()
+        conn.close()
+        
+        for shard in range(self.metric_shards):
+            shard_conn = self.get_shard_connection(shard)
+            shard_cursor = shard_conn.cursor()
+            shard_cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            shard_cursor.execute("PRAGMA journal_mode=WAL")
+            self._init_metrics_schema(shard_cursor)
+            shard_conn.commit()
+            shard_conn.close()
+        self._rebalance_metrics()
+        
+        logger.info(f"Database initialized at {self.db_path}"
+                    + (f" with {self.metric_shards} metric shards" if self.metric_shards else ""))
+    
+    @classmethod
+    def _init_metrics_schema(cls, cursor):
+        """Create the metrics and metric_summaries tables in one database file"""
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS metrics (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -65,13 +244,193 @@ class Database:
                 value REAL NOT NULL,
                 step INTEGER,
                 timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+                samples INTEGER NOT NULL DEFAULT 1,
                 FOREIGN KEY (experiment_id) REFERENCES experiments(experiment_id)
             )
         """)
         
+        # Per-run summary of each metric series, maintained by log_metric,
+        # so comparisons and leaderboards never aggregate the raw metrics
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS metric_summaries (
+                experiment_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                last_value REAL,
+                last_step INTEGER,
+                min_value REAL,
+                max_value REAL,
+                count INTEGER NOT NULL DEFAULT 0,
+                compacted_id INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (experiment_id, key)
+            )
+        """)
+        
+        # Downsampling bookkeeping, for files created before it existed:
+        # raw points folded into each row, and each series' rollup watermark
+        cursor.execute("PRAGMA table_info(metrics)")
+        if "samples" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE metrics ADD COLUMN samples INTEGER NOT NULL DEFAULT 1")
+        cursor.execute("PRAGMA table_info(metric_summaries)")
+        if "compacted_id" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE metric_summaries ADD COLUMN compacted_id INTEGER NOT NULL DEFAULT 0")
+        
+        # Experiments copied into this file by a shard rebalance that their
+        # source file (shard index, NULL for the main file) still has to drop
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS metric_moves (
+                experiment_id TEXT PRIMARY KEY,
+                source INTEGER
+            )
+        """)
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_experiment ON metrics(experiment_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_metric_summaries_key_last ON metric_summaries(key, last_value)")
+        
+        cursor.execute("SELECT 1 FROM metric_summaries LIMIT 1")
+        if cursor.fetchone() is None:
+            cls._rebuild_metric_summaries(cursor)
+    
+    @staticmethod
+    def _rebuild_metric_summaries(cursor):
+        """Recompute every metric summary from the raw metrics"""
+        cursor.execute("DELETE FROM metric_summaries")
+        cursor.execute("""
+            INSERT INTO metric_summaries
+            (experiment_id, key, last_value, last_step, min_value, max_value, count)
+            SELECT agg.experiment_id, agg.key, last.value, last.step, agg.min_value, agg.max_value, agg.count
+            FROM (
+                SELECT experiment_id, key, MIN(value) AS min_value, MAX(value) AS max_value,
+                       SUM(samples) AS count, MAX(id) AS last_id
+                FROM metrics GROUP BY experiment_id, key
+            ) agg
+            JOIN metrics last ON last.id = agg.last_id
+        """)
+    
+    def _metrics_file_connection(self, shard: Optional[int]):
+        """Connection to the main file (shard None) or a shard file, in or out of the configured count"""
+        conn = sqlite3.connect(self.db_path if shard is None else self._shard_path(shard))
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def _shard_files_on_disk(self) -> List[int]:
+        """Indexes of the metric shard files next to db_path, whatever count created them"""
+        root, ext = os.path.splitext(self.db_path)
+        pattern = re.compile(re.escape(os.path.basename(root)) + r"\.metrics-(\d{2,})" + re.escape(ext or ".db") + "$")
+        matches = [pattern.match(name) for name in os.listdir(os.path.dirname(os.path.abspath(self.db_path)))]
+        return sorted(int(match.group(1)) for match in matches if match)
+    
+    def _rebalance_metrics(self):
+        """
+        Move metrics into the files the configured shard count puts them in
+        
+        Runs when the count recorded in registry_settings differs from
+        metric_shards, or was never recorded: every metrics file on disk is
+        scanned and each experiment found outside its file under the new count
+        is moved there with its summaries. The record is removed while moves
+        are under way, so a rebalance interrupted by a crash runs again on the
+        next start (with whatever count that start is given).
+        """
+        conn = self.get_connection()
+        row = conn.execute("SELECT value FROM registry_settings WHERE name = 'metric_shards'").fetchone()
+        if row is not None and int(row["value"]) == self.metric_shards:
+            conn.close()
+            return
+        
+        conn.execute("DELETE FROM registry_settings WHERE name = 'metric_shards'")
+        conn.commit()
+        files: List[Optional[int]] = [None] + self._shard_files_on_disk()
+        
+        # Finish moves whose copy committed before the source dropped the rows
+        for target in files:
+            target_conn = self._metrics_file_connection(target)
+            self._init_metrics_schema(target_conn.cursor())
+            target_conn.commit()
+            for move in target_conn.execute("SELECT experiment_id, source FROM metric_moves").fetchall():
+                self._drop_moved_metrics(target_conn, move["experiment_id"], move["source"])
+            target_conn.close()
+        
+        moved = 0
+        for source in files:
+            source_conn = self._metrics_file_connection(source)
+            experiment_ids = [row[0] for row in source_conn.execute("""
+                SELECT experiment_id FROM metrics WHERE experiment_id IS NOT NULL
+                UNION SELECT experiment_id FROM metric_summaries
+            """)]
+            source_conn.close()
+            for experiment_id in experiment_ids:
+                target = self.shard_for(experiment_id)
+                if target != source:
+                    self._move_metrics(experiment_id, source, target)
+                    moved += 1
+        
+        conn.execute("""
+            INSERT INTO registry_settings (name, value) VALUES ('metric_shards', ?)
+        """, (str(self.metric_shards),))
         conn.commit()
         conn.close()
-        logger.info(f"Database initialized at {self.db_path}")
+        if moved:
+            logger.info(f"Moved the metrics of {moved} experiments into "
+                        + (f"{self.metric_shards} shards" if self.metric_shards else "the main file"))
+    
+    def _move_metrics(self, experiment_id: str, source: Optional[int], target: Optional[int]):
+        """Move one experiment's metric rows and summaries between files (None is the main file)"""
+        source_conn = self._metrics_file_connection(source)
+        target_conn = self._metrics_file_connection(target)
+        try:
+            # Copied in one target transaction, together with the metric_moves
+            # record that tells a restart the source still has to drop them
+            last_id = 0
+            while True:
+                rows = source_conn.execute("""
+                    SELECT id, key, value, step, timestamp, samples FROM metrics
+                    WHERE experiment_id = ? AND id > ? ORDER BY id LIMIT ?
+                """, (experiment_id, last_id, SHARD_MIGRATION_BATCH)).fetchall()
+                if not rows:
+                    break
+                target_conn.executemany("""
+                    INSERT INTO metrics (experiment_id, key, value, step, timestamp, samples)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [(experiment_id,) + tuple(row)[1:] for row in rows])
+                last_id = rows[-1]["id"]
+            
+            # Summaries are copied rather than rebuilt, since downsampled rows no
+            # longer hold the exact min/max; compacted_id restarts at 0 because
+            # row ids differ in the target (points logged there since the count
+            # changed are newer, so their last value is kept)
+            summaries = source_conn.execute("""
+                SELECT key, last_value, last_step, min_value, max_value, count FROM metric_summaries
+                WHERE experiment_id = ?
+            """, (experiment_id,)).fetchall()
+            target_conn.executemany("""
+                INSERT INTO metric_summaries
+                (experiment_id, key, last_value, last_step, min_value, max_value, count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(experiment_id, key) DO UPDATE SET
+                    min_value = MIN(min_value, excluded.min_value),
+                    max_value = MAX(max_value, excluded.max_value),
+                    count = count + excluded.count,
+                    compacted_id = 0
+            """, [(experiment_id,) + tuple(summary) for summary in summaries])
+            target_conn.execute("""
+                INSERT OR REPLACE INTO metric_moves (experiment_id, source) VALUES (?, ?)
+            """, (experiment_id, source))
+            target_conn.commit()
+            
+            self._drop_moved_metrics(target_conn, experiment_id, source)
+        finally:
+            source_conn.close()
+            target_conn.close()
+        self.experiment_cache.invalidate(experiment_id)
+    
+    def _drop_moved_metrics(self, target_conn, experiment_id: str, source: Optional[int]):
+        """Delete an experiment's metrics from the file they were copied out of, then its metric_moves record"""
+        source_conn = self._metrics_file_connection(source)
+        source_conn.execute("DELETE FROM metrics WHERE experiment_id = ?", (experiment_id,))
+        source_conn.execute("DELETE FROM metric_summaries WHERE experiment_id = ?", (experiment_id,))
+        source_conn.commit()
+        source_conn.close()
+        target_conn.execute("DELETE FROM metric_moves WHERE experiment_id = ?", (experiment_id,))
+        target_conn.commit()
     
     def save_experiment(self, data: Dict[str, Any]) -> str:
         """Save or update experiment data"""
@@ -85,17 +444,22 @@ class Database:
             experiment_id = f"exp_{timestamp}"
         
         # Check if experiment exists
-        cursor.execute("SELECT id FROM experiments WHERE experiment_id = ?", (experiment_id,))
+        cursor.execute("SELECT id, status FROM experiments WHERE experiment_id = ?", (experiment_id,))
         existing = cursor.fetchone()
+        status = data.get("status", "running")
         
         if existing:
+            if existing["status"] != status:
+                self._adjust_status_count(cursor, existing["status"], -1)
+                self._adjust_status_count(cursor, status, 1)
+            
             # Update existing experiment
             cursor.execute("""
                 UPDATE experiments 
                 SET status = ?, end_time = ?, duration = ?, result = ?, error = ?
                 WHERE experiment_id = ?
             """, (
-                data.get("status", "running"),
+                status,
                 data.get("end_time"),
                 data.get("duration"),
                 data.get("result"),
@@ -113,26 +477,37 @@ class Database:
                 data.get("experiment_name"),
                 data.get("function_name"),
                 data.get("module"),
-                data.get("status", "running"),
+                status,
                 data.get("start_time")
             ))
+            self._adjust_status_count(cursor, status, 1)
             
             # Save parameters
             parameters = data.get("parameters", {})
             for key, value in parameters.items():
+                value_num, value_text = typed_param(value)
                 cursor.execute("""
-                    INSERT INTO parameters (experiment_id, key, value)
-                    VALUES (?, ?, ?)
-                """, (experiment_id, key, json.dumps(value)))
+                    INSERT INTO parameters (experiment_id, key, value, value_num, value_text)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (experiment_id, key, json.dumps(value), value_num, value_text))
         
         conn.commit()
         conn.close()
+        self.experiment_cache.invalidate(experiment_id)
         
         logger.info(f"Saved experiment: {experiment_id}")
         return experiment_id
     
-    def get_experiment(self, experiment_id: str) -> Optional[Dict[str, Any]]:
-        """Retrieve experiment by ID"""
+    @staticmethod
+    def _adjust_status_count(cursor, status: Optional[str], delta: int):
+        """Apply an increment to the materialized per-status experiment count"""
+        cursor.execute("""
+            INSERT INTO experiment_status_counts (status, count) VALUES (?, ?)
+            ON CONFLICT(status) DO UPDATE SET count = count + excluded.count
+        """, (status, delta))
+    
+    def _load_experiment(self, experiment_id: str) -> Optional[Dict[str, Any]]:
+        """Read an experiment with its parameters and metrics from the database"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -150,41 +525,691 @@ class Database:
         params = {row["key"]: json.loads(row["value"]) for row in cursor.fetchall()}
         experiment["parameters"] = params
         
+        conn.close()
+        
         # Get metrics
-        cursor.execute("SELECT key, value, step, timestamp FROM metrics WHERE experiment_id = ?", (experiment_id,))
+        metrics_conn = self.get_metrics_connection(experiment_id)
+        cursor = metrics_conn.execute(
+            "SELECT key, value, step, timestamp FROM metrics WHERE experiment_id = ?", (experiment_id,)
+        )
         metrics = [dict(row) for row in cursor.fetchall()]
         experiment["metrics"] = metrics
         
-        conn.close()
+        metrics_conn.close()
         return experiment
     
-    def get_all_experiments(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get all experiments"""
+    @staticmethod
+    def _listing_query(limit: Optional[int],
+                       param_filters: Optional[List[ParamFilter]]) -> Tuple[str, List[Any]]:
+        """SQL for the experiment listing, newest first"""
+        conditions, args = param_conditions(param_filters or [])
+        sql = f"""
+            SELECT e.experiment_id, e.experiment_name, e.status, e.start_time, e.duration, e.created_at
+            FROM experiments e
+            WHERE {' AND '.join(["e.status != ?"] + conditions)}
+            ORDER BY e.created_at DESC 
+            LIMIT ?
+        """
+        return sql, [DELETED_STATUS] + args + [limit if limit is not None else -1]
+    
+    def get_all_experiments(self, limit: int = 100,
+                            param_filters: Optional[List[ParamFilter]] = None) -> List[Dict[str, Any]]:
+        """Get all experiments, optionally only those matching parameter filters"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT experiment_id, experiment_name, status, start_time, duration, created_at
-            FROM experiments 
-            ORDER BY created_at DESC 
-            LIMIT ?
-        """, (limit,))
+        cursor.execute(*self._listing_query(limit, param_filters))
         
         experiments = [dict(row) for row in cursor.fetchall()]
         conn.close()
         
         return experiments
     
+    def iter_experiments(self, limit: Optional[int] = None,
+                         param_filters: Optional[List[ParamFilter]] = None,
+                         chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield experiment rows newest first, fetching chunk_size rows at a time"""
+        sql, args = self._listing_query(limit, param_filters)
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, args)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+    
+    def iter_metrics(self, experiment_id: str, key: Optional[str] = None,
+                     chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield an experiment's metric points in logging order, chunk_size rows at a time"""
+        conn = self.get_metrics_connection(experiment_id)
+        try:
+            cursor = conn.cursor()
+            if key is None:
+                cursor.execute("""
+                    SELECT key, value, step, timestamp FROM metrics
+                    WHERE experiment_id = ? ORDER BY id
+                """, (experiment_id,))
+            else:
+                cursor.execute("""
+                    SELECT key, value, step, timestamp FROM metrics
+                    WHERE experiment_id = ? AND key = ? ORDER BY id
+                """, (experiment_id, key))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+    
+    def export_rows(self, table: str, experiment_ids: List[str], chunk_size: int = 50000) -> Iterator[List[Tuple]]:
+        """Yield a table's rows for the given experiments in chunks (see StorageBackend.export_rows)"""
+        columns = ", ".join(EXPORT_COLUMNS[table])
+        # Metrics are read from each run's shard; everything else from the main file
+        groups: Dict[Optional[int], List[str]] = {}
+        for experiment_id in experiment_ids:
+            shard = self.shard_for(experiment_id) if table == "metrics" else None
+            groups.setdefault(shard, []).append(experiment_id)
+        
+        chunk: List[Tuple] = []
+        for shard, ids in groups.items():
+            conn = self.get_connection() if shard is None else self.get_shard_connection(shard)
+            conn.row_factory = None
+            try:
+                for start in range(0, len(ids), MAX_COMPARE_RUNS):
+                    batch = ids[start:start + MAX_COMPARE_RUNS]
+                    # (experiment_id, id) is the order of idx_*_experiment, so no sort is needed
+                    cursor = conn.execute(f"""
+                        SELECT {columns} FROM {table}
+                        WHERE experiment_id IN ({placeholders(batch)}) ORDER BY experiment_id, id
+                    """, batch)
+                    while True:
+                        rows = cursor.fetchmany(chunk_size - len(chunk))
+                        if not rows:
+                            break
+                        chunk.extend(rows)
+                        if len(chunk) >= chunk_size:
+                            yield chunk
+                            chunk = []
+            finally:
+                conn.close()
+        if chunk:
+            yield chunk
+    
+    def import_experiments(self, rows: List[Tuple]) -> List[str]:
+        """Insert exported experiment rows in one transaction, skipping ids already present"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        present = set()
+        ids = [row[0] for row in rows]
+        for start in range(0, len(ids), MAX_COMPARE_RUNS):
+            batch = ids[start:start + MAX_COMPARE_RUNS]
+            cursor.execute(f"SELECT experiment_id FROM experiments WHERE experiment_id IN ({placeholders(batch)})",
+                           batch)
+            present.update(row[0] for row in cursor.fetchall())
+        new_rows = []
+        for row in rows:
+            if row[0] not in present:
+                present.add(row[0])
+                new_rows.append(row)
+        
+        cursor.executemany(f"""
+            INSERT INTO experiments ({', '.join(EXPORT_COLUMNS['experiments'])})
+            VALUES ({placeholders(EXPORT_COLUMNS['experiments'])})
+        """, new_rows)
+        statuses: Dict[str, int] = {}
+        for row in new_rows:
+            statuses[row[4]] = statuses.get(row[4], 0) + 1
+        for status, count in statuses.items():
+            self._adjust_status_count(cursor, status, count)
+        
+        conn.commit()
+        conn.close()
+        logger.info(f"Imported {len(new_rows)} experiments ({len(rows) - len(new_rows)} already present)")
+        return [row[0] for row in new_rows]
+    
+    def _import_sizes(self, table: str, experiment_ids: List[str]) -> Dict[str, int]:
+        """Parameter rows, or metric samples, the given experiments already hold (see import_sizes)"""
+        groups: Dict[Optional[int], List[str]] = {}
+        for experiment_id in experiment_ids:
+            groups.setdefault(self.shard_for(experiment_id) if table == "metrics" else None, []).append(experiment_id)
+        source, size = ("metric_summaries", "SUM(count)") if table == "metrics" else ("parameters", "COUNT(*)")
+        
+        stored: Dict[str, int] = {}
+        for shard, ids in groups.items():
+            conn = self.get_connection() if shard is None else self.get_shard_connection(shard)
+            try:
+                for start in range(0, len(ids), MAX_COMPARE_RUNS):
+                    batch = ids[start:start + MAX_COMPARE_RUNS]
+                    stored.update((row[0], row[1]) for row in conn.execute(f"""
+                        SELECT experiment_id, {size} FROM {source}
+                        WHERE experiment_id IN ({placeholders(batch)}) GROUP BY experiment_id
+                    """, batch))
+            finally:
+                conn.close()
+        return stored
+    
+    def import_rows(self, table: str, rows: List[Tuple], offset: int = 0) -> int:
+        """Insert exported parameter or metric rows the database lacks, in one transaction per database file"""
+        if table in ("parameters", "metrics"):
+            rows = rows_to_import(table, rows, self._import_sizes(table, list({row[0] for row in rows})), offset)
+        if table == "parameters":
+            conn = self.get_connection()
+            conn.executemany("""
+                INSERT INTO parameters (experiment_id, key, value, value_num, value_text)
+                VALUES (?, ?, ?, ?, ?)
+            """, parameter_import_rows(rows))
+            conn.commit()
+            conn.close()
+        elif table == "metrics":
+            by_shard: Dict[Optional[int], List[Tuple]] = {}
+            if self.metric_shards:
+                for row in rows:
+                    by_shard.setdefault(self.shard_for(row[0]), []).append(row)
+            else:
+                by_shard[None] = rows
+            for shard, shard_rows in by_shard.items():
+                conn = self.get_connection() if shard is None else self.get_shard_connection(shard)
+                cursor = conn.cursor()
+                cursor.executemany(f"""
+                    INSERT INTO metrics ({', '.join(EXPORT_COLUMNS['metrics'])})
+                    VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), COALESCE(?, 1))
+                """, shard_rows)
+                for experiment_id, summaries in summarize_metric_rows(shard_rows).items():
+                    self._update_metric_summaries(cursor, experiment_id, summaries)
+                conn.commit()
+                conn.close()
+        else:
+            raise ValueError(f"Cannot import rows into {table}")
+        
+        for experiment_id in {row[0] for row in rows}:
+            self.experiment_cache.invalidate(experiment_id)
+        return len(rows)
+    
+    @staticmethod
+    def _update_metric_summaries(cursor, experiment_id: str, summaries: Dict[str, PointSummary]):
+        """Fold new points, pre-summarized per key, into the run's last/min/max summaries"""
+        cursor.executemany("""
+            INSERT INTO metric_summaries
+            (experiment_id, key, last_value, last_step, min_value, max_value, count)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(experiment_id, key) DO UPDATE SET
+                last_value = excluded.last_value,
+                last_step = excluded.last_step,
+                min_value = MIN(min_value, excluded.min_value),
+                max_value = MAX(max_value, excluded.max_value),
+                count = count + excluded.count
+        """, [(experiment_id, key) + summary for key, summary in summaries.items()])
+    
+    def compare_experiments(self, experiment_ids: Optional[List[str]] = None,
+                            experiment_name: Optional[str] = None,
+                            metrics: Optional[List[str]] = None,
+                            sort_by: Optional[str] = None, agg: str = "last",
+                            order: str = "desc", limit: int = 100,
+                            param_filters: Optional[List[ParamFilter]] = None) -> Dict[str, Any]:
+        """
+        Side-by-side parameters and metric summaries for many runs
+        
+        Runs are selected by ID, experiment name and/or parameter filters
+        (see parse_param_filter). With sort_by, only runs
+        that logged that metric are returned, ranked by its agg ("last", "min"
+        or "max") value; otherwise the newest runs come first.
+        
+        Returns a columnar table: {"count": N, "columns": {name: [values...]}}
+        with "params.<key>" and "metrics.<key>.<last|min|max>" columns.
+        """
+        limit = validate_comparison(agg, order, experiment_ids, limit)
+        where, args = run_conditions(experiment_name, experiment_ids, param_filters)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        if sort_by and self.metric_shards:
+            runs = self._ranked_runs_sharded(cursor, where, args, sort_by, SUMMARY_COLUMNS[agg], order, limit)
+        elif sort_by:
+            cursor.execute(f"""
+                SELECT e.experiment_id, e.experiment_name, e.status, e.start_time, e.duration
+                FROM experiments e
+                JOIN metric_summaries s ON s.experiment_id = e.experiment_id AND s.key = ?
+                {where}
+                ORDER BY s.{SUMMARY_COLUMNS[agg]} {order.upper()}
+                LIMIT ?
+            """, [sort_by] + args + [limit])
+            runs = [dict(row) for row in cursor.fetchall()]
+        else:
+            cursor.execute(f"""
+                SELECT e.experiment_id, e.experiment_name, e.status, e.start_time, e.duration
+                FROM experiments e
+                {where}
+                ORDER BY e.created_at DESC
+                LIMIT ?
+            """, args + [limit])
+            runs = [dict(row) for row in cursor.fetchall()]
+        ids = [run["experiment_id"] for run in runs]
+        
+        params: Dict[Tuple[str, str], Any] = {}
+        param_keys: List[str] = []
+        if ids:
+            cursor.execute(f"""
+                SELECT experiment_id, key, value FROM parameters
+                WHERE experiment_id IN ({placeholders(ids)})
+            """, ids)
+            for row in cursor.fetchall():
+                params[(row["experiment_id"], row["key"])] = json.loads(row["value"])
+                if row["key"] not in param_keys:
+                    param_keys.append(row["key"])
+        conn.close()
+        
+        return comparison_table(runs, params, param_keys, self._metric_summaries(ids, metrics), metrics)
+    
+    def _metric_summaries(self, ids: List[str],
+                          metrics: Optional[List[str]]) -> Dict[Tuple[str, str], sqlite3.Row]:
+        """Summary rows keyed by (experiment_id, key), fetched from each run's shard"""
+        by_shard: Dict[Optional[int], List[str]] = {}
+        for experiment_id in ids:
+            by_shard.setdefault(self.shard_for(experiment_id), []).append(experiment_id)
+        
+        summaries: Dict[Tuple[str, str], sqlite3.Row] = {}
+        for shard, shard_ids in by_shard.items():
+            conn = self.get_connection() if shard is None else self.get_shard_connection(shard)
+            query = f"""
+                SELECT experiment_id, key, last_value, min_value, max_value
+                FROM metric_summaries WHERE experiment_id IN ({placeholders(shard_ids)})
+            """
+            if metrics:
+                query += f" AND key IN ({placeholders(metrics)})"
+            for row in conn.execute(query, shard_ids + (list(metrics) if metrics else [])):
+                summaries[(row["experiment_id"], row["key"])] = row
+            conn.close()
+        return summaries
+    
+    def _ranked_runs_sharded(self, cursor, where: str, args: List[Any], sort_by: str,
+                             column: str, order: str, limit: int) -> List[Dict[str, Any]]:
+        """Top runs by a metric summary across all shards
+        
+        Each shard streams its summaries for the metric in rank order; the
+        streams are merged and checked against the run filters in the main
+        database in batches until limit runs have been found.
+        """
+        def ranked(conn):
+            try:
+                shard_cursor = conn.execute(f"""
+                    SELECT experiment_id, {column} AS value FROM metric_summaries
+                    WHERE key = ? ORDER BY {column} {order.upper()}
+                """, (sort_by,))
+                while True:
+                    rows = shard_cursor.fetchmany(MAX_COMPARE_RUNS)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                conn.close()
+        
+        streams = [ranked(conn) for conn in self.metrics_connections()]
+        merged = heapq.merge(*streams, key=lambda row: row["value"], reverse=order == "desc")
+        
+        runs: List[Dict[str, Any]] = []
+        extra = f"AND {where[len('WHERE '):]}" if where else ""
+        try:
+            while len(runs) < limit:
+                batch = [row["experiment_id"] for _, row in zip(range(MAX_COMPARE_RUNS), merged)]
+                if not batch:
+                    break
+                cursor.execute(f"""
+                    SELECT e.experiment_id, e.experiment_name, e.status, e.start_time, e.duration
+                    FROM experiments e
+                    WHERE e.experiment_id IN ({placeholders(batch)}) {extra}
+                """, batch + args)
+                matches = {row["experiment_id"]: dict(row) for row in cursor.fetchall()}
+                runs.extend(matches[run_id] for run_id in batch if run_id in matches)
+        finally:
+            for stream in streams:
+                stream.close()
+        return runs[:limit]
+    
+    def get_summary(self, recent_limit: int = 10) -> Dict[str, Any]:
+        """Aggregate experiment statistics for dashboards
+        
+        Reads the materialized status counts and the newest experiments via the
+        created_at index, so the cost does not grow with the number of experiments.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT status, count FROM experiment_status_counts WHERE count > 0 AND status != ?",
+                       (DELETED_STATUS,))
+        status_counts = {row["status"]: row["count"] for row in cursor.fetchall()}
+        
+        cursor.execute("""
+            SELECT experiment_id, experiment_name, status, start_time, end_time, duration, result, created_at
+            FROM experiments
+            WHERE status != ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (DELETED_STATUS, recent_limit))
+        recent = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        durations = [exp["duration"] for exp in recent if exp["duration"] is not None]
+        return {
+            "total_experiments": sum(status_counts.values()),
+            "active_experiments": status_counts.get("running", 0),
+            "status_counts": status_counts,
+            "recent_avg_duration": sum(durations) / len(durations) if durations else None,
+            "recent": recent
+        }
+    
     def log_metric(self, experiment_id: str, key: str, value: float, step: Optional[int] = None):
         """Log a metric for an experiment"""
-        conn = self.get_connection()
+        conn = self.get_metrics_connection(experiment_id)
         cursor = conn.cursor()
         
         cursor.execute("""
             INSERT INTO metrics (experiment_id, key, value, step)
             VALUES (?, ?, ?, ?)
         """, (experiment_id, key, value, step))
+        self._update_metric_summaries(cursor, experiment_id, {key: (value, step, value, value, 1)})
+        
+        conn.commit()
+        conn.close()
+        self.experiment_cache.invalidate(experiment_id)
+        logger.debug(f"Logged metric {key}={value} for experiment {experiment_id}")
+    
+    def log_metrics(self, experiment_id: str, points: List[MetricPoint]):
+        """Log a batch of (key, value, step) points for an experiment in one transaction"""
+        conn = self.get_metrics_connection(experiment_id)
+        cursor = conn.cursor()
+        
+        cursor.executemany("""
+            INSERT INTO metrics (experiment_id, key, value, step)
+            VALUES (?, ?, ?, ?)
+        """, [(experiment_id, key, value, step) for key, value, step in points])
+        self._update_metric_summaries(cursor, experiment_id, summarize_points(points))
+        
+        conn.commit()
+        conn.close()
+        self.experiment_cache.invalidate(experiment_id)
+        logger.debug(f"Logged {len(points)} metric points for experiment {experiment_id}")
+    
+    def save_profile(self, experiment_id: str, profile: Dict[str, Any]) -> bool:
+        """Store (replacing any earlier one) an experiment's timing spans and profiler samples"""
+        conn = self.get_connection()
+        saved = conn.execute("""
+            INSERT INTO experiment_profiles (experiment_id, profile)
+            SELECT experiment_id, ? FROM experiments WHERE experiment_id = ?
+            ON CONFLICT(experiment_id) DO UPDATE SET
+                profile = excluded.profile, created_at = CURRENT_TIMESTAMP
+        """, (json.dumps(profile), experiment_id)).rowcount > 0
+        conn.commit()
+        conn.close()
+        
+        if saved:
+            logger.info(f"Saved profile for experiment {experiment_id}")
+        return saved
+    
+    def get_profile(self, experiment_id: str) -> Optional[Dict[str, Any]]:
+        """An experiment's stored profile, or None"""
+        conn = self.get_connection()
+        row = conn.execute("SELECT profile FROM experiment_profiles WHERE experiment_id = ?",
+                           (experiment_id,)).fetchone()
+        conn.close()
+        return json.loads(row["profile"]) if row else None
+    
+    def save_model_version(self, model_name: str, version: str, experiment_id: Optional[str] = None,
+                           metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Register a model version, or update an existing one's experiment and metadata"""
+        metadata_json = json.dumps(metadata) if metadata is not None else None
+        conn = self.get_connection()
+        conn.execute("""
+            INSERT INTO model_versions (model_name, version, experiment_id, metadata)
+            VALUES (?, ?, ?, COALESCE(?, '{}'))
+            ON CONFLICT(model_name, version) DO UPDATE SET
+                experiment_id = COALESCE(excluded.experiment_id, model_versions.experiment_id),
+                metadata = CASE WHEN ? IS NULL THEN model_versions.metadata ELSE excluded.metadata END,
+                updated_at = CURRENT_TIMESTAMP
+        """, (model_name, version, experiment_id, metadata_json, metadata_json))
+        row = conn.execute(f"SELECT {MODEL_VERSION_COLUMNS} FROM model_versions WHERE model_name = ? AND version = ?",
+                           (model_name, version)).fetchone()
+        conn.commit()
+        conn.close()
         
+        logger.info(f"Saved model version {model_name}:{version}")
+        return model_version_from_row(row)
+    
+    def get_model_version(self, model_name: str, version: str) -> Optional[Dict[str, Any]]:
+        """A model version document, or None"""
+        conn = self.get_connection()
+        row = conn.execute(f"SELECT {MODEL_VERSION_COLUMNS} FROM model_versions WHERE model_name = ? AND version = ?",
+                           (model_name, version)).fetchone()
+        conn.close()
+        return model_version_from_row(row) if row else None
+    
+    def list_model_versions(self, model_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Versions of a model (of every model if None), oldest first"""
+        conn = self.get_connection()
+        if model_name is None:
+            rows = conn.execute(f"""
+                SELECT {MODEL_VERSION_COLUMNS} FROM model_versions ORDER BY model_name, created_at, rowid
+            """).fetchall()
+        else:
+            rows = conn.execute(f"""
+                SELECT {MODEL_VERSION_COLUMNS} FROM model_versions WHERE model_name = ? ORDER BY created_at, rowid
+            """, (model_name,)).fetchall()
+        conn.close()
+        return [model_version_from_row(row) for row in rows]
+    
+    def save_reference_profile(self, model_name: str, version: str, profile: Dict[str, Any]) -> bool:
+        """Store (replacing any earlier one) the feature profile drift is measured against"""
+        conn = self.get_connection()
+        saved = conn.execute("""
+            UPDATE model_versions SET reference_profile = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE model_name = ? AND version = ?
+        """, (json.dumps(profile), model_name, version)).rowcount > 0
         conn.commit()
         conn.close()
-        logger.info(f"Logged metric {key}={value} for experiment {experiment_id}")
+        
+        if saved:
+            logger.info(f"Saved reference profile for model version {model_name}:{version}")
+        return saved
+    
+    def get_reference_profile(self, model_name: str, version: str) -> Optional[Dict[str, Any]]:
+        """A model version's reference feature profile, or None"""
+        conn = self.get_connection()
+        row = conn.execute("SELECT reference_profile FROM model_versions WHERE model_name = ? AND version = ?",
+                           (model_name, version)).fetchone()
+        conn.close()
+        return json.loads(row["reference_profile"]) if row and row["reference_profile"] else None
+    
+    def log_predictions(self, model_name: str, version: str, records: List[Mapping[str, Any]]) -> int:
+        """Store predictions served by a model version, skipping ids already stored"""
+        rows = prediction_rows(model_name, version, records)
+        conn = self.get_connection()
+        added = conn.executemany("""
+            INSERT OR IGNORE INTO predictions
+            (prediction_id, model_name, version, timestamp, request_id, features, outputs, latency_ms)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows).rowcount
+        conn.commit()
+        conn.close()
+        
+        logger.debug(f"Logged {added} predictions for model version {model_name}:{version}")
+        return added
+    
+    def get_predictions(self, model_name: str, version: str, since: Optional[float] = None,
+                        limit: int = 1000) -> List[Dict[str, Any]]:
+        """Logged predictions of a model version with timestamp after since, oldest first"""
+        conn = self.get_connection()
+        rows = conn.execute(f"""
+            SELECT {PREDICTION_COLUMNS} FROM predictions
+            WHERE model_name = ? AND version = ? AND timestamp > ?
+            ORDER BY timestamp, prediction_id
+            LIMIT ?
+        """, (model_name, version, since if since is not None else float("-inf"),
+              min(limit, MAX_PREDICTIONS_PAGE))).fetchall()
+        conn.close()
+        return [prediction_from_row(row) for row in rows]
+    
+    def delete_experiment(self, experiment_id: str) -> bool:
+        """Soft-delete an experiment; its data is removed later by purge_experiments"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT status FROM experiments WHERE experiment_id = ?", (experiment_id,))
+        existing = cursor.fetchone()
+        if existing and existing["status"] != DELETED_STATUS:
+            self._adjust_status_count(cursor, existing["status"], -1)
+            self._adjust_status_count(cursor, DELETED_STATUS, 1)
+            cursor.execute("""
+                UPDATE experiments SET status = ?, deleted_at = CURRENT_TIMESTAMP
+                WHERE experiment_id = ?
+            """, (DELETED_STATUS, experiment_id))
+        
+        conn.commit()
+        conn.close()
+        self.experiment_cache.invalidate(experiment_id)
+        
+        if existing:
+            logger.info(f"Deleted experiment: {experiment_id}")
+        return existing is not None
+    
+    def downsample_metrics(self, older_than: str, bucket_seconds: int,
+                           batch_size: int = 1000, pause: float = 0.0) -> int:
+        """
+        Roll metric points logged before older_than up into bucket_seconds buckets
+        
+        Series with at least two such points past their compacted_id watermark
+        are found with a plain read first; only those are then rolled up, in
+        write transactions of at most batch_size rows, so ingest never waits
+        on more than one batch. Summaries are unaffected: they already hold
+        the exact last/min/max values.
+        """
+        batch_size = max(batch_size, 2)
+        removed = 0
+        for conn in self.metrics_connections():
+            try:
+                series = conn.execute("""
+                    SELECT experiment_id, key, compacted_id FROM metric_summaries s
+                    WHERE (SELECT COUNT(*) FROM (
+                        SELECT 1 FROM metrics m
+                        WHERE m.experiment_id = s.experiment_id AND m.key = s.key
+                          AND m.id > s.compacted_id AND m.timestamp < ?
+                        LIMIT 2
+                    )) = 2
+                """, (older_than,)).fetchall()
+                for experiment_id, key, compacted_id in series:
+                    while True:
+                        conn.execute("BEGIN IMMEDIATE")
+                        rows = conn.execute("""
+                            SELECT id, value, step, timestamp, samples FROM metrics
+                            WHERE experiment_id = ? AND key = ? AND id > ?
+                            ORDER BY id LIMIT ?
+                        """, (experiment_id, key, compacted_id, batch_size)).fetchall()
+                        old = [tuple(row) for row in rows if row["timestamp"] < older_than]
+                        if len(old) < 2:
+                            conn.rollback()
+                            break
+                        
+                        updates, deleted, last_bucket_id = rollup_rows(old, bucket_seconds)
+                        if not deleted and last_bucket_id - 1 <= compacted_id:
+                            conn.rollback()
+                            break
+                        conn.executemany("""
+                            UPDATE metrics SET value = ?, step = ?, timestamp = ?, samples = ? WHERE id = ?
+                        """, updates)
+                        for start in range(0, len(deleted), MAX_COMPARE_RUNS):
+                            chunk = deleted[start:start + MAX_COMPARE_RUNS]
+                            conn.execute(f"DELETE FROM metrics WHERE id IN ({placeholders(chunk)})", chunk)
+                        compacted_id = last_bucket_id - 1
+                        conn.execute("""
+                            UPDATE metric_summaries SET compacted_id = ? WHERE experiment_id = ? AND key = ?
+                        """, (compacted_id, experiment_id, key))
+                        conn.commit()
+                        
+                        removed += len(deleted)
+                        if deleted:
+                            self.experiment_cache.invalidate(experiment_id)
+                            time.sleep(pause)
+                        if len(old) < len(rows) or len(rows) < batch_size:
+                            break
+            finally:
+                conn.close()
+        
+        logger.info(f"Downsampled metrics older than {older_than}: {removed} rows removed")
+        return removed
+    
+    def purge_experiments(self, status: str, older_than: str,
+                          batch_size: int = 1000, pause: float = 0.0) -> int:
+        """
+        Permanently remove experiments in status last changed before older_than
+        
+        Metric rows are deleted batch_size at a time before the experiment row
+        itself, so an interrupted purge is simply resumed by the next run.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT experiment_id FROM experiments
+            WHERE status = ? AND COALESCE(deleted_at, created_at) < ?
+        """, (status, older_than))
+        experiment_ids = [row["experiment_id"] for row in cursor.fetchall()]
+        
+        purged = 0
+        for experiment_id in experiment_ids:
+            metrics_conn = self.get_metrics_connection(experiment_id)
+            while True:
+                deleted = metrics_conn.execute("""
+                    DELETE FROM metrics WHERE id IN (
+                        SELECT id FROM metrics WHERE experiment_id = ? LIMIT ?
+                    )
+                """, (experiment_id, batch_size)).rowcount
+                metrics_conn.commit()
+                if deleted < batch_size:
+                    break
+                time.sleep(pause)
+            metrics_conn.execute("DELETE FROM metric_summaries WHERE experiment_id = ?", (experiment_id,))
+            metrics_conn.commit()
+            metrics_conn.close()
+            
+            cursor.execute("DELETE FROM parameters WHERE experiment_id = ?", (experiment_id,))
+            cursor.execute("DELETE FROM experiment_profiles WHERE experiment_id = ?", (experiment_id,))
+            cursor.execute("DELETE FROM experiments WHERE experiment_id = ? AND status = ?", (experiment_id, status))
+            if cursor.rowcount:
+                self._adjust_status_count(cursor, status, -1)
+                purged += 1
+            conn.commit()
+            self.experiment_cache.invalidate(experiment_id)
+            time.sleep(pause)
+        
+        conn.close()
+        logger.info(f"Purged {purged} {status} experiments older than {older_than}")
+        return purged
+    
+    def vacuum(self, pages: int = 1000) -> int:
+        """
+        Return up to pages free pages per database file to the filesystem
+        
+        Needs incremental auto-vacuum, which new files get automatically. An
+        existing file is converted once, offline, with
+        PRAGMA auto_vacuum=INCREMENTAL; VACUUM;
+        """
+        released = 0
+        for path in [self.db_path] + self.shard_paths:
+            conn = sqlite3.connect(path)
+            try:
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    logger.debug(f"Skipping vacuum of {path}: incremental auto-vacuum is off")
+                    continue
+                before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+                released += before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+                conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+            finally:
+                conn.close()
+        return released
@@ -0,0 +1,101 @@
+"""In-process publish/subscribe for live experiment events"""
+
+import queue
+import threading
+from typing import Any, Dict, Iterable, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """A subscriber's bounded event queue, optionally filtered by experiment"""
+
+    def __init__(self, experiment_ids: Optional[Set[str]], max_queue: int):
+        self.experiment_ids = experiment_ids
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next event, or None if nothing arrived within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """Fan-out of experiment events to live subscribers
+
+    Publishing never blocks the write path: a subscriber that falls behind by
+    more than max_queue events stops receiving them and is flagged as
+    overflowed, so its stream can tell the client to resynchronize.
+    """
+
+    def __init__(self, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._by_experiment: Dict[str, Set[Subscription]] = {}
+        self._wildcard: Set[Subscription] = set()
+
+    def subscribe(self, experiment_ids: Optional[Iterable[str]] = None) -> Subscription:
+        """Subscribe to events for the given experiments (all experiments if None)"""
+        ids = set(experiment_ids) if experiment_ids else None
+        subscription = Subscription(ids, self.max_queue)
+        with self._lock:
+            if ids is None:
+                self._wildcard.add(subscription)
+            else:
+                for experiment_id in ids:
+                    self._by_experiment.setdefault(experiment_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription"""
+        with self._lock:
+            if subscription.experiment_ids is None:
+                self._wildcard.discard(subscription)
+                return
+            for experiment_id in subscription.experiment_ids:
+                subscribers = self._by_experiment.get(experiment_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_experiment[experiment_id]
+
+    def publish(self, experiment_id: str, event: Dict[str, Any]):
+        """Deliver an event to every subscriber of the experiment"""
+        with self._lock:
+            if not self._wildcard and experiment_id not in self._by_experiment:
+                return
+            subscribers = list(self._wildcard) + list(self._by_experiment.get(experiment_id, ()))
+
+        for subscription in subscribers:
+            if subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                subscription.overflowed = True
+                logger.warning("Event subscriber fell behind; dropping events until it resyncs")
+
+    def has_subscribers(self, experiment_id: str) -> bool:
+        """Whether any subscriber would receive events for the experiment"""
+        with self._lock:
+            return bool(self._wildcard) or experiment_id in self._by_experiment
+
+    def subscriber_count(self) -> int:
+        """Number of active subscriptions"""
+        with self._lock:
+            per_experiment = set().union(*self._by_experiment.values()) if self._by_experiment else set()
+            return len(self._wildcard) + len(per_experiment)
+
+    def queue_stats(self) -> Dict[str, int]:
+        """Subscriptions, events waiting in their queues, and subscriptions that overflowed"""
+        with self._lock:
+            subscriptions = set(self._wildcard).union(*self._by_experiment.values())
+        return {
+            "subscribers": len(subscriptions),
+            "queued": sum(subscription.queue.qsize() for subscription in subscriptions),
+            "overflowed": sum(1 for subscription in subscriptions if subscription.overflowed)
+        }
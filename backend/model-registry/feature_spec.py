@@ -0,0 +1,93 @@
+"""Validation of the feature specs stored with model versions
+
+A model version's metadata.feature_spec (see mlops_sdk.features) is
+compiled by every serving replica that loads the version
+(demo/model-serving/features.py, FeatureTransform), and a spec that does
+not compile stops the replica from starting. validate_feature_spec()
+applies the same rules without NumPy, so the registry can refuse such a
+spec when it is registered instead.
+"""
+
+from typing import Any, Dict
+
+SPEC_VERSION = 1
+TYPES = ("numeric", "categorical", "boolean")
+SCALES = ("none", "standard", "minmax")
+ENCODINGS = ("onehot", "ordinal")
+
+# Category and default values that can be looked up (JSON scalars)
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _float(name: str, value: Any, setting: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"feature {name!r}: {setting} must be a number, not {value!r}")
+
+
+def _numeric(name: str, feature: Dict[str, Any]):
+    scale = feature.get("scale", "none")
+    if scale not in SCALES:
+        raise ValueError(f"feature {name!r}: scale must be one of {', '.join(SCALES)}")
+    if scale == "standard":
+        if "mean" not in feature:
+            raise ValueError(f"feature {name!r}: standard scaling needs a mean")
+        _float(name, feature["mean"], "mean")
+        _float(name, feature.get("std") or 1.0, "std")
+    elif scale == "minmax":
+        for setting in ("min", "max"):
+            if setting not in feature:
+                raise ValueError(f"feature {name!r}: minmax scaling needs min and max")
+            _float(name, feature[setting], setting)
+    if "default" in feature:
+        _float(name, feature["default"], "default")
+    elif scale != "standard" and "mean" in feature:
+        _float(name, feature["mean"], "mean")
+    clip = feature.get("clip")
+    if clip is not None:
+        if not isinstance(clip, list) or len(clip) < 2:
+            raise ValueError(f"feature {name!r}: clip must be a [low, high] list")
+        _float(name, clip[0], "clip")
+        _float(name, clip[1], "clip")
+
+
+def _categorical(name: str, feature: Dict[str, Any]):
+    categories = feature.get("categories")
+    if not isinstance(categories, list) or not categories:
+        raise ValueError(f"feature {name!r}: categorical features need a categories list")
+    if not all(isinstance(category, _SCALARS) for category in categories):
+        raise ValueError(f"feature {name!r}: categories must be strings, numbers, booleans or null")
+    encoding = feature.get("encoding", "onehot")
+    if encoding not in ENCODINGS:
+        raise ValueError(f"feature {name!r}: encoding must be one of {', '.join(ENCODINGS)}")
+    default = feature.get("default")
+    if default is not None and (not isinstance(default, _SCALARS) or default not in categories):
+        raise ValueError(f"feature {name!r}: default {default!r} is not one of its categories")
+
+
+def validate_feature_spec(spec: Any):
+    """Raise ValueError if serving could not compile spec into a feature transform"""
+    if not isinstance(spec, dict) or not isinstance(spec.get("features"), list) or not spec["features"]:
+        raise ValueError("feature spec needs a non-empty features list")
+    if spec.get("version", SPEC_VERSION) != SPEC_VERSION:
+        raise ValueError(f"unsupported feature spec version {spec.get('version')}")
+
+    seen = set()
+    for feature in spec["features"]:
+        name = feature.get("name") if isinstance(feature, dict) else None
+        if not isinstance(name, str) or not name:
+            raise ValueError("every feature needs a name")
+        if name in seen:
+            raise ValueError(f"feature {name!r} is declared twice")
+        seen.add(name)
+        kind = feature.get("type")
+        if kind == "numeric":
+            _numeric(name, feature)
+        elif kind == "categorical":
+            _categorical(name, feature)
+        elif kind == "boolean":
+            if not isinstance(feature.get("default", False), _SCALARS):
+                raise ValueError(f"feature {name!r}: default must be a boolean")
+        else:
+            raise ValueError(f"feature {name!r}: type must be one of {', '.join(TYPES)}")
@@ -0,0 +1,226 @@
+"""Request and storage timing for the registry, exposed in Prometheus format
+
+Instrumentation.init_app() times every request by route, and
+instrument_storage() wraps a store's operations (the StorageBackend
+methods) to time them and log those slower than slow_query_seconds.
+Gauges registered with add_gauge() are read when /metrics is scraped.
+render() returns the Prometheus text exposition format (version 0.0.4).
+"""
+
+import functools
+import inspect
+import reprlib
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+from flask import Flask, g, request
+
+from storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans fast cached reads up to slow compares and maintenance batches
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Batched by design and expected to run long; timed but never logged as slow
+MAINTENANCE_OPERATIONS = {"downsample_metrics", "purge_experiments", "vacuum"}
+
+_arguments = reprlib.Repr()
+_arguments.maxstring = 80
+_arguments.maxother = 80
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values]
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observations per label set"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Instrumentation:
+    """Registry request/storage metrics and the slow-query log"""
+
+    def __init__(self, slow_query_seconds: float = 0.5):
+        self.slow_query_seconds = slow_query_seconds
+        self.request_duration = Histogram(
+            "mlops_registry_request_duration_seconds",
+            "Time to build the response, by route (streamed bodies excluded)",
+            ("method", "route", "status")
+        )
+        self.db_duration = Histogram(
+            "mlops_registry_db_operation_duration_seconds",
+            "Time spent in storage operations (for iterators, only while fetching)",
+            ("operation",)
+        )
+        self.db_errors = Counter(
+            "mlops_registry_db_operation_errors_total", "Storage operations that raised", ("operation",)
+        )
+        self.slow_queries = Counter(
+            "mlops_registry_slow_db_operations_total",
+            "Storage operations slower than the slow-query threshold", ("operation",)
+        )
+        self._in_progress = 0
+        self._in_progress_lock = threading.Lock()
+        # name -> (help, type, read())
+        self._gauges: Dict[str, Tuple[str, str, Callable[[], Optional[float]]]] = {}
+        self.add_gauge("mlops_registry_requests_in_progress", "Requests being handled", lambda: self._in_progress)
+
+    def add_gauge(self, name: str, help: str, read: Callable[[], Optional[float]], type: str = "gauge"):
+        """Report read() at scrape time (skipped when it returns None); type "counter" for running totals"""
+        self._gauges[name] = (help, type, read)
+
+    def init_app(self, app: Flask):
+        """Time every request of a Flask app"""
+        @app.before_request
+        def _start_timer():
+            g.instrumentation_started = time.perf_counter()
+            with self._in_progress_lock:
+                self._in_progress += 1
+
+        @app.teardown_request
+        def _finish_request(exc):
+            if "instrumentation_started" in g:
+                with self._in_progress_lock:
+                    self._in_progress -= 1
+
+        @app.after_request
+        def _record(response):
+            started = g.get("instrumentation_started")
+            if started is not None:
+                route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+                self.request_duration.observe(time.perf_counter() - started,
+                                              request.method, route, str(response.status_code))
+            return response
+
+    def _observe(self, operation: str, elapsed: float, args, kwargs):
+        self.db_duration.observe(elapsed, operation)
+        if elapsed >= self.slow_query_seconds and operation not in MAINTENANCE_OPERATIONS:
+            self.slow_queries.inc(operation)
+            logger.warning(f"Slow storage operation {operation} took {elapsed * 1000:.0f}ms "
+                           f"args={_arguments.repr(args)} kwargs={_arguments.repr(kwargs)}")
+
+    def _timed_iterator(self, operation: str, iterator, args, kwargs):
+        """Re-yield iterator's items, timing only the fetches"""
+        elapsed = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    elapsed += time.perf_counter() - started
+                    return
+                elapsed += time.perf_counter() - started
+                yield item
+        finally:
+            iterator.close()
+            self._observe(operation, elapsed, args, kwargs)
+
+    def _wrap(self, operation: str, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                self.db_errors.inc(operation)
+                raise
+            if inspect.isgenerator(result):
+                return self._timed_iterator(operation, result, args, kwargs)
+            self._observe(operation, time.perf_counter() - started, args, kwargs)
+            return result
+        return timed
+
+    def instrument_storage(self, db: StorageBackend) -> StorageBackend:
+        """Time every storage operation of db (patched on the instance)"""
+        for name in sorted(StorageBackend.__abstractmethods__):
+            setattr(db, name, self._wrap(name.lstrip("_"), getattr(db, name)))
+        return db
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format"""
+        lines: List[str] = []
+        for metric in (self.request_duration, self.db_duration, self.db_errors, self.slow_queries):
+            lines += metric.render()
+        for name, (help, type, read) in self._gauges.items():
+            try:
+                value = read()
+            except Exception as e:
+                logger.warning(f"Could not read gauge {name}: {e}")
+                continue
+            if value is None:
+                continue
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {type}", f"{name} {_number(value)}"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,107 @@
+"""Background retention and compaction for the experiment store
+
+Each run:
+
+1. rolls metric points older than downsample_after_days up into
+   bucket_seconds buckets (one sample-weighted point per bucket),
+2. purges experiments per the retention policy: soft-deleted ones after
+   deleted_retention_days, failed ones after failed_retention_days,
+3. returns freed pages to the filesystem with incremental VACUUM.
+
+All work is done in short transactions of at most batch_size rows with a
+pause between them, so ingest is never blocked for long. A policy set to
+0 days (or less) is disabled.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+import logging
+
+from storage import DELETED_STATUS, TIMESTAMP_FORMAT, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceJob:
+    """Runs retention, downsampling and vacuum against a store every interval seconds"""
+
+    def __init__(self, db: StorageBackend, interval: float = 3600,
+                 downsample_after_days: float = 30, bucket_seconds: int = 300,
+                 deleted_retention_days: float = 7, failed_retention_days: float = 90,
+                 batch_size: int = 1000, pause: float = 0.05, vacuum_pages: int = 1000):
+        self.db = db
+        self.interval = interval
+        self.downsample_after_days = downsample_after_days
+        self.bucket_seconds = bucket_seconds
+        self.retention_days = {DELETED_STATUS: deleted_retention_days, "failed": failed_retention_days}
+        self.batch_size = batch_size
+        self.pause = pause
+        self.vacuum_pages = vacuum_pages
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._run_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _cutoff(days: float) -> str:
+        """Store timestamp for days ago"""
+        return (datetime.utcnow() - timedelta(days=days)).strftime(TIMESTAMP_FORMAT)
+
+    def run_once(self) -> Dict[str, Any]:
+        """Run every maintenance step now and return what was done"""
+        with self._run_lock:
+            started = time.time()
+            stats: Dict[str, Any] = {
+                "started_at": datetime.utcnow().isoformat(),
+                "metric_rows_removed": 0,
+                "experiments_purged": {},
+                "pages_released": 0
+            }
+
+            if self.downsample_after_days > 0:
+                stats["metric_rows_removed"] = self.db.downsample_metrics(
+                    self._cutoff(self.downsample_after_days), self.bucket_seconds,
+                    batch_size=self.batch_size, pause=self.pause
+                )
+
+            for status, days in self.retention_days.items():
+                if days > 0:
+                    stats["experiments_purged"][status] = self.db.purge_experiments(
+                        status, self._cutoff(days), batch_size=self.batch_size, pause=self.pause
+                    )
+
+            if self.vacuum_pages > 0:
+                stats["pages_released"] = self.db.vacuum(self.vacuum_pages)
+
+            stats["duration"] = time.time() - started
+            self.last_run = stats
+            logger.info(f"Maintenance finished in {stats['duration']:.1f}s: {stats}")
+            return stats
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Maintenance run failed: {e}")
+
+    def start(self):
+        """Start running in a background thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="registry-maintenance", daemon=True)
+            self._thread.start()
+        logger.info(f"Maintenance scheduled every {self.interval:g}s")
+
+    def stop(self):
+        """Stop the background thread after its current run"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
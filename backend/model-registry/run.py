@@ -6,7 +6,7 @@ import os
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, logger
+from app import app, logger, start_maintenance
 
 if __name__ == '__main__':
     logger.info("=" * 60)
@@ -14,12 +14,37 @@ if __name__ == '__main__':
     logger.info("=" * 60)
     logger.info("API Endpoints:")
     logger.info("  GET  /health - Health check")
+    logger.info("  GET  /metrics - Prometheus metrics")
     logger.info("  POST /api/experiments/track - Track experiment")
     logger.info("  GET  /api/experiments - List all experiments")
+    logger.info("  GET  /api/experiments/compare - Compare runs / leaderboard")
     logger.info("  GET  /api/experiments/<id> - Get experiment details")
+    logger.info("  DELETE /api/experiments/<id> - Delete experiment")
+    logger.info("  GET  /api/experiments/<id>/metrics - Metric history")
     logger.info("  POST /api/experiments/<id>/metrics - Log metric")
+    logger.info("  POST /api/experiments/<id>/metrics/batch - Log metric batch")
+    logger.info("  GET  /api/experiments/<id>/profile - Timing spans and profile")
+    logger.info("  POST /api/experiments/<id>/profile - Save timing spans and profile")
+    logger.info("  GET  /api/export/<table> - Export experiments/parameters/metrics (Parquet or Arrow)")
+    logger.info("  POST /api/import/<table> - Import an exported table")
+    logger.info("  GET  /api/summary - Experiment statistics")
+    logger.info("  GET  /api/models - All model versions")
+    logger.info("  GET  /api/models/<name>/versions - Versions of a model")
+    logger.info("  POST /api/models/<name>/versions - Register model version")
+    logger.info("  GET  /api/models/<name>/versions/<version> - Get model version")
+    logger.info("  PUT  /api/models/<name>/versions/<version>/reference - Save drift reference profile")
+    logger.info("  GET  /api/models/<name>/versions/<version>/reference - Get drift reference profile")
+    logger.info("  POST /api/models/<name>/versions/<version>/predictions - Ingest served predictions (NDJSON)")
+    logger.info("  GET  /api/models/<name>/versions/<version>/predictions - List logged predictions")
+    logger.info("  GET  /api/stream - Live metric/status events (SSE)")
+    logger.info("  GET  /api/maintenance - Last maintenance run")
+    logger.info("  POST /api/maintenance/run - Run retention/downsampling now")
     logger.info("=" * 60)
     logger.info("Starting server on http://localhost:5000")
     logger.info("=" * 60)
     
+    # debug=True serves from a reloader child process, marked with WERKZEUG_RUN_MAIN;
+    # only that one runs the maintenance schedule
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_maintenance()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,54 @@
+"""JSON encoding for registry responses
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Large result sets are streamed as a single JSON document built
+chunk by chunk, so memory use does not grow with the number of rows.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Rows encoded per yielded chunk when streaming
+STREAM_CHUNK_ROWS = 500
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Encode obj as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"), default=str).encode()
+
+
+def json_response(obj: Any, status: int = 200, body: Optional[bytes] = None) -> Response:
+    """JSON response for obj, or for an already encoded body"""
+    return Response(body if body is not None else dumps(obj), status=status, mimetype="application/json")
+
+
+def stream_rows(rows: Iterable[Dict[str, Any]], key: str,
+                chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode rows incrementally as {"<key>": [...], "count": N}"""
+    yield b'{"' + key.encode() + b'":['
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(dumps(row))
+        if len(chunk) >= chunk_rows:
+            yield (b"," if count else b"") + b",".join(chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        yield (b"," if count else b"") + b",".join(chunk)
+        count += len(chunk)
+    yield b'],"count":' + str(count).encode() + b"}"
+
+
+def stream_response(rows: Iterable[Dict[str, Any]], key: str) -> Response:
+    """Chunked JSON response streaming rows under key"""
+    return Response(stream_rows(rows, key), mimetype="application/json")
@@ -0,0 +1,147 @@
+"""Decoding of batched metric and prediction uploads
+
+Clients send metric batches either as JSON ({"metrics": [{"key", "value",
+"step"}, ...]}) or, to cut per-point overhead, as a packed columnar frame
+with content type METRIC_FRAME_CONTENT_TYPE. All integers little-endian:
+
+    4s  magic b"MLMF"
+    B   version (1)
+    B   flags (bit 0: payload is zlib-compressed)
+    payload:
+        I       number of keys K
+        K x     H byte length + UTF-8 key
+        I       number of points N
+        N x I   key index
+        N x q   step (INT64_MIN = no step)
+        N x d   value
+
+The SDK's mlops_sdk/wire.py writes the same format.
+
+Prediction logs from serving are NDJSON (one prediction object per line),
+usually sent with Content-Encoding: gzip.
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional
+
+from storage import MetricPoint
+
+METRIC_FRAME_CONTENT_TYPE = "application/x-mlops-metric-frame"
+
+FRAME_MAGIC = b"MLMF"
+FRAME_VERSION = 1
+FLAG_ZLIB = 0x01
+
+# Step value meaning "no step"
+NO_STEP = -2 ** 63
+
+# Upper bound on a decompressed payload, so a small compressed frame cannot exhaust memory
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl")
+
+# Content-Encoding -> zlib wbits
+_CONTENT_ENCODINGS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def _column(typecode: str, payload: memoryview, offset: int, count: int) -> array:
+    """Read count little-endian items of typecode starting at offset"""
+    column = array(typecode)
+    column.frombytes(payload[offset:offset + count * column.itemsize])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def decode_metric_frame(data: bytes) -> List[MetricPoint]:
+    """Decode a packed metric frame into (key, value, step) points"""
+    if len(data) < 6 or data[:4] != FRAME_MAGIC:
+        raise ValueError("Not a metric frame")
+    version, flags = data[4], data[5]
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported metric frame version {version}")
+
+    payload = data[6:]
+    if flags & FLAG_ZLIB:
+        decompressor = zlib.decompressobj()
+        payload = decompressor.decompress(payload, MAX_FRAME_BYTES)
+        if decompressor.unconsumed_tail:
+            raise ValueError(f"Metric frame exceeds {MAX_FRAME_BYTES} bytes")
+
+    view = memoryview(payload)
+    try:
+        (key_count,) = struct.unpack_from("<I", payload, 0)
+        offset = 4
+        keys = []
+        for _ in range(key_count):
+            (length,) = struct.unpack_from("<H", payload, offset)
+            keys.append(bytes(view[offset + 2:offset + 2 + length]).decode("utf-8"))
+            offset += 2 + length
+        (count,) = struct.unpack_from("<I", payload, offset)
+        offset += 4
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed metric frame: {e}")
+    if len(payload) - offset != count * 20:
+        raise ValueError(f"Metric frame length does not match its {count} points")
+
+    indexes = _column("I", view, offset, count)
+    steps = _column("q", view, offset + 4 * count, count)
+    values = _column("d", view, offset + 12 * count, count)
+    if count and max(indexes) >= key_count:
+        raise ValueError("Metric frame references an unknown key")
+
+    step_list = steps.tolist()
+    if NO_STEP in steps:
+        step_list = [None if step == NO_STEP else step for step in step_list]
+    return list(zip([keys[index] for index in indexes], values.tolist(), step_list))
+
+
+def points_from_json(data: Any) -> List[MetricPoint]:
+    """Validate a JSON batch ({"metrics": [{"key", "value", "step"}, ...]}) into points"""
+    if not isinstance(data, dict) or not isinstance(data.get("metrics"), list):
+        raise ValueError("metrics list is required")
+
+    points = []
+    for point in data["metrics"]:
+        if not isinstance(point, dict) or "key" not in point or "value" not in point:
+            raise ValueError("each metric needs key and value")
+        step = point.get("step")
+        points.append((point["key"], float(point["value"]), None if step is None else int(step)))
+    return points
+
+
+def decode_body(data: bytes, content_encoding: Optional[str]) -> bytes:
+    """Undo a request's Content-Encoding (gzip, deflate or none), up to MAX_FRAME_BYTES"""
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return data
+    if encoding not in _CONTENT_ENCODINGS:
+        raise ValueError(f"Unsupported Content-Encoding '{encoding}'")
+    decompressor = zlib.decompressobj(_CONTENT_ENCODINGS[encoding])
+    try:
+        body = decompressor.decompress(data, MAX_FRAME_BYTES)
+    except zlib.error as e:
+        raise ValueError(f"Malformed {encoding} body: {e}")
+    if decompressor.unconsumed_tail:
+        raise ValueError(f"Request body exceeds {MAX_FRAME_BYTES} bytes")
+    return body
+
+
+def records_from_ndjson(data: bytes) -> List[Dict[str, Any]]:
+    """JSON objects of an NDJSON body (blank lines skipped)"""
+    records = []
+    for number, line in enumerate(data.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: {e}")
+        if not isinstance(record, dict):
+            raise ValueError(f"line {number}: expected a JSON object")
+        records.append(record)
+    return records
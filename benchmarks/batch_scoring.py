@@ -0,0 +1,129 @@
+"""
+Batch scoring throughput of the serving process pool by worker count
+
+Scores the same rows with a CPU-bound synthetic model (a small dense
+network in pure Python, so each row holds the GIL) in-process and through
+demo/model-serving's ScoringPool with 1, 2, 4, ... workers up to the core
+count, the way streamed /batch_predict requests are scored. Reports rows
+per second and the speedup over in-process scoring; with a CPU-bound model
+the speedup should stay close to the worker count up to the number of cores.
+
+Usage:
+    python benchmarks/batch_scoring.py
+    python benchmarks/batch_scoring.py --rows 200000 --workers 1,2,4,8 -o scoring.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVING_DIR = os.path.join(ROOT, "demo", "model-serving")
+
+
+class DenseModel:
+    """features -> hidden layer -> score, in pure Python"""
+
+    def __init__(self, inputs: int, hidden: int, seed: int):
+        rng = random.Random(seed)
+        self.inputs = inputs
+        self.weights = [[rng.uniform(-1, 1) for _ in range(inputs)] for _ in range(hidden)]
+        self.output = [rng.uniform(-1, 1) for _ in range(hidden)]
+
+    def predict_batch(self, features_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results = []
+        for features in features_list:
+            x = [features[f"f{i}"] for i in range(self.inputs)]
+            hidden = [max(0.0, sum(w * v for w, v in zip(row, x))) for row in self.weights]
+            score = sum(w * h for w, h in zip(self.output, hidden))
+            results.append({"prediction": "fraudulent" if score > 0 else "legitimate", "risk_score": score})
+        return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Process-pool batch scoring benchmark")
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows to score per configuration")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per model call (serving default: 1000)")
+    parser.add_argument("--workers", help="Comma-separated worker counts (default: powers of two up to the core count)")
+    parser.add_argument("--inputs", type=int, default=16, help="Features per row")
+    parser.add_argument("--hidden", type=int, default=32, help="Hidden units (cost per row)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for weights and rows")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, SERVING_DIR)
+    from workers import ScoringPool
+
+    cores = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(count) for count in args.workers.split(",")]
+    else:
+        counts = [1 << i for i in range(cores.bit_length()) if 1 << i <= cores]
+        if counts[-1] != cores:
+            counts.append(cores)
+
+    rng = random.Random(args.seed)
+    model = DenseModel(args.inputs, args.hidden, args.seed)
+    rows = [{f"f{i}": rng.uniform(-1, 1) for i in range(args.inputs)} for _ in range(args.rows)]
+    chunks = [rows[i:i + args.chunk_size] for i in range(0, len(rows), args.chunk_size)]
+
+    start = time.perf_counter()
+    expected = [model.predict_batch(chunk) for chunk in chunks]
+    baseline_s = time.perf_counter() - start
+    results: List[Dict[str, Any]] = [{
+        "workers": 0,
+        "seconds": round(baseline_s, 3),
+        "rows_per_second": round(args.rows / baseline_s),
+        "speedup": 1.0,
+    }]
+
+    for count in counts:
+        pool = ScoringPool(model, count)
+        try:
+            # Warm up: workers are started and the first tasks dispatched
+            pool.map(chunks[:count])
+            start = time.perf_counter()
+            predictions = [scored for _, scored in pool.imap(chunks, lambda chunk: chunk)]
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.close()
+        if predictions != expected:
+            raise RuntimeError(f"{count} workers returned different predictions")
+        results.append({
+            "workers": count,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(args.rows / elapsed),
+            "speedup": round(baseline_s / elapsed, 2),
+        })
+
+    report = {
+        "benchmark": "batch_scoring",
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "cpu_count": cores,
+        "config": {
+            "rows": args.rows,
+            "chunk_size": args.chunk_size,
+            "inputs": args.inputs,
+            "hidden": args.hidden,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
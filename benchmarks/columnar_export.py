@@ -0,0 +1,206 @@
+"""
+Columnar experiment export/import against per-experiment JSON
+
+Fills a throwaway registry database with metric points spread over a number
+of experiments, then moves all of them out and into a second database two
+ways:
+
+- json: the metric history of each experiment from
+  GET /api/experiments/<id>/metrics, loaded into the target with log_metrics
+  in 1000-point batches (what the SDK's batched uploads do);
+- arrow / parquet: one GET /api/export/metrics for every experiment,
+  loaded into the target with import_rows in chunks of --chunk-rows rows
+  (what `mlops import` sends per request).
+
+Exports run in-process through the Flask test client; imports decode the
+exported bodies and call the target database directly. Reports bytes per
+point and points per second for each direction, and checks both targets end
+up with the same points. With --memory, also the peak Python heap of each
+export and import (traced, so those timings are slower and not reported).
+
+Requires pyarrow.
+
+Usage:
+    python benchmarks/columnar_export.py
+    python benchmarks/columnar_export.py --points 5000000 --experiments 200 --memory -o columnar.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_DIR = os.path.join(ROOT, "backend", "model-registry")
+
+FORMATS = ("json", "arrow", "parquet")
+
+
+def fill(db, experiments: int, points: int, keys: int, rng: random.Random) -> List[str]:
+    """Create experiments and log points, interleaved over keys, in 10k-point batches"""
+    ids = []
+    per_run = points // experiments
+    names = [f"train/metric_{i}" for i in range(keys)]
+    for run in range(experiments):
+        experiment_id = db.save_experiment({"experiment_id": f"bench_{run:05d}", "experiment_name": "bench",
+                                            "status": "completed", "parameters": {"run": run, "lr": rng.random()}})
+        for start in range(0, per_run, 10_000):
+            db.log_metrics(experiment_id, [(names[i % keys], rng.random(), i // keys)
+                                           for i in range(start, min(start + 10_000, per_run))])
+        ids.append(experiment_id)
+    return ids
+
+
+def measure(fn: Callable[[], Any], memory: bool) -> Tuple[Any, float, Optional[float]]:
+    """(result, wall seconds, peak traced MB when memory) of fn()"""
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Columnar export/import benchmark")
+    parser.add_argument("--points", type=int, default=1_000_000, help="Metric points in the source database")
+    parser.add_argument("--experiments", type=int, default=20, help="Experiments the points are spread over")
+    parser.add_argument("--keys", type=int, default=8, help="Distinct metric keys per experiment")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="Rows per columnar import transaction")
+    parser.add_argument("--memory", action="store_true", help="Also report peak Python heap per phase")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for metric values")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="mlops-bench-")
+    sys.path.insert(0, REGISTRY_DIR)
+    os.environ["MLOPS_DB_PATH"] = os.path.join(workdir, "source.db")
+    os.environ.setdefault("MLOPS_MAINTENANCE_INTERVAL", "0")
+    # Whole-table exports are expected to take a while; keep them out of the slow-query log
+    os.environ.setdefault("MLOPS_SLOW_QUERY_MS", "600000")
+    import app as registry
+    import columnar
+    from database import Database
+    from storage import import_sizes
+    logging.getLogger().setLevel(logging.WARNING)
+    if not columnar.available():
+        sys.exit("columnar_export.py requires pyarrow (pip install pyarrow)")
+
+    started = time.perf_counter()
+    ids = fill(registry.db, args.experiments, args.points, args.keys, random.Random(args.seed))
+    fill_seconds = time.perf_counter() - started
+    total = args.points // args.experiments * args.experiments
+    client = registry.app.test_client()
+
+    def export(file_format: str, keep: bool = True) -> Tuple[List[bytes], int]:
+        """(response bodies, total bytes); with keep=False bodies are consumed as they stream, not kept"""
+        urls = ([f"/api/experiments/{experiment_id}/metrics" for experiment_id in ids] if file_format == "json"
+                else [f"/api/export/metrics?format={file_format}"])
+        bodies = []
+        size = 0
+        for url in urls:
+            response = client.get(url, buffered=False)
+            if response.status_code != 200:
+                raise RuntimeError(f"export failed: {response.status_code} {response.get_data()}")
+            pieces = []
+            for piece in response.response:
+                size += len(piece)
+                if keep:
+                    pieces.append(piece)
+            response.close()
+            if keep:
+                bodies.append(b"".join(pieces))
+        return bodies, size
+
+    def load(target, file_format: str, bodies: List[bytes]):
+        if file_format == "json":
+            for experiment_id, body in zip(ids, bodies):
+                points = [(row["key"], row["value"], row["step"]) for row in json.loads(body)["metrics"]]
+                for start in range(0, len(points), 1000):
+                    target.log_metrics(experiment_id, points[start:start + 1000])
+            return
+        content_type = columnar.FORMATS[file_format][0]
+        # Samples uploaded per experiment, so a chunk continuing one gives its offset (as `mlops import` does)
+        uploaded: Dict[str, int] = {}
+
+        def send(chunk: List[Tuple]):
+            target.import_rows("metrics", chunk, uploaded.get(chunk[0][0], 0))
+            for experiment_id, size in import_sizes("metrics", chunk).items():
+                uploaded[experiment_id] = uploaded.get(experiment_id, 0) + size
+
+        chunk: List[Tuple] = []
+        for rows in columnar.decode_rows("metrics", bodies[0], content_type):
+            chunk.extend(rows)
+            if len(chunk) >= args.chunk_rows:
+                send(chunk)
+                chunk = []
+        if chunk:
+            send(chunk)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    expected = None
+    for file_format in FORMATS:
+        (bodies, size), export_seconds, _ = measure(lambda: export(file_format), False)
+        target = Database(os.path.join(workdir, f"{file_format}.db"), cache_size=0)
+        target.import_experiments([row for chunk in registry.db.export_rows("experiments", ids) for row in chunk])
+        _, import_seconds, _ = measure(lambda: load(target, file_format, bodies), False)
+
+        points = sorted((row[0], row[1], row[2], row[3]) for chunk in target.export_rows("metrics", ids)
+                        for row in chunk)
+        if expected is None:
+            expected = points
+        results[file_format] = {
+            "bytes_per_point": round(size / total, 2),
+            "export_points_per_sec": round(total / export_seconds),
+            "import_points_per_sec": round(total / import_seconds),
+            "matches": points == expected and len(points) == total,
+        }
+
+        if args.memory:
+            _, _, results[file_format]["export_peak_mb"] = measure(lambda: export(file_format, keep=False), True)
+            peak_target = Database(os.path.join(workdir, f"{file_format}-memory.db"), cache_size=0)
+            peak_target.import_experiments([row for chunk in registry.db.export_rows("experiments", ids)
+                                            for row in chunk])
+            _, _, results[file_format]["import_peak_mb"] = measure(lambda: load(peak_target, file_format, bodies),
+                                                                   True)
+            for name in ("export_peak_mb", "import_peak_mb"):
+                results[file_format][name] = round(results[file_format][name], 1)
+
+    report = {
+        "benchmark": "columnar_export",
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "points": total,
+            "experiments": args.experiments,
+            "keys": args.keys,
+            "chunk_rows": args.chunk_rows,
+            "seed": args.seed,
+        },
+        "fill_seconds": round(fill_seconds, 2),
+        "formats": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    if not all(result["matches"] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Compiled feature transforms against per-row feature handling
+
+Builds a feature spec from synthetic training rows (mlops_sdk's
+build_feature_spec), compiles it the way serving does at model load
+(demo/model-serving/features.py) and turns request batches of several
+sizes into model input matrices two ways: row by row in Python, reading the
+spec for every value (what a hand-written per-request transform does), and
+with the compiled transform on the whole batch. Checks both produce the
+same matrix and reports rows per second and the speedup.
+
+Usage:
+    python benchmarks/feature_transform.py
+    python benchmarks/feature_transform.py --batch-sizes 1,100,10000 --numeric 16 --categorical 8 -o features.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVING_DIR = os.path.join(ROOT, "demo", "model-serving")
+SDK_DIR = os.path.join(ROOT, "sdk")
+
+
+def make_rows(count: int, numeric: int, categorical: int, categories: int, rng: random.Random,
+              missing: float) -> List[Dict[str, Any]]:
+    rows = []
+    for _ in range(count):
+        row: Dict[str, Any] = {}
+        for i in range(numeric):
+            if rng.random() >= missing:
+                row[f"n{i}"] = rng.gauss(i * 10, i + 1)
+        for i in range(categorical):
+            if rng.random() >= missing:
+                row[f"c{i}"] = f"v{min(int(rng.expovariate(0.3)), categories + 2)}"
+        row["flag"] = rng.random() < 0.1
+        rows.append(row)
+    return rows
+
+
+def per_row_transform(spec: Dict[str, Any], rows: List[Dict[str, Any]]) -> List[List[float]]:
+    """The spec applied value by value, as plain Python"""
+    matrix = []
+    for row in rows:
+        out: List[float] = []
+        for feature in spec["features"]:
+            value = row.get(feature["name"])
+            if feature["type"] == "numeric":
+                try:
+                    x = float(value)
+                    if math.isnan(x):
+                        raise ValueError
+                except (TypeError, ValueError):
+                    x = feature["default"]
+                x = (x - feature["mean"]) / feature["std"]
+                low, high = feature.get("clip", (-math.inf, math.inf))
+                out.append(min(max(x, low), high))
+            elif feature["type"] == "boolean":
+                out.append(1.0 if (feature["default"] if value is None else value) in (True, "true", "1") else 0.0)
+            else:
+                key = value if value in feature["categories"] else feature.get("default")
+                out += [1.0 if key == category else 0.0 for category in feature["categories"]]
+        matrix.append(out)
+    return matrix
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compiled feature transform benchmark")
+    parser.add_argument("--batch-sizes", default="1,10,100,1000,10000", help="Comma-separated rows per batch")
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows transformed per batch size")
+    parser.add_argument("--numeric", type=int, default=12, help="Numeric features")
+    parser.add_argument("--categorical", type=int, default=6, help="Categorical features")
+    parser.add_argument("--categories", type=int, default=20, help="Categories per categorical feature")
+    parser.add_argument("--missing", type=float, default=0.05, help="Share of values left out of each row")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for rows")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    sys.path[:0] = [SERVING_DIR, SDK_DIR]
+    from features import compile_feature_spec
+    from mlops_sdk.features import build_feature_spec
+
+    rng = random.Random(args.seed)
+    spec = build_feature_spec(make_rows(20_000, args.numeric, args.categorical, args.categories, rng, args.missing),
+                              max_categories=args.categories, clip=5.0)
+    started = time.perf_counter()
+    transform = compile_feature_spec(spec)
+    compile_seconds = time.perf_counter() - started
+    rows = make_rows(args.rows, args.numeric, args.categorical, args.categories, rng, args.missing)
+
+    results = []
+    for batch_size in [int(size) for size in args.batch_sizes.split(",")]:
+        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+        timings = {}
+        for name, run in (("per_row", lambda batch: per_row_transform(spec, batch)),
+                          ("compiled", transform.transform)):
+            started = time.perf_counter()
+            for batch in batches:
+                run(batch)
+            timings[name] = time.perf_counter() - started
+        sample = batches[0]
+        expected = per_row_transform(spec, sample)
+        actual = transform.transform(sample).tolist()
+        matches = all(math.isclose(a, b, abs_tol=1e-9) for x, y in zip(expected, actual) for a, b in zip(x, y))
+        results.append({
+            "batch_size": batch_size,
+            "per_row_rows_per_sec": round(len(rows) / timings["per_row"]),
+            "compiled_rows_per_sec": round(len(rows) / timings["compiled"]),
+            "speedup": round(timings["per_row"] / timings["compiled"], 2),
+            "matches": matches,
+        })
+
+    report = {
+        "benchmark": "feature_transform",
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "rows": len(rows),
+        "inputs": transform.width,
+        "features": len(spec["features"]),
+        "compile_ms": round(compile_seconds * 1000, 3),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    if not all(result["matches"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Import-time budget check for the SDK and CLI
+
+Runs each import in a fresh interpreter under `python -X importtime`, sums
+the cumulative time of the modules it pulls in beyond bare interpreter
+startup, and compares it with a budget. Also checks that heavy modules
+(requests, ...) stay unimported until first use, and times `mlops --help`
+end to end. Exits with status 1 if any budget is exceeded, so it can run
+as a CI gate.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --scale 2 -o import_time.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SDK_DIR = os.path.join(ROOT, "sdk")
+
+# name -> (statement, budget in ms, modules that must not be imported)
+IMPORT_BUDGETS: Dict[str, Tuple[str, float, List[str]]] = {
+    "import mlops_sdk": ("import mlops_sdk", 10, ["requests", "mlops_sdk.client"]),
+    "tracking API": (
+        "from mlops_sdk import track_experiment, log_metric, log_param, set_experiment",
+        40, ["requests", "mlops_sdk.client", "inspect"],
+    ),
+    "cli": ("import cli.main", 60, ["requests", "mlops_sdk.client"]),
+}
+
+# Wall-clock budget for `mlops --help` beyond interpreter startup, in ms
+HELP_BUDGET_MS = 100
+
+
+def import_profile(statement: str) -> Tuple[float, Set[str]]:
+    """Milliseconds spent importing modules beyond startup, and the modules imported"""
+    def run(code: str) -> List[Tuple[int, str, int]]:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=SDK_DIR, capture_output=True, text=True, check=True,
+        )
+        entries = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _, cumulative, name = line.split("|")
+            depth = (len(name) - len(name.lstrip())) // 2
+            entries.append((depth, name.strip(), int(cumulative)))
+        return entries
+
+    startup = {name for _, name, _ in run("pass")}
+    entries = run(statement)
+    # Top-level entries (depth 0, or the shallowest for this run) carry the cumulative time
+    top = min((depth for depth, name, _ in entries if name not in startup), default=0)
+    total_us = sum(us for depth, name, us in entries if depth == top and name not in startup)
+    return total_us / 1000, {name for _, name, _ in entries}
+
+
+def help_wall_ms(runs: int) -> float:
+    """Median wall time of `mlops --help` minus that of an empty interpreter"""
+    def median(args: List[str]) -> float:
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + args, cwd=SDK_DIR, capture_output=True, check=True)
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples) * 1000
+
+    return median(["-m", "cli.main", "--help"]) - median(["-c", "pass"])
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="SDK/CLI import-time budget check")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (slow CI machines)")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per wall-clock measurement")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    checks = []
+    for name, (statement, budget_ms, forbidden) in IMPORT_BUDGETS.items():
+        # Best of three, to keep one-off disk or scheduler stalls out of the result
+        profiles = [import_profile(statement) for _ in range(3)]
+        elapsed_ms = min(ms for ms, _ in profiles)
+        leaked = sorted(module for module in forbidden if module in profiles[0][1])
+        checks.append({
+            "name": name,
+            "statement": statement,
+            "import_ms": round(elapsed_ms, 2),
+            "budget_ms": budget_ms * args.scale,
+            "unexpected_modules": leaked,
+            "ok": elapsed_ms <= budget_ms * args.scale and not leaked,
+        })
+
+    help_ms = help_wall_ms(args.runs)
+    checks.append({
+        "name": "mlops --help",
+        "wall_ms": round(help_ms, 2),
+        "budget_ms": HELP_BUDGET_MS * args.scale,
+        "ok": help_ms <= HELP_BUDGET_MS * args.scale,
+    })
+
+    report = {
+        "benchmark": "import_time",
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "ok": all(check["ok"] for check in checks),
+        "checks": checks,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Open-loop load generator for the registry and model-serving APIs
+
+Requests are issued on a fixed schedule (--rps) regardless of how fast the
+service answers, so slow responses show up as latency instead of silently
+lowering the offered load. Latency is measured from the *scheduled* send
+time, which includes any time a request spent waiting for a free worker.
+
+Runs in-process against the Flask apps (default) or against running
+instances when --url is given. Results are printed as JSON.
+
+Usage:
+    python benchmarks/loadgen.py registry --rps 200 --duration 10
+    python benchmarks/loadgen.py serving --scenarios predict:9,batch_predict:1
+    python benchmarks/loadgen.py registry --url http://localhost:5000 -o registry.json
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_DIR = os.path.join(ROOT, "backend", "model-registry")
+SERVING_DIR = os.path.join(ROOT, "demo", "model-serving")
+
+# A request is (method, path, json_body)
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+class InProcessTransport:
+    """Sends requests through a Flask test client (one per worker thread)"""
+
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self._local = threading.local()
+
+    def send(self, method: str, path: str, body: Optional[Dict[str, Any]]) -> int:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code
+
+
+class HTTPTransport:
+    """Sends requests to a running service (one requests.Session per worker thread)"""
+
+    def __init__(self, base_url: str, timeout: float = 30):
+        import requests
+
+        self._requests = requests
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, method: str, path: str, body: Optional[Dict[str, Any]]) -> int:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        response = session.request(method, self.base_url + path, json=body, timeout=self.timeout)
+        return response.status_code
+
+
+def _load_module(name: str, path: str):
+    """Import a service module from its file, with its directory on sys.path"""
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def registry_scenarios(rng: random.Random, seed_ids: List[str]) -> Dict[str, Callable[[], Request]]:
+    """Request builders for the registry endpoints"""
+    counter = iter(range(10 ** 12))
+
+    def track():
+        n = next(counter)
+        return "POST", "/api/experiments/track", {
+            "experiment_id": f"bench_{os.getpid()}_{n}",
+            "experiment_name": "loadgen",
+            "parameters": {"learning_rate": rng.choice([0.001, 0.01, 0.1]), "batch_size": 32},
+            "start_time": datetime.utcnow().isoformat(),
+            "status": "running",
+        }
+
+    def metric():
+        experiment_id = rng.choice(seed_ids)
+        return "POST", f"/api/experiments/{experiment_id}/metrics", {
+            "key": "loss", "value": rng.random(), "step": next(counter)
+        }
+
+    def list_():
+        return "GET", "/api/experiments?limit=100", None
+
+    def get():
+        return "GET", f"/api/experiments/{rng.choice(seed_ids)}", None
+
+    return {"track": track, "metric": metric, "list": list_, "get": get}
+
+
+def serving_scenarios(rng: random.Random, batch_size: int) -> Dict[str, Callable[[], Request]]:
+    """Request builders for the model-serving endpoints"""
+    def features():
+        return {"amount": round(rng.uniform(1, 10000), 2), "merchant": rng.choice(["shop", "fraud_co", "cafe"])}
+
+    def predict():
+        return "POST", "/predict", {"features": features()}
+
+    def batch_predict():
+        return "POST", "/batch_predict", {"batch": [{"features": features()} for _ in range(batch_size)]}
+
+    return {"predict": predict, "batch_predict": batch_predict}
+
+
+def seed_registry(transport, count: int) -> List[str]:
+    """Create experiments for the metric/get scenarios to write to and read from"""
+    ids = [f"bench_seed_{os.getpid()}_{i}" for i in range(count)]
+    for experiment_id in ids:
+        transport.send("POST", "/api/experiments/track", {
+            "experiment_id": experiment_id,
+            "experiment_name": "loadgen_seed",
+            "parameters": {"seed": True},
+            "status": "running",
+        })
+    return ids
+
+
+def parse_mix(spec: str, available: Dict[str, Callable[[], Request]]) -> List[Tuple[str, float]]:
+    """Parse 'name[:weight],...' into a list of (scenario, weight)"""
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition(":")
+        if name not in available:
+            raise SystemExit(f"Unknown scenario '{name}'. Available: {', '.join(available)}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Throughput and latency percentiles (milliseconds) for one scenario"""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / count, 3) if count else 0.0,
+            "p50": round(percentile(values, 50), 3),
+            "p90": round(percentile(values, 90), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "max": round(values[-1], 3) if count else 0.0,
+        },
+    }
+
+
+def run_load(transport, builders: Dict[str, Callable[[], Request]], mix: List[Tuple[str, float]],
+             rps: float, duration: float, concurrency: int, rng: random.Random,
+             warmup: float = 0.0) -> Dict[str, Any]:
+    """Issue requests on an open-loop schedule and collect per-scenario latencies"""
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    results = {name: {"latencies": [], "errors": 0} for name in names}
+    lock = threading.Lock()
+    interval = 1.0 / rps
+    total = int(rps * (warmup + duration))
+    start = time.perf_counter() + 0.05
+    measure_from = start + warmup
+
+    def fire(name: str, request: Request, scheduled: float):
+        method, path, body = request
+        try:
+            ok = transport.send(method, path, body) < 400
+        except Exception:
+            ok = False
+        latency = (time.perf_counter() - scheduled) * 1000
+        if scheduled < measure_from:
+            return
+        with lock:
+            entry = results[name]
+            if ok:
+                entry["latencies"].append(latency)
+            else:
+                entry["errors"] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            scheduled = start + i * interval
+            name = rng.choices(names, weights)[0]
+            request = builders[name]()
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, name, request, scheduled)
+    elapsed = time.perf_counter() - measure_from
+
+    scenarios = {
+        name: summarize(entry["latencies"], entry["errors"], elapsed)
+        for name, entry in results.items()
+    }
+    all_latencies = [lat for entry in results.values() for lat in entry["latencies"]]
+    all_errors = sum(entry["errors"] for entry in results.values())
+    return {"elapsed_s": round(elapsed, 3), "scenarios": scenarios,
+            "total": summarize(all_latencies, all_errors, elapsed)}
+
+
+def build_target(args, rng: random.Random):
+    """Create the transport and request builders for the selected service"""
+    if args.target == "registry":
+        if args.url:
+            transport = HTTPTransport(args.url)
+        else:
+            os.environ["MLOPS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="mlops-bench-"), "bench.db")
+            transport = InProcessTransport(_load_module("registry_app", os.path.join(REGISTRY_DIR, "app.py")).app)
+        seed_ids = seed_registry(transport, args.seed_experiments)
+        return transport, registry_scenarios(rng, seed_ids)
+
+    if args.url:
+        transport = HTTPTransport(args.url)
+    else:
+        transport = InProcessTransport(_load_module("serving_app", os.path.join(SERVING_DIR, "serve.py")).app)
+    return transport, serving_scenarios(rng, args.batch_size)
+
+
+DEFAULT_MIX = {
+    "registry": "track:1,metric:8,list:1",
+    "serving": "predict:9,batch_predict:1",
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the MLOps services")
+    parser.add_argument("target", choices=["registry", "serving"], help="Service to drive")
+    parser.add_argument("--url", help="Base URL of a running instance (default: run in-process)")
+    parser.add_argument("--scenarios", help="Weighted mix, e.g. 'track:1,metric:8,list:1'")
+    parser.add_argument("--rps", type=float, default=50, help="Offered load in requests per second")
+    parser.add_argument("--duration", type=float, default=10, help="Measured duration in seconds")
+    parser.add_argument("--warmup", type=float, default=1, help="Unmeasured warm-up in seconds")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum requests in flight")
+    parser.add_argument("--batch-size", type=int, default=32, help="Items per /batch_predict request")
+    parser.add_argument("--seed-experiments", type=int, default=20, help="Experiments created before the run")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for request generation")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    transport, builders = build_target(args, rng)
+    mix = parse_mix(args.scenarios or DEFAULT_MIX[args.target], builders)
+
+    result = run_load(transport, builders, mix, args.rps, args.duration, args.concurrency, rng, args.warmup)
+    report = {
+        "target": args.target,
+        "mode": "http" if args.url else "in-process",
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "url": args.url,
+            "mix": dict(mix),
+            "rps": args.rps,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size,
+            "seed": args.seed,
+        },
+        **result,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Bytes on the wire and CPU cost of metric batch uploads, JSON vs packed frames
+
+Encodes the same metric points in batches the way the SDK sends them
+(JSON, packed frame, zlib-compressed packed frame) and reports, per
+million points:
+
+- bytes on the wire,
+- client CPU to encode,
+- registry CPU to decode into (key, value, step) points,
+- registry CPU for whole requests through the batch endpoint, including
+  the database insert (in-process, throwaway database; skip with --no-requests).
+
+Results are printed as JSON.
+
+Usage:
+    python benchmarks/wire_format.py
+    python benchmarks/wire_format.py --points 200000 --batch-size 5000 -o wire.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_DIR = os.path.join(ROOT, "backend", "model-registry")
+SDK_DIR = os.path.join(ROOT, "sdk")
+
+Point = Tuple[str, float, Optional[int]]
+
+FORMATS = ("json", "frame", "frame+zlib")
+
+
+def make_points(count: int, keys: int, rng: random.Random) -> List[Point]:
+    """Training-like series: keys interleaved, one step per round, every 4th key without steps"""
+    names = [f"train/metric_{i}" for i in range(keys)]
+    return [
+        (names[i % keys], rng.random(), None if (i % keys) % 4 == 3 else i // keys)
+        for i in range(count)
+    ]
+
+
+def encoders(frame_content_type: str, encode_frame: Callable) -> Dict[str, Tuple[str, Callable]]:
+    """Format name -> (content type, encode(points) -> bytes), as the SDK encodes"""
+    def encode_json(points):
+        # requests' json= serializes with the stdlib defaults
+        return json.dumps({
+            "metrics": [{"key": key, "value": value, "step": step} for key, value, step in points]
+        }, allow_nan=False).encode()
+
+    return {
+        "json": ("application/json", encode_json),
+        "frame": (frame_content_type, lambda points: encode_frame(points)),
+        "frame+zlib": (frame_content_type, lambda points: encode_frame(points, compress=True)),
+    }
+
+
+def cpu_time(fn: Callable[[], Any], repeat: int) -> float:
+    """Best-of-repeat process CPU seconds for fn()"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Metric upload wire format benchmark")
+    parser.add_argument("--points", type=int, default=1_000_000, help="Metric points to encode")
+    parser.add_argument("--keys", type=int, default=8, help="Distinct metric keys")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Points per upload (SDK default: 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Encode/decode repetitions (best is reported)")
+    parser.add_argument("--no-requests", action="store_true", help="Skip the end-to-end request measurement")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for metric values")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    sys.path[:0] = [REGISTRY_DIR, SDK_DIR]
+    if not args.no_requests:
+        os.environ["MLOPS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="mlops-bench-"), "bench.db")
+        os.environ.setdefault("MLOPS_MAINTENANCE_INTERVAL", "0")
+    from mlops_sdk.wire import METRIC_FRAME_CONTENT_TYPE, encode_metric_frame
+    from wire import decode_metric_frame, points_from_json
+
+    points = make_points(args.points, args.keys, random.Random(args.seed))
+    batches = [points[i:i + args.batch_size] for i in range(0, len(points), args.batch_size)]
+    per_million = 1_000_000 / len(points)
+    decoders = {
+        "json": lambda body: points_from_json(json.loads(body)),
+        "frame": decode_metric_frame,
+        "frame+zlib": decode_metric_frame,
+    }
+
+    registry = None
+    if not args.no_requests:
+        import logging
+        import app as registry
+        logging.getLogger().setLevel(logging.WARNING)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, (content_type, encode) in encoders(METRIC_FRAME_CONTENT_TYPE, encode_metric_frame).items():
+        bodies = [encode(batch) for batch in batches]
+        decoded = [point for body in bodies for point in decoders[name](body)]
+        if decoded != points:
+            raise RuntimeError(f"{name} did not round-trip")
+
+        total_bytes = sum(len(body) for body in bodies)
+        encode_s = cpu_time(lambda: [encode(batch) for batch in batches], args.repeat)
+        decode_s = cpu_time(lambda: [decoders[name](body) for body in bodies], args.repeat)
+        results[name] = {
+            "bytes_per_million": round(total_bytes * per_million),
+            "bytes_per_point": round(total_bytes / len(points), 2),
+            "encode_cpu_s_per_million": round(encode_s * per_million, 3),
+            "decode_cpu_s_per_million": round(decode_s * per_million, 3),
+        }
+
+        if registry is not None:
+            client = registry.app.test_client()
+            experiment_id = registry.db.save_experiment({"experiment_name": f"wire_{name}",
+                                                         "experiment_id": f"wire_{name}"})
+            start = time.process_time()
+            for body in bodies:
+                response = client.post(f"/api/experiments/{experiment_id}/metrics/batch",
+                                       data=body, content_type=content_type)
+                if response.status_code != 201:
+                    raise RuntimeError(f"{name} upload failed: {response.status_code} {response.get_data()}")
+            results[name]["request_cpu_s_per_million"] = round((time.process_time() - start) * per_million, 3)
+
+    baseline = results["json"]["bytes_per_million"]
+    for result in results.values():
+        result["bytes_vs_json"] = round(result["bytes_per_million"] / baseline, 3)
+
+    report = {
+        "benchmark": "wire_format",
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "points": args.points,
+            "keys": args.keys,
+            "batch_size": args.batch_size,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "formats": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,47 @@
 """
-Mock Monitoring Dashboard - Beautiful visualization for demo
-Shows real-time metrics, model performance, and deployment status
+Monitoring Dashboard - Live visualization of the MLOps platform
+Shows experiment statistics from the model registry, model performance,
+and deployment status
 """
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify, request
 from flask_cors import CORS
-import random
-from datetime import datetime, timedelta
+import os
+import threading
+import time
+from datetime import datetime
+import requests
 
 app = Flask(__name__)
 CORS(app)
 
+REGISTRY_URL = os.getenv("MODEL_REGISTRY_URL", "http://localhost:5000")
+
+# Every open dashboard polls us; we poll the registry at most once per TTL
+SUMMARY_TTL = float(os.getenv("DASHBOARD_SUMMARY_TTL", "2"))
+
+_summary_lock = threading.Lock()
+_summary_cache = {"data": None, "fetched_at": 0.0}
+
+
+def get_registry_summary():
+    """Registry summary, shared across all dashboard clients for SUMMARY_TTL seconds"""
+    with _summary_lock:
+        if _summary_cache["data"] is not None and time.monotonic() - _summary_cache["fetched_at"] < SUMMARY_TTL:
+            return _summary_cache["data"]
+        
+        try:
+            response = requests.get(f"{REGISTRY_URL}/api/summary", timeout=3)
+            response.raise_for_status()
+            _summary_cache["data"] = response.json()
+        except requests.exceptions.RequestException as e:
+            app.logger.warning(f"Could not reach model registry at {REGISTRY_URL}: {e}")
+            if _summary_cache["data"] is None:
+                return None
+        # Failed refreshes keep serving the last good summary until the next TTL
+        _summary_cache["fetched_at"] = time.monotonic()
+        return _summary_cache["data"]
+
 
 @app.route('/')
 def index():
@@ -20,11 +51,16 @@ def index():
 
 @app.route('/api/metrics/realtime')
 def realtime_metrics():
-    """Mock real-time metrics for live demo"""
+    """Platform metrics: experiment statistics from the registry, mock serving stats"""
+    summary = get_registry_summary() or {}
     return jsonify({
         "timestamp": datetime.utcnow().isoformat(),
-            "models_deployed": 3,
-        "active_experiments": 12,
+        "registry_available": bool(summary),
+        "models_deployed": 3,
+        "active_experiments": summary.get("active_experiments", 0),
+        "total_experiments": summary.get("total_experiments", 0),
+        "experiments_by_status": summary.get("status_counts", {}),
+        "recent_avg_duration": summary.get("recent_avg_duration"),
         "predictions_today": 145234,
         "avg_latency_ms": 45,
         "success_rate": 99.98,
@@ -59,25 +95,63 @@ def realtime_metrics():
 
 @app.route('/api/experiments/recent')
 def recent_experiments():
-    """Mock recent experiments for demo"""
-    experiments = []
-    for i in range(10):
-        created = datetime.utcnow() - timedelta(hours=i*2)
-        experiments.append({
-            "id": f"exp_{created.strftime('%Y%m%d_%H%M%S')}",
-            "name": f"model_training_v{i+1}",
-            "status": "completed",
-            "accuracy": round(0.85 + random.random() * 0.1, 4),
-            "duration": round(random.uniform(120, 600), 1),
-            "created_at": created.isoformat()
-        })
+    """Most recent experiments from the registry"""
+    summary = get_registry_summary()
+    if summary is None:
+        return jsonify({"experiments": [], "error": "Model registry unavailable"}), 503
+    
+    experiments = [
+        {
+            "id": exp["experiment_id"],
+            "name": exp["experiment_name"],
+            "status": exp["status"],
+            "result": exp["result"],
+            "duration": round(exp["duration"], 1) if exp["duration"] is not None else None,
+            "created_at": exp["created_at"]
+        }
+        for exp in summary.get("recent", [])
+    ]
     return jsonify({"experiments": experiments})
 
 
+@app.route('/api/stream')
+def stream():
+    """Relay the registry's live event stream (SSE) for the experiments a browser displays"""
+    experiment_ids = request.args.getlist("experiment_id")
+    if not experiment_ids:
+        # A wildcard subscription would fan every metric point out to every open dashboard
+        return jsonify({"error": "experiment_id is required"}), 400
+    
+    try:
+        upstream = requests.get(
+            f"{REGISTRY_URL}/api/stream",
+            params={"experiment_id": experiment_ids},
+            stream=True,
+            timeout=(3, None)
+        )
+        upstream.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        app.logger.warning(f"Could not open registry event stream: {e}")
+        return jsonify({"error": "Model registry unavailable"}), 503
+    
+    def relay():
+        try:
+            for chunk in upstream.iter_content(chunk_size=None):
+                yield chunk
+        finally:
+            upstream.close()
+    
+    return Response(relay(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
 if __name__ == '__main__':
     print("=" * 60)
     print("MLOps Monitoring Dashboard")
     print("=" * 60)
     print("Dashboard URL: http://localhost:3000")
+    print(f"Registry:      {REGISTRY_URL}")
     print("=" * 60)
     app.run(host='0.0.0.0', port=3000, debug=False)
@@ -0,0 +1,240 @@
+"""
+Streaming batch scoring over NDJSON and CSV
+
+Rows are parsed lazily from the request body (or a local file), grouped
+into fixed-size chunks, scored one chunk per model call and written back
+as they finish, so memory stays constant however many rows are sent.
+Parsing runs in a background thread a few chunks ahead of scoring.
+
+Input rows:
+    NDJSON  {"features": {...}, "id": ...} per line, or a bare feature object
+    CSV     header row, then one row per record; an "id" column is passed
+            through, every other column is a feature (numbers are parsed)
+
+Output rows: {"row": n, "id": ..., <model outputs>} in input order; a row
+that fails to parse gets {"row": n, "error": "..."} instead of aborting
+the whole job.
+
+Results start flowing back before the upload finishes, so clients sending
+large bodies must read the response while they write (curl does; a plain
+requests.post(data=...) does not) or score a file with ?path= instead.
+"""
+
+import csv
+import io
+import json
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+CONTENT_TYPES = {
+    "application/x-ndjson": NDJSON,
+    "application/jsonl": NDJSON,
+    "text/csv": CSV,
+}
+RESPONSE_CONTENT_TYPES = {NDJSON: "application/x-ndjson", CSV: "text/csv"}
+
+# Rows per model call
+CHUNK_SIZE = 1000
+# Parsed chunks buffered ahead of the model
+PREFETCH_CHUNKS = 2
+
+# (row number, id, features or None, parse error or None)
+Row = Tuple[int, Any, Optional[Dict[str, Any]], Optional[str]]
+
+
+def format_for_path(path: str) -> Optional[str]:
+    """Input format implied by a file extension"""
+    lowered = path.lower()
+    if lowered.endswith((".ndjson", ".jsonl")):
+        return NDJSON
+    if lowered.endswith(".csv"):
+        return CSV
+    return None
+
+
+def iter_stream_lines(stream, block_size: int = 1 << 16) -> Iterator[bytes]:
+    """Lines of a binary stream, read in blocks (request streams are slow to readline())"""
+    pending = b""
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if pending:
+        yield pending
+
+
+def iter_file_lines(path: str) -> Iterator[str]:
+    """Lines of a text file, closed when exhausted or abandoned"""
+    with open(path, encoding="utf-8", newline="") as fh:
+        yield from fh
+
+
+def _decoded(lines: Iterable) -> Iterator[str]:
+    for line in lines:
+        yield line.decode("utf-8") if isinstance(line, bytes) else line
+
+
+def iter_ndjson(lines: Iterable) -> Iterator[Row]:
+    """Rows of an NDJSON stream (blank lines skipped)"""
+    row = 0
+    for line in _decoded(lines):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("each line must be a JSON object")
+            if "features" in record:
+                yield row, record.get("id"), record["features"], None
+            else:
+                yield row, record.pop("id", None), record, None
+        except ValueError as e:
+            yield row, None, None, str(e)
+        row += 1
+
+
+def _csv_value(value: str) -> Any:
+    if value == "":
+        return None
+    try:
+        return float(value) if any(c in value for c in ".eE") else int(value)
+    except ValueError:
+        return value
+
+
+def iter_csv(lines: Iterable) -> Iterator[Row]:
+    """Rows of a CSV stream with a header row"""
+    reader = csv.reader(_decoded(lines))
+    header = next(reader, None)
+    if header is None:
+        return
+    for row, values in enumerate(reader):
+        if len(values) != len(header):
+            yield row, None, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        features = {name: _csv_value(value) for name, value in zip(header, values)}
+        yield row, features.pop("id", None), features, None
+
+
+PARSERS: Dict[str, Callable[[Iterable], Iterator[Row]]] = {NDJSON: iter_ndjson, CSV: iter_csv}
+
+
+def chunked(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    """Consecutive lists of at most size rows"""
+    chunk: List[Row] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def prefetch(iterator: Iterator, depth: int = PREFETCH_CHUNKS) -> Iterator:
+    """Run iterator in a background thread, at most depth items ahead of the consumer"""
+    items: "queue.Queue" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+
+    thread = threading.Thread(target=produce, name="batch-parser", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def _features(chunk: List[Row]) -> List[Dict[str, Any]]:
+    return [features for _, _, features, error in chunk if error is None]
+
+
+def score_chunks(chunks: Iterable[List[Row]],
+                 predict_batch: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+                 pool=None) -> Iterator[List[Dict[str, Any]]]:
+    """Score each chunk with one model call (in pool's workers if given); yields output records per chunk"""
+    if pool is not None:
+        scored = pool.imap(chunks, _features)
+    else:
+        scored = ((chunk, predict_batch(features) if features else [])
+                  for chunk, features in ((chunk, _features(chunk)) for chunk in chunks))
+
+    for chunk, predictions in scored:
+        predictions = iter(predictions)
+        records = []
+        for row, row_id, _, error in chunk:
+            record: Dict[str, Any] = {"row": row}
+            if row_id is not None:
+                record["id"] = row_id
+            if error is None:
+                record.update(next(predictions))
+            else:
+                record["error"] = error
+            records.append(record)
+        yield records
+
+
+def write_ndjson(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """One NDJSON line per record, one string per chunk"""
+    for records in chunks:
+        yield "".join(json.dumps(record) + "\n" for record in records)
+
+
+def write_csv(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """CSV with columns taken from the first chunk (row, id, model outputs, error)"""
+    writer = None
+    buffer = io.StringIO()
+    for records in chunks:
+        if writer is None:
+            outputs = []
+            for record in records:
+                outputs += [key for key in record if key not in outputs and key not in ("row", "id", "error")]
+            writer = csv.DictWriter(buffer, ["row", "id"] + outputs + ["error"], extrasaction="ignore")
+            writer.writeheader()
+        writer.writerows(records)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+WRITERS = {NDJSON: write_ndjson, CSV: write_csv}
+
+
+def stream_predictions(lines: Iterable, input_format: str, output_format: str,
+                       predict_batch: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+                       chunk_size: int = CHUNK_SIZE, pool=None) -> Iterator[str]:
+    """Parse, score (in pool's worker processes if given) and serialize a stream of rows, chunk by chunk"""
+    chunks = prefetch(chunked(PARSERS[input_format](lines), chunk_size))
+    return WRITERS[output_format](score_chunks(chunks, predict_batch, pool))
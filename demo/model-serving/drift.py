@@ -0,0 +1,378 @@
+"""
+Streaming feature statistics and drift scores for online predictions
+
+DriftMonitor.observe() is called with each request's features. Every
+feature keeps a ring of `panes` sub-windows covering the last
+window_seconds; a pane holds running mean/variance (Welford), min/max, a
+missing-value count and either a histogram (numeric features) or category
+counts (categorical features). Old panes are reused as time moves on, so
+memory per feature is constant and an observation costs one lock and one
+bisect.
+
+Histogram bin edges come from the reference profile stored in the
+registry for the served model version (built at training time with
+mlops_sdk.drift.build_reference_profile); without one they are derived
+from the first values seen. Quantiles are interpolated from the window's
+histogram. Against a reference, each feature gets:
+
+    psi  Population Stability Index over the bins (or categories);
+         below 0.1 is stable, above 0.25 is a significant shift
+    ks   Kolmogorov-Smirnov distance between the binned CDFs (numeric only)
+"""
+
+import json
+import math
+import threading
+import time
+import urllib.error
+import urllib.request
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+OTHER = "__other__"
+
+# Quantiles reported per numeric feature
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Values collected to place histogram edges when there is no reference profile
+WARMUP_VALUES = 1000
+DEFAULT_BINS = 10
+# Distinct categories tracked per feature (the rest are counted as __other__)
+MAX_CATEGORIES = 50
+# Features tracked per model; extra keys in request payloads are ignored
+MAX_FEATURES = 200
+# Floor for empty bins in PSI, so unseen bins give a large but finite score
+PSI_EPSILON = 1e-4
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def psi(expected: List[float], actual: List[float]) -> float:
+    """Population Stability Index between two distributions over the same bins"""
+    total = 0.0
+    for e, a in zip(expected, actual):
+        e = max(e, PSI_EPSILON)
+        a = max(a, PSI_EPSILON)
+        total += (a - e) * math.log(a / e)
+    return total
+
+
+def ks_distance(expected: List[float], actual: List[float]) -> float:
+    """Largest gap between the cumulative distributions of two binned samples"""
+    gap = cumulative_e = cumulative_a = 0.0
+    for e, a in zip(expected, actual):
+        cumulative_e += e
+        cumulative_a += a
+        gap = max(gap, abs(cumulative_e - cumulative_a))
+    return gap
+
+
+class _Pane:
+    """Statistics of one sub-window"""
+
+    __slots__ = ("epoch", "count", "mean", "m2", "min", "max", "missing", "counts")
+
+    def __init__(self, epoch: int, bins: int):
+        self.epoch = epoch
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.missing = 0
+        self.counts = [0] * bins
+
+
+class FeatureMonitor:
+    """Sliding-window statistics of one feature"""
+
+    def __init__(self, panes: int, pane_seconds: float, reference: Optional[Dict[str, Any]] = None,
+                 kind: Optional[str] = None):
+        self.panes = panes
+        self.pane_seconds = pane_seconds
+        self.reference = reference
+        self.kind = reference["type"] if reference else kind
+        self._lock = threading.Lock()
+        self._ring: List[Optional[_Pane]] = [None] * panes
+        # Numeric: interior bin edges; categorical: category -> bin
+        self.edges: Optional[List[float]] = None
+        self.categories: Dict[str, int] = {}
+        self._warmup: Optional[List[float]] = None
+
+        if self.kind == "numeric":
+            if reference:
+                self.edges = list(reference["edges"])
+            else:
+                self._warmup = []
+        elif reference:
+            self.categories = {name: i for i, name in enumerate(c for c in reference["fractions"] if c != OTHER)}
+
+    @property
+    def bins(self) -> int:
+        if self.kind == "numeric":
+            return len(self.edges) + 1 if self.edges is not None else 0
+        return MAX_CATEGORIES + 1 if self.reference is None else len(self.categories) + 1
+
+    def _pane(self, now: float) -> _Pane:
+        epoch = int(now // self.pane_seconds)
+        slot = epoch % self.panes
+        pane = self._ring[slot]
+        if pane is None or pane.epoch != epoch:
+            pane = self._ring[slot] = _Pane(epoch, self.bins)
+        return pane
+
+    def _live_panes(self, now: float) -> List[_Pane]:
+        oldest = int(now // self.pane_seconds) - self.panes + 1
+        return [pane for pane in self._ring if pane is not None and pane.epoch >= oldest]
+
+    def observe(self, value: Any, now: float):
+        with self._lock:
+            pane = self._pane(now)
+            if self.kind == "numeric":
+                if not _is_number(value) or math.isnan(value):
+                    pane.missing += 1
+                    return
+                self._add_number(pane, float(value))
+            else:
+                if value is None:
+                    pane.missing += 1
+                    return
+                self._add_category(pane, str(value))
+
+    def _add_number(self, pane: _Pane, value: float):
+        pane.count += 1
+        delta = value - pane.mean
+        pane.mean += delta / pane.count
+        pane.m2 += delta * (value - pane.mean)
+        pane.min = min(pane.min, value)
+        pane.max = max(pane.max, value)
+
+        if self.edges is not None:
+            pane.counts[bisect_right(self.edges, value)] += 1
+            return
+        self._warmup.append(value)
+        if len(self._warmup) >= WARMUP_VALUES:
+            # Place edges at the warm-up deciles and replay the warm-up into the current pane
+            ordered = sorted(self._warmup)
+            self.edges = sorted({ordered[len(ordered) * i // DEFAULT_BINS] for i in range(1, DEFAULT_BINS)})
+            self._warmup = None
+            for existing in self._ring:
+                if existing is not None:
+                    existing.counts = [0] * (len(self.edges) + 1)
+            for warm in ordered:
+                pane.counts[bisect_right(self.edges, warm)] += 1
+
+    def _add_category(self, pane: _Pane, value: str):
+        pane.count += 1
+        index = self.categories.get(value)
+        if index is None:
+            if self.reference is None and len(self.categories) < MAX_CATEGORIES:
+                index = self.categories[value] = len(self.categories)
+            else:
+                index = len(pane.counts) - 1
+        pane.counts[index] += 1
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        """Window statistics, quantiles and drift scores"""
+        with self._lock:
+            panes = self._live_panes(now)
+            count = sum(pane.count for pane in panes)
+            missing = sum(pane.missing for pane in panes)
+            counts = [sum(column) for column in zip(*(pane.counts for pane in panes))] if panes else []
+            stats: Dict[str, Any] = {
+                "type": self.kind,
+                "count": count,
+                "missing_ratio": missing / (count + missing) if count + missing else 0.0,
+            }
+
+            if self.kind == "numeric":
+                stats.update(self._numeric_stats(panes, count, counts))
+            else:
+                names = {index: name for name, index in self.categories.items()}
+                stats["fractions"] = {names.get(i, OTHER): c / count for i, c in enumerate(counts) if c}
+
+        if self.reference is not None and count and counts:
+            actual = [c / count for c in counts]
+            if self.kind == "numeric":
+                expected = self.reference["fractions"]
+                stats["psi"] = psi(expected, actual)
+                stats["ks"] = ks_distance(expected, actual)
+            else:
+                fractions = self.reference["fractions"]
+                expected = [fractions.get(name, 0.0) for name in sorted(self.categories, key=self.categories.get)]
+                expected.append(fractions.get(OTHER, 0.0))
+                stats["psi"] = psi(expected, actual)
+        return stats
+
+    def _numeric_stats(self, panes: List[_Pane], count: int, counts: List[int]) -> Dict[str, Any]:
+        if not count:
+            return {}
+        # Chan et al. parallel combination of the panes' running moments
+        mean = m2 = 0.0
+        seen = 0
+        for pane in panes:
+            if not pane.count:
+                continue
+            delta = pane.mean - mean
+            total = seen + pane.count
+            mean += delta * pane.count / total
+            m2 += pane.m2 + delta * delta * seen * pane.count / total
+            seen = total
+        low = min(pane.min for pane in panes if pane.count)
+        high = max(pane.max for pane in panes if pane.count)
+        return {
+            "mean": mean,
+            "std": math.sqrt(m2 / (count - 1)) if count > 1 else 0.0,
+            "min": low,
+            "max": high,
+            "quantiles": self._quantiles(counts, count, low, high),
+        }
+
+    def _quantiles(self, counts: List[int], count: int, low: float, high: float) -> Dict[str, float]:
+        if self.edges is None:
+            ordered = sorted(self._warmup)
+            return {str(q): ordered[min(int(q * len(ordered)), len(ordered) - 1)] for q in QUANTILES}
+
+        bounds = [low] + [min(max(edge, low), high) for edge in self.edges] + [high]
+        result = {}
+        for q in QUANTILES:
+            target = q * count
+            cumulative = 0
+            for i, c in enumerate(counts):
+                if c and cumulative + c >= target:
+                    # Linear interpolation inside the bin
+                    lower, upper = bounds[i], bounds[i + 1]
+                    result[str(q)] = lower + (upper - lower) * (target - cumulative) / c
+                    break
+                cumulative += c
+        return result
+
+
+class DriftMonitor:
+    """Per-feature sliding-window statistics and drift against a reference profile"""
+
+    def __init__(self, window_seconds: float = 3600, panes: int = 12,
+                 reference: Optional[Dict[str, Any]] = None, max_features: int = MAX_FEATURES):
+        self.window_seconds = window_seconds
+        self.panes = panes
+        self.max_features = max_features
+        self._lock = threading.Lock()
+        self._features: Dict[str, FeatureMonitor] = {}
+        self.reference: Optional[Dict[str, Any]] = None
+        self.set_reference(reference)
+
+    def set_reference(self, profile: Optional[Dict[str, Any]]):
+        """Measure drift against profile from now on (window statistics start over)"""
+        with self._lock:
+            self.reference = profile
+            self._features = {}
+            if profile:
+                for name, feature in list(profile["features"].items())[:self.max_features]:
+                    self._features[name] = self._monitor(feature)
+
+    def _monitor(self, reference: Optional[Dict[str, Any]] = None, kind: Optional[str] = None) -> FeatureMonitor:
+        return FeatureMonitor(self.panes, self.window_seconds / self.panes, reference, kind)
+
+    def observe(self, features: Any, now: Optional[float] = None):
+        """Record one request's features (non-scalar values are ignored)"""
+        if not isinstance(features, dict):
+            return
+        now = time.time() if now is None else now
+        monitors = self._features
+        for name, value in features.items():
+            monitor = monitors.get(name)
+            if monitor is None:
+                if isinstance(value, (dict, list)) or value is None:
+                    continue
+                with self._lock:
+                    monitors = self._features
+                    monitor = monitors.get(name)
+                    if monitor is None:
+                        if len(monitors) >= self.max_features:
+                            continue
+                        monitor = monitors[name] = self._monitor(kind="numeric" if _is_number(value)
+                                                                 else "categorical")
+            monitor.observe(value, now)
+        for name in monitors.keys() - features.keys():
+            monitors[name].observe(None, now)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Statistics of every feature over the current window"""
+        now = time.time()
+        return {
+            "window_seconds": self.window_seconds,
+            "has_reference": self.reference is not None,
+            "features": {name: monitor.snapshot(now) for name, monitor in sorted(self._features.items())},
+        }
+
+    def render_prometheus(self, labels: str = "") -> str:
+        """Feature statistics and drift scores in Prometheus text format"""
+        prefix = f"{labels}," if labels else ""
+        series = {
+            "model_feature_count": ("gauge", "Non-missing values in the drift window", []),
+            "model_feature_missing_ratio": ("gauge", "Share of requests missing the feature", []),
+            "model_feature_mean": ("gauge", "Mean over the drift window", []),
+            "model_feature_stddev": ("gauge", "Standard deviation over the drift window", []),
+            "model_feature_quantile": ("gauge", "Quantiles over the drift window", []),
+            "model_feature_drift_psi": ("gauge", "Population Stability Index against the reference", []),
+            "model_feature_drift_ks": ("gauge", "Kolmogorov-Smirnov distance against the reference", []),
+        }
+        for name, stats in self.snapshot()["features"].items():
+            feature = prefix + 'feature="' + name.replace("\\", "\\\\").replace('"', '\\"') + '"'
+            series["model_feature_count"][2].append(f"{{{feature}}} {stats['count']}")
+            series["model_feature_missing_ratio"][2].append(f"{{{feature}}} {stats['missing_ratio']}")
+            if "mean" in stats:
+                series["model_feature_mean"][2].append(f"{{{feature}}} {stats['mean']}")
+                series["model_feature_stddev"][2].append(f"{{{feature}}} {stats['std']}")
+                for q, value in stats["quantiles"].items():
+                    series["model_feature_quantile"][2].append(f'{{{feature},quantile="{q}"}} {value}')
+            if "psi" in stats:
+                series["model_feature_drift_psi"][2].append(f"{{{feature}}} {stats['psi']}")
+            if "ks" in stats:
+                series["model_feature_drift_ks"][2].append(f"{{{feature}}} {stats['ks']}")
+
+        lines = []
+        for metric, (kind, help, samples) in series.items():
+            if samples:
+                lines += [f"# HELP {metric} {help}", f"# TYPE {metric} {kind}"]
+                lines += [metric + sample for sample in samples]
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def fetch_reference_profile(registry_url: str, model_name: str, version: str,
+                            timeout: float = 5) -> Optional[Dict[str, Any]]:
+    """The model version's reference profile from the registry, or None if it has none"""
+    url = f"{registry_url}/api/models/{model_name}/versions/{version}/reference"
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+
+
+def start_reference_refresh(monitor: DriftMonitor, registry_url: str, model_name: str, version: str,
+                            interval: float = 300) -> threading.Thread:
+    """Load the reference profile now and re-check every interval seconds, in a daemon thread"""
+    def refresh():
+        current = None
+        while True:
+            try:
+                profile = fetch_reference_profile(registry_url, model_name, version)
+                if profile is not None and profile != current:
+                    monitor.set_reference(profile)
+                    current = profile
+                    logger.info(f"Loaded drift reference profile for {model_name}:{version} "
+                                f"({len(profile['features'])} features)")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load drift reference profile from {registry_url}: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=refresh, name="drift-reference", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,258 @@
+"""
+Feature transforms compiled from a model version's feature spec
+
+A model version registered with a "feature_spec" in its metadata declares
+how request features become the model's input matrix:
+
+    {
+        "version": 1,
+        "features": [
+            {"name": "amount", "type": "numeric", "default": 0.0,
+             "scale": "standard", "mean": 52.1, "std": 80.3, "clip": [-5, 5]},
+            {"name": "age", "type": "numeric", "scale": "minmax", "min": 18, "max": 90},
+            {"name": "merchant", "type": "categorical", "categories": ["shop", "travel"],
+             "encoding": "onehot", "default": "shop"},
+            {"name": "international", "type": "boolean", "default": false}
+        ]
+    }
+
+compile_feature_spec() turns it into a FeatureTransform once, when the
+model is loaded: scaling becomes one multiply-add over all numeric columns,
+and categories become lookup tables from value to output column (one-hot)
+or code (ordinal). transform() then builds the whole batch's matrix with a
+handful of NumPy operations per feature instead of Python work per value.
+
+Missing values, and numeric values that are not numbers, take the feature's
+default (for numeric features: the mean when given, else 0). Categorical
+values are matched as given, then as strings; unknown ones take the default
+category if there is one, else they encode as all zeros (one-hot) or -1
+(ordinal).
+"""
+
+import json
+import math
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SPEC_VERSION = 1
+# Batches smaller than this are transformed row by row: below it the fixed
+# cost of each NumPy call outweighs the per-value work it saves
+SMALL_BATCH = 16
+TYPES = ("numeric", "categorical", "boolean")
+SCALES = ("none", "standard", "minmax")
+ENCODINGS = ("onehot", "ordinal")
+
+_BOOLEANS = {True: 1.0, False: 0.0, "true": 1.0, "false": 0.0, "True": 1.0, "False": 0.0,
+             "yes": 1.0, "no": 0.0, "1": 1.0, "0": 0.0}
+
+
+def _number(value: Any) -> float:
+    """value as a float, NaN when it is not a number"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return math.nan
+
+
+class _Lookup:
+    """A categorical or boolean feature: value -> output column (one-hot) or value (ordinal, boolean)"""
+
+    def __init__(self, name: str, table: Dict[Any, float], default: float, column: Optional[int]):
+        self.name = name
+        self.table = table
+        self.default = default
+        # Output column for ordinal/boolean values; None for one-hot (the table holds columns)
+        self.column = column
+
+    def code(self, value: Any) -> float:
+        try:
+            code = self.table.get(value)
+        except TypeError:
+            return self.default
+        if code is None and value is not None and not isinstance(value, str):
+            code = self.table.get(str(value))
+        return self.default if code is None else code
+
+    def codes(self, values: List[Any]) -> np.ndarray:
+        get = self.table.get
+        try:
+            codes = np.array([get(value, math.nan) for value in values], dtype=np.float64)
+        except TypeError:
+            # Unhashable values (lists, objects) never match
+            codes = np.array([get(value, math.nan) if isinstance(value, (str, int, float, bool)) else math.nan
+                              for value in values], dtype=np.float64)
+        # Retry the few values that did not match as strings (5 for "5", True for "True")
+        for i in np.flatnonzero(np.isnan(codes)):
+            value = values[i]
+            if value is not None and not isinstance(value, str):
+                codes[i] = get(str(value), math.nan)
+        codes[np.isnan(codes)] = self.default
+        return codes
+
+
+class FeatureTransform:
+    """Request feature dicts -> model input matrix, compiled from a feature spec"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        if not isinstance(spec, dict) or not isinstance(spec.get("features"), list) or not spec["features"]:
+            raise ValueError("feature spec needs a non-empty features list")
+        if spec.get("version", SPEC_VERSION) != SPEC_VERSION:
+            raise ValueError(f"unsupported feature spec version {spec.get('version')}")
+
+        self.columns: List[str] = []
+        numeric: List[Tuple[str, int, float, float, float, float, float]] = []
+        self.lookups: List[_Lookup] = []
+        seen = set()
+        for feature in spec["features"]:
+            name = feature.get("name") if isinstance(feature, dict) else None
+            if not isinstance(name, str) or not name:
+                raise ValueError("every feature needs a name")
+            if name in seen:
+                raise ValueError(f"feature {name!r} is declared twice")
+            seen.add(name)
+            kind = feature.get("type")
+            if kind == "numeric":
+                numeric.append((name, len(self.columns)) + self._scaling(name, feature))
+                self.columns.append(name)
+            elif kind == "categorical":
+                self.lookups.append(self._categorical(name, feature))
+            elif kind == "boolean":
+                default = feature.get("default", False)
+                self.lookups.append(_Lookup(name, _BOOLEANS, _BOOLEANS.get(default, 0.0), len(self.columns)))
+                self.columns.append(name)
+            else:
+                raise ValueError(f"feature {name!r}: type must be one of {', '.join(TYPES)}")
+
+        self.width = len(self.columns)
+        self.numeric_names = [entry[0] for entry in numeric]
+        self.numeric_columns = np.array([entry[1] for entry in numeric], dtype=np.intp)
+        self.numeric_defaults = np.array([entry[2] for entry in numeric], dtype=np.float64)
+        self.numeric_scale = np.array([entry[3] for entry in numeric], dtype=np.float64)
+        self.numeric_offset = np.array([entry[4] for entry in numeric], dtype=np.float64)
+        self.numeric_low = np.array([entry[5] for entry in numeric], dtype=np.float64)
+        self.numeric_high = np.array([entry[6] for entry in numeric], dtype=np.float64)
+        self._numeric_plan = numeric
+
+    @staticmethod
+    def _scaling(name: str, feature: Dict[str, Any]) -> Tuple[float, float, float, float, float]:
+        """(default, scale, offset, low, high): x -> clip(x * scale + offset, low, high)"""
+        scale = feature.get("scale", "none")
+        try:
+            if scale == "standard":
+                mean, std = float(feature["mean"]), float(feature.get("std") or 1.0)
+                factor, offset = 1.0 / std, -mean / std
+                default = float(feature.get("default", mean))
+            elif scale == "minmax":
+                low, high = float(feature["min"]), float(feature["max"])
+                span = (high - low) or 1.0
+                factor, offset = 1.0 / span, -low / span
+                default = float(feature.get("default", feature.get("mean", 0.0)))
+            elif scale == "none":
+                factor, offset = 1.0, 0.0
+                default = float(feature.get("default", feature.get("mean", 0.0)))
+            else:
+                raise ValueError(f"scale must be one of {', '.join(SCALES)}")
+            clip = feature.get("clip")
+            low, high = (float(clip[0]), float(clip[1])) if clip is not None else (-math.inf, math.inf)
+        except (KeyError, TypeError, IndexError, ValueError) as e:
+            raise ValueError(f"feature {name!r}: invalid numeric settings ({e})")
+        return default, factor, offset, low, high
+
+    def _categorical(self, name: str, feature: Dict[str, Any]) -> _Lookup:
+        categories = feature.get("categories")
+        if not isinstance(categories, list) or not categories:
+            raise ValueError(f"feature {name!r}: categorical features need a categories list")
+        encoding = feature.get("encoding", "onehot")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"feature {name!r}: encoding must be one of {', '.join(ENCODINGS)}")
+        if encoding == "onehot":
+            first = len(self.columns)
+            table = {category: float(first + i) for i, category in enumerate(categories)}
+            self.columns += [f"{name}={category}" for category in categories]
+            column = None
+        else:
+            table = {category: float(i) for i, category in enumerate(categories)}
+            column = len(self.columns)
+            self.columns.append(name)
+        default = feature.get("default")
+        if default is not None and default not in table:
+            raise ValueError(f"feature {name!r}: default {default!r} is not one of its categories")
+        return _Lookup(name, table, table[default] if default is not None else -1.0, column)
+
+    def transform(self, rows: Sequence[Any]) -> np.ndarray:
+        """(len(rows), width) float64 matrix for a batch of feature dicts"""
+        rows = [row if isinstance(row, dict) else {} for row in rows]
+        if len(rows) < SMALL_BATCH:
+            return np.array([self._transform_row(row) for row in rows], dtype=np.float64).reshape(-1, self.width)
+        matrix = np.zeros((len(rows), self.width), dtype=np.float64)
+
+        if self.numeric_names:
+            values = [[row.get(name) for row in rows] for name in self.numeric_names]
+            try:
+                # None becomes NaN; so does nothing else, so this is the common fast path
+                block = np.array(values, dtype=np.float64).T
+            except (TypeError, ValueError):
+                block = np.array([[_number(value) for value in column] for column in values], dtype=np.float64).T
+            block = np.where(np.isnan(block), self.numeric_defaults, block)
+            block *= self.numeric_scale
+            block += self.numeric_offset
+            np.clip(block, self.numeric_low, self.numeric_high, out=block)
+            matrix[:, self.numeric_columns] = block
+
+        for lookup in self.lookups:
+            codes = lookup.codes([row.get(lookup.name) for row in rows])
+            if lookup.column is not None:
+                matrix[:, lookup.column] = codes
+            else:
+                hit = np.flatnonzero(codes >= 0)
+                matrix[hit, codes[hit].astype(np.intp)] = 1.0
+        return matrix
+
+
+    def _transform_row(self, row: Dict[str, Any]) -> List[float]:
+        out = [0.0] * self.width
+        for name, column, default, scale, offset, low, high in self._numeric_plan:
+            value = _number(row.get(name))
+            if value != value:
+                value = default
+            out[column] = min(max(value * scale + offset, low), high)
+        for lookup in self.lookups:
+            code = lookup.code(row.get(lookup.name))
+            if lookup.column is not None:
+                out[lookup.column] = code
+            elif code >= 0:
+                out[int(code)] = 1.0
+        return out
+
+
+def compile_feature_spec(spec: Dict[str, Any]) -> FeatureTransform:
+    """Compile a feature spec (raises ValueError if it is invalid)"""
+    try:
+        return FeatureTransform(spec)
+    except TypeError as e:
+        # Unhashable categories or defaults (lists, objects)
+        raise ValueError(f"invalid feature spec: {e}")
+
+
+def fetch_feature_spec(registry_url: str, model_name: str, version: str,
+                       timeout: float = 5) -> Optional[Dict[str, Any]]:
+    """The feature spec registered with a model version, or None if it has none"""
+    url = f"{registry_url}/api/models/{model_name}/versions/{version}"
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            document = json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+    return (document.get("metadata") or {}).get("feature_spec")
@@ -0,0 +1,192 @@
+"""
+Asynchronous logging of served predictions
+
+PredictionLogger.log() is called on the request path. It only samples,
+stamps an id and appends a tuple to a bounded ring buffer (when the buffer
+is full the oldest entry is dropped), so it costs about a microsecond. A
+background thread drains the buffer every flush_interval seconds, or as
+soon as batch_size entries are waiting, serializes each batch as gzipped
+NDJSON and hands it to a sink:
+
+    RegistrySink  POSTs to the registry's
+                  /api/models/<model>/versions/<version>/predictions endpoint
+    SegmentSink   appends to local .ndjson.gz segment files, rotated by size
+
+A batch the sink rejects goes to the fallback sink if one is configured
+(e.g. segment files while the registry is down) and is dropped otherwise.
+Each logged record carries a prediction_id that is returned to the client,
+so outcomes reported later can be joined with what the model saw and said.
+"""
+
+import gzip
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+# (prediction_id, timestamp, request_id, features, outputs, latency_ms)
+Entry = Tuple[str, float, Any, Any, Any, Optional[float]]
+
+
+def encode_batch(entries: List[Entry]) -> bytes:
+    """Gzipped NDJSON of a batch of log entries"""
+    lines = [
+        json.dumps({
+            "prediction_id": prediction_id,
+            "timestamp": timestamp,
+            "request_id": request_id,
+            "features": features,
+            "outputs": outputs,
+            "latency_ms": latency_ms
+        }, default=str)
+        for prediction_id, timestamp, request_id, features, outputs, latency_ms in entries
+    ]
+    return gzip.compress(("\n".join(lines) + "\n").encode("utf-8"), compresslevel=6)
+
+
+class RegistrySink:
+    """Sends batches to the model registry's prediction ingest endpoint"""
+
+    def __init__(self, registry_url: str, model_name: str, version: str, timeout: float = 10):
+        self.url = f"{registry_url}/api/models/{model_name}/versions/{version}/predictions"
+        self.timeout = timeout
+
+    def write(self, payload: bytes, count: int):
+        request = urllib.request.Request(self.url, data=payload, method="POST", headers={
+            "Content-Type": NDJSON_CONTENT_TYPE,
+            "Content-Encoding": "gzip",
+        })
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class SegmentSink:
+    """Appends batches to gzip segment files in a directory, starting a new one past max_bytes
+
+    Each batch is a complete gzip member, so a segment (even one being
+    written) reads as one NDJSON file with gzip/zcat.
+    """
+
+    def __init__(self, directory: str, prefix: str = "predictions", max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self._path: Optional[str] = None
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _rotate(self):
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        name = f"{self.prefix}-{stamp}-{os.getpid()}-{uuid.uuid4().hex[:6]}.ndjson.gz"
+        self._path = os.path.join(self.directory, name)
+        self._size = 0
+
+    def write(self, payload: bytes, count: int):
+        if self._path is None or self._size >= self.max_bytes:
+            self._rotate()
+        with open(self._path, "ab") as fh:
+            fh.write(payload)
+        self._size += len(payload)
+
+
+class PredictionLogger:
+    """Samples predictions into a ring buffer shipped to a sink in batches by a background thread"""
+
+    def __init__(self, sink, sample_rate: float = 1.0, capacity: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 2.0, fallback=None):
+        self.sink = sink
+        self.fallback = fallback
+        self.sample_rate = sample_rate
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: deque = deque(maxlen=capacity)
+        # Unique across processes and restarts; next() on a count is atomic
+        self._id_prefix = uuid.uuid4().hex[:12]
+        self._ids = itertools.count()
+        self._wake = threading.Event()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.stats = {"logged": 0, "dropped": 0, "shipped": 0, "spilled": 0, "failed": 0, "batches": 0}
+        self._thread = threading.Thread(target=self._run, name="prediction-logger", daemon=True)
+        self._thread.start()
+
+    def log(self, features: Any, outputs: Any, latency_ms: Optional[float] = None,
+            request_id: Any = None) -> Optional[str]:
+        """Queue one prediction; returns its prediction_id, or None when not sampled"""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        prediction_id = f"{self._id_prefix}-{next(self._ids)}"
+        with self._lock:
+            if len(self._buffer) == self.capacity:
+                self.stats["dropped"] += 1
+            self._buffer.append((prediction_id, time.time(), request_id, features, outputs, latency_ms))
+            self.stats["logged"] += 1
+            queued = len(self._buffer)
+        if queued >= self.batch_size:
+            self._wake.set()
+        return prediction_id
+
+    def _drain(self) -> List[Entry]:
+        with self._lock:
+            count = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _ship(self, entries: List[Entry]):
+        payload = encode_batch(entries)
+        try:
+            self.sink.write(payload, len(entries))
+            outcome = "shipped"
+        except Exception as e:
+            logger.warning(f"Could not ship {len(entries)} logged predictions: {e}")
+            outcome = "failed"
+            if self.fallback is not None:
+                try:
+                    self.fallback.write(payload, len(entries))
+                    outcome = "spilled"
+                except Exception as e:
+                    logger.warning(f"Could not spill {len(entries)} logged predictions: {e}")
+        with self._lock:
+            self.stats[outcome] += len(entries)
+            self.stats["batches"] += 1
+
+    def flush(self):
+        """Ship everything queued so far (in the calling thread)"""
+        while True:
+            entries = self._drain()
+            if not entries:
+                return
+            self._ship(entries)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Prediction logger error: {e}")
+
+    def close(self):
+        """Stop the background thread after shipping what is queued"""
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=self.flush_interval + 30)
+        self.flush()
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counts of predictions logged, dropped from a full buffer, shipped, spilled and failed"""
+        with self._lock:
+            return dict(self.stats, queued=len(self._buffer))
@@ -3,27 +3,177 @@ Mock Model Serving Endpoint - For demo purposes
 Shows a working prediction API that clients will see
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+import atexit
+import math
+import os
 import random
+import threading
 import time
+import zlib
 from datetime import datetime
 
+import numpy as np
+
+from batch import (
+    CHUNK_SIZE, CONTENT_TYPES, RESPONSE_CONTENT_TYPES, format_for_path, iter_file_lines, iter_stream_lines,
+    stream_predictions
+)
+from drift import DriftMonitor, start_reference_refresh
+from features import compile_feature_spec, fetch_feature_spec
+from prediction_log import PredictionLogger, RegistrySink, SegmentSink
+from traffic import MODES, OFF, TrafficSplitter
+from workers import ScoringPool, worker_count
+
 app = Flask(__name__)
 CORS(app)
 
+# Directory /batch_predict?path= may read input files from; unset disables file input
+BATCH_INPUT_DIR = os.getenv("BATCH_INPUT_DIR")
+MAX_CHUNK_SIZE = 100000
+
+MODEL_NAME = os.getenv("MODEL_NAME", "fraud-detector")
+MODEL_VERSION = os.getenv("MODEL_VERSION", "1.2.3")
+REGISTRY_URL = os.getenv("MODEL_REGISTRY_URL", "http://localhost:5000")
+
 # Mock model
 class MockModel:
+    def __init__(self, version=MODEL_VERSION, transform=None):
+        self.version = version
+        # Compiled from the version's feature spec (see features.py); None scores the raw features
+        self.transform = transform
+        if transform is not None:
+            # Stand-in for trained coefficients, fixed per version
+            rng = np.random.default_rng(zlib.crc32(version.encode("utf-8")))
+            self.weights = rng.normal(0.0, 1.0 / math.sqrt(transform.width), transform.width)
+    
     def predict(self, features):
         """Simulate prediction with realistic latency"""
         time.sleep(random.uniform(0.02, 0.05))  # 20-50ms latency
-        
+        return self._score_batch([features])[0]
+    
+    def predict_batch(self, features_list):
+        """Score many rows in one call, with the latency of a single vectorized prediction"""
+        time.sleep(random.uniform(0.02, 0.05))
+        return self._score_batch(features_list)
+    
+    def _score_batch(self, features_list):
+        if self.transform is None:
+            return [self._score(features) for features in features_list]
+        # One matrix for the whole batch, scored with a single product
+        risk = 1.0 / (1.0 + np.exp(-(self.transform.transform(features_list) @ self.weights)))
+        return [{
+            "prediction": "fraudulent" if score >= 0.5 else "legitimate",
+            "confidence": round(max(score, 1.0 - score), 4),
+            "risk_score": round(score, 4)
+        } for score in risk.tolist()]
+    
+    @staticmethod
+    def _score(features):
         # Return mock prediction
         if "fraud" in str(features).lower():
             return {"prediction": "fraudulent", "confidence": 0.94, "risk_score": 0.88}
         return {"prediction": "legitimate", "confidence": 0.92, "risk_score": 0.12}
 
-model = MockModel()
+def load_model(version):
+    """
+    Load a registered version of the model (the mock stands in for every version)
+    
+    The feature spec registered with the version is compiled here, once, so
+    requests only run the compiled transform. An invalid spec fails the load;
+    an unreachable registry leaves the raw features to the model.
+    """
+    transform = None
+    try:
+        spec = fetch_feature_spec(REGISTRY_URL, MODEL_NAME, version)
+    except OSError as e:
+        app.logger.warning(f"Could not fetch the feature spec of {MODEL_NAME}:{version} from {REGISTRY_URL}: {e}")
+        spec = None
+    if spec is not None:
+        transform = compile_feature_spec(spec)
+        app.logger.info(f"Compiled the feature spec of {MODEL_NAME}:{version} ({transform.width} inputs)")
+    return MockModel(version, transform)
+
+# /predict traffic can be split between MODEL_VERSION and a candidate version,
+# loaded alongside it: TRAFFIC_MODE=canary sends it a CANARY_WEIGHT share of
+# requests, TRAFFIC_MODE=shadow mirrors every request to it in the background.
+# Both can be changed at runtime with PUT /traffic (see traffic.py).
+traffic = TrafficSplitter(MODEL_VERSION, load_model)
+model = traffic.primary
+if os.getenv("TRAFFIC_MODE", OFF) != OFF:
+    traffic.configure(os.getenv("CANDIDATE_VERSION"), os.getenv("TRAFFIC_MODE"),
+                      float(os.getenv("CANARY_WEIGHT", "0.1")))
+
+# Worker processes for batch scoring (a number, or "auto" for one per core), forked
+# after the model is loaded so they share its memory; unset scores in-process
+SCORING_WORKERS = worker_count(os.getenv("SCORING_WORKERS"))
+# JSON batches with at least this many rows are split across the workers
+POOL_MIN_ROWS = int(os.getenv("SCORING_POOL_MIN_ROWS", str(CHUNK_SIZE)))
+scoring_pool = ScoringPool(model, SCORING_WORKERS) if SCORING_WORKERS > 0 else None
+
+# Statistics of live request features over a sliding window, compared with the
+# reference profile registered for this model version (see drift.py)
+drift_monitor = DriftMonitor(window_seconds=float(os.getenv("DRIFT_WINDOW_SECONDS", "3600")))
+if os.getenv("DRIFT_REFERENCE_REFRESH", "300") != "0":
+    start_reference_refresh(drift_monitor, REGISTRY_URL, MODEL_NAME, MODEL_VERSION,
+                            interval=float(os.getenv("DRIFT_REFERENCE_REFRESH", "300")))
+
+# Served predictions are shipped in the background (see prediction_log.py) to the
+# registry, or to local segment files with PREDICTION_LOG_SINK=files; with the
+# registry sink, PREDICTION_LOG_DIR receives the batches the registry rejects.
+# PREDICTION_LOG_SAMPLE_RATE=0 turns logging off.
+PREDICTION_LOG_SAMPLE_RATE = float(os.getenv("PREDICTION_LOG_SAMPLE_RATE", "1.0"))
+PREDICTION_LOG_SINK = os.getenv("PREDICTION_LOG_SINK", "registry")
+PREDICTION_LOG_DIR = os.getenv("PREDICTION_LOG_DIR", "prediction-logs" if PREDICTION_LOG_SINK == "files" else None)
+prediction_loggers = {}
+prediction_loggers_lock = threading.Lock()
+
+
+def get_prediction_logger(version=MODEL_VERSION):
+    """The logger for predictions answered by a model version (None when logging is off)"""
+    if PREDICTION_LOG_SAMPLE_RATE <= 0:
+        return None
+    with prediction_loggers_lock:
+        if version not in prediction_loggers:
+            prefix = "predictions" if version == MODEL_VERSION else f"predictions-{version}"
+            segments = SegmentSink(PREDICTION_LOG_DIR, prefix=prefix) if PREDICTION_LOG_DIR else None
+            if PREDICTION_LOG_SINK == "files":
+                version_logger = PredictionLogger(segments, sample_rate=PREDICTION_LOG_SAMPLE_RATE)
+            else:
+                version_logger = PredictionLogger(RegistrySink(REGISTRY_URL, MODEL_NAME, version),
+                                                  sample_rate=PREDICTION_LOG_SAMPLE_RATE, fallback=segments)
+            atexit.register(version_logger.close)
+            prediction_loggers[version] = version_logger
+        return prediction_loggers[version]
+
+
+prediction_logger = get_prediction_logger()
+
+# Live request counters for /metrics and /health
+START_TIME = time.time()
+LATENCY_BUCKETS = (0.05, 0.1)
+serving_stats = {"predictions": 0, "errors": 0, "latency_sum": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+serving_stats_lock = threading.Lock()
+
+
+def record_predictions(seconds, count=1):
+    """Count count predictions answered in seconds each"""
+    bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+    with serving_stats_lock:
+        serving_stats["predictions"] += count
+        serving_stats["latency_sum"] += seconds * count
+        serving_stats["buckets"][bucket] += count
+
+
+def record_error():
+    with serving_stats_lock:
+        serving_stats["errors"] += 1
+
+
+def _uptime():
+    minutes = int(time.time() - START_TIME) // 60
+    return f"{minutes // 1440}d {minutes // 60 % 24}h {minutes % 60}m"
 
 
 @app.route('/health', methods=['GET'])
@@ -31,9 +181,10 @@ def health():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
-        "model": "fraud-detector",
-        "version": "1.2.3",
-        "uptime": "5d 12h 34m"
+        "model": MODEL_NAME,
+        "version": MODEL_VERSION,
+        "uptime": _uptime(),
+        "uptime_seconds": round(time.time() - START_TIME, 1)
     }), 200
 
 
@@ -48,69 +199,223 @@ def predict():
         if not data or 'features' not in data:
             return jsonify({"error": "Missing 'features' in request"}), 400
         
-        # Make prediction
-        result = model.predict(data['features'])
+        drift_monitor.observe(data['features'])
+        
+        # Make prediction (with the candidate version for a canary share of requests)
+        version, result = traffic.predict(data['features'])
         
         latency = (time.time() - start_time) * 1000  # Convert to ms
+        record_predictions(latency / 1000)
         
-        return jsonify({
+        response = {
             "prediction": result["prediction"],
             "confidence": result["confidence"],
             "risk_score": result["risk_score"],
-            "model_version": "1.2.3",
+            "model_version": version,
             "latency_ms": round(latency, 2),
             "timestamp": datetime.utcnow().isoformat()
-        }), 200
+        }
+        version_logger = get_prediction_logger(version)
+        if version_logger is not None:
+            prediction_id = version_logger.log(data['features'], result, latency, data.get('request_id'))
+            if prediction_id is not None:
+                response["prediction_id"] = prediction_id
+        
+        return jsonify(response), 200
         
     except Exception as e:
+        record_error()
         return jsonify({"error": str(e)}), 500
 
 
 @app.route('/batch_predict', methods=['POST'])
 def batch_predict():
-    """Batch prediction endpoint"""
+    """
+    Batch prediction endpoint
+    
+    A JSON body {"batch": [{"features": ...}, ...]} is scored at once and
+    answered with one JSON document (split across the scoring worker
+    processes when SCORING_WORKERS is set and the batch is large). NDJSON (application/x-ndjson) and CSV
+    (text/csv) bodies, or ?path=<file> under BATCH_INPUT_DIR, are scored in
+    chunks and streamed back as they finish (see batch.py).
+    
+    Query parameters (streaming only):
+        path: .ndjson/.jsonl/.csv file to score instead of the request body
+        format: ndjson or csv output (default: the input format)
+        chunk_size: Rows per model call (default 1000)
+    """
+    if request.args.get('path') is not None or request.mimetype in CONTENT_TYPES:
+        return stream_batch_predict()
+    
     data = request.get_json()
     
     if not data or 'batch' not in data:
         return jsonify({"error": "Missing 'batch' in request"}), 400
     
-    predictions = []
-    for item in data['batch']:
-        result = model.predict(item.get('features', {}))
-        predictions.append(result)
+    start_time = time.time()
+    batch = data['batch']
+    for item in batch:
+        drift_monitor.observe(item.get('features'))
+    
+    if scoring_pool is not None and len(batch) >= POOL_MIN_ROWS:
+        # Split into chunks scored in parallel by the worker processes, reassembled in order
+        features = [item.get('features', {}) for item in batch]
+        chunks = [features[i:i + CHUNK_SIZE] for i in range(0, len(features), CHUNK_SIZE)]
+        predictions = [result for chunk in scoring_pool.map(chunks) for result in chunk]
+    elif batch:
+        # One vectorized call for the whole batch
+        predictions = model.predict_batch([item.get('features', {}) for item in batch])
+    else:
+        predictions = []
+    
+    if batch:
+        record_predictions((time.time() - start_time) / len(batch), len(batch))
+    if prediction_logger is not None and batch:
+        latency = (time.time() - start_time) * 1000 / len(batch)
+        for item, result in zip(batch, predictions):
+            prediction_id = prediction_logger.log(item.get('features', {}), dict(result), latency,
+                                                  item.get('request_id'))
+            if prediction_id is not None:
+                result["prediction_id"] = prediction_id
     
     return jsonify({
         "predictions": predictions,
         "count": len(predictions),
-        "model_version": "1.2.3"
+        "model_version": MODEL_VERSION
     }), 200
 
 
+def stream_batch_predict():
+    """Score an NDJSON/CSV body or file chunk by chunk, streaming results back"""
+    path = request.args.get('path')
+    if path is not None:
+        if not BATCH_INPUT_DIR:
+            return jsonify({"error": "File input is disabled (set BATCH_INPUT_DIR)"}), 403
+        root = os.path.realpath(BATCH_INPUT_DIR)
+        path = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, path]) != root:
+            return jsonify({"error": "path must be inside BATCH_INPUT_DIR"}), 403
+        if not os.path.isfile(path):
+            return jsonify({"error": f"File not found: {request.args['path']}"}), 404
+        input_format = format_for_path(path) or CONTENT_TYPES.get(request.mimetype)
+        lines = iter_file_lines(path)
+    else:
+        input_format = CONTENT_TYPES[request.mimetype]
+        lines = iter_stream_lines(request.stream)
+    
+    if input_format is None:
+        return jsonify({"error": "Unknown input format; use a .ndjson, .jsonl or .csv file"}), 400
+    
+    output_format = request.args.get('format', input_format)
+    if output_format not in RESPONSE_CONTENT_TYPES:
+        return jsonify({"error": f"format must be one of {sorted(RESPONSE_CONTENT_TYPES)}"}), 400
+    
+    try:
+        chunk_size = int(request.args.get('chunk_size', CHUNK_SIZE))
+    except ValueError:
+        return jsonify({"error": "chunk_size must be an integer"}), 400
+    if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+        return jsonify({"error": f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}"}), 400
+    
+    body = stream_predictions(lines, input_format, output_format, model.predict_batch, chunk_size,
+                              pool=scoring_pool)
+    return Response(body, mimetype=RESPONSE_CONTENT_TYPES[output_format], headers={
+        "X-Model-Version": MODEL_VERSION
+    })
+
+
 @app.route('/metrics', methods=['GET'])
 def metrics():
     """Prometheus-style metrics endpoint"""
+    with serving_stats_lock:
+        stats = dict(serving_stats, buckets=list(serving_stats["buckets"]))
+    cumulative = [sum(stats["buckets"][:i + 1]) for i in range(len(stats["buckets"]))]
+    labels = f'model="{MODEL_NAME}",version="{MODEL_VERSION}"'
     metrics_text = f"""# HELP model_predictions_total Total number of predictions
 # TYPE model_predictions_total counter
-model_predictions_total{{model="fraud-detector",version="1.2.3"}} 145234
+model_predictions_total{{model="{MODEL_NAME}",version="{MODEL_VERSION}"}} {stats["predictions"]}
+
+# HELP model_prediction_errors_total Prediction requests that failed
+# TYPE model_prediction_errors_total counter
+model_prediction_errors_total{{model="{MODEL_NAME}",version="{MODEL_VERSION}"}} {stats["errors"]}
 
 # HELP model_latency_seconds Prediction latency in seconds
 # TYPE model_latency_seconds histogram
-model_latency_seconds_bucket{{le="0.05"}} 142000
-model_latency_seconds_bucket{{le="0.1"}} 145000
-model_latency_seconds_bucket{{le="+Inf"}} 145234
+model_latency_seconds_bucket{{le="0.05"}} {cumulative[0]}
+model_latency_seconds_bucket{{le="0.1"}} {cumulative[1]}
+model_latency_seconds_bucket{{le="+Inf"}} {cumulative[2]}
+model_latency_seconds_sum {stats["latency_sum"]}
+model_latency_seconds_count {stats["predictions"]}
 
 # HELP model_accuracy Current model accuracy
 # TYPE model_accuracy gauge
 model_accuracy{{model="fraud-detector"}} 0.96
-"""
+
+""" + prediction_log_metrics() + drift_monitor.render_prometheus(labels) + traffic.render_prometheus(labels)
     return metrics_text, 200, {'Content-Type': 'text/plain'}
 
 
+def prediction_log_metrics():
+    """Prediction logger counters in Prometheus text format"""
+    with prediction_loggers_lock:
+        stats = {version: version_logger.snapshot() for version, version_logger in prediction_loggers.items()}
+    if not stats:
+        return ""
+    lines = []
+    for outcome in ("logged", "dropped", "shipped", "spilled", "failed"):
+        lines.append(f"# TYPE model_prediction_log_{outcome}_total counter")
+        lines += [f'model_prediction_log_{outcome}_total{{served_version="{version}"}} {counts[outcome]}'
+                  for version, counts in stats.items()]
+    lines.append("# TYPE model_prediction_log_queued gauge")
+    lines += [f'model_prediction_log_queued{{served_version="{version}"}} {counts["queued"]}'
+              for version, counts in stats.items()]
+    return "\n".join(lines) + "\n\n"
+
+
+@app.route('/drift', methods=['GET'])
+def drift():
+    """Feature statistics and drift scores over the current window"""
+    snapshot = drift_monitor.snapshot()
+    snapshot.update({"model": MODEL_NAME, "version": MODEL_VERSION})
+    return jsonify(snapshot), 200
+
+
+@app.route('/traffic', methods=['GET'])
+def get_traffic():
+    """Traffic split with per-version latency and candidate agreement statistics"""
+    snapshot = traffic.snapshot()
+    snapshot["model"] = MODEL_NAME
+    return jsonify(snapshot), 200
+
+
+@app.route('/traffic', methods=['PUT'])
+def set_traffic():
+    """
+    Change the traffic split
+    
+    Body: {"candidate_version": "1.3.0", "mode": "canary", "weight": 0.1},
+    {"candidate_version": "1.3.0", "mode": "shadow"} or {"mode": "off"}
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    try:
+        traffic.configure(data.get("candidate_version"), data.get("mode", OFF), float(data.get("weight", 0.0)))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e), "modes": list(MODES)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return get_traffic()
+
+
 if __name__ == '__main__':
+    port = int(os.getenv("PORT", "8080"))
     print("=" * 60)
-    print("Model Serving API - fraud-detector v1.2.3")
+    print(f"Model Serving API - {MODEL_NAME} v{MODEL_VERSION}")
     print("=" * 60)
-    print("Prediction endpoint: http://localhost:8080/predict")
-    print("Health check:        http://localhost:8080/health")
+    print(f"Prediction endpoint: http://localhost:{port}/predict")
+    print(f"Health check:        http://localhost:{port}/health")
+    print(f"Feature drift:       http://localhost:{port}/drift")
+    print(f"Traffic split:       http://localhost:{port}/traffic")
     print("=" * 60)
-    app.run(host='0.0.0.0', port=8080, debug=False)
+    app.run(host=os.getenv("HOST", "0.0.0.0"), port=port, debug=False)
@@ -0,0 +1,275 @@
+"""
+Canary and shadow traffic between two versions of a model
+
+A TrafficSplitter holds the primary (incumbent) model version and
+optionally a candidate, in one of two modes:
+
+    canary  a weighted share of /predict requests is answered by the
+            candidate; for those, the primary also scores the request in
+            the background so the two can be compared
+    shadow  every request is answered by the primary and mirrored to the
+            candidate in the background; the candidate's answer is only
+            recorded
+
+Background comparisons run on a small thread pool fed through a bounded
+queue. Submitting never blocks the request: when the queue is full the
+comparison is skipped and counted as dropped.
+
+Per version it records requests, errors and latency (totals for exact
+means across replicas, plus recent samples for percentiles), once for the
+requests the version answered and once, separately, for its background
+scorings, so comparisons do not inflate the served counts and latencies.
+For each comparison it records whether the predicted labels agree and the
+absolute difference in risk score.
+"""
+
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+OFF = "off"
+CANARY = "canary"
+SHADOW = "shadow"
+MODES = (OFF, CANARY, SHADOW)
+
+# Recent latencies kept per version for percentiles
+LATENCY_WINDOW = 2048
+# Background comparisons waiting to run before new ones are dropped
+COMPARISON_QUEUE = 1000
+
+
+class VersionStats:
+    """Request count, errors and latency of one model version"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, error: bool = False):
+        with self._lock:
+            self.requests += 1
+            if error:
+                self.errors += 1
+            else:
+                self.latency_sum += seconds
+                self.latencies.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            snapshot = {"requests": self.requests, "errors": self.errors, "latency_sum": self.latency_sum}
+        for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            if latencies:
+                snapshot[f"latency_{name}"] = latencies[min(int(len(latencies) * q), len(latencies) - 1)]
+        return snapshot
+
+
+class ComparisonStats:
+    """Agreement between candidate and primary answers to the same requests"""
+
+    def __init__(self):
+        self.comparisons = 0
+        self.disagreements = 0
+        self.score_difference_sum = 0.0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def record(self, primary: Dict[str, Any], candidate: Dict[str, Any]):
+        difference = None
+        if isinstance(primary.get("risk_score"), (int, float)) and isinstance(candidate.get("risk_score"), (int, float)):
+            difference = abs(primary["risk_score"] - candidate["risk_score"])
+        with self._lock:
+            self.comparisons += 1
+            if primary.get("prediction") != candidate.get("prediction"):
+                self.disagreements += 1
+            if difference is not None:
+                self.score_difference_sum += difference
+
+    def drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "comparisons": self.comparisons,
+                "disagreements": self.disagreements,
+                "agreement": 1 - self.disagreements / self.comparisons if self.comparisons else None,
+                "score_difference_sum": self.score_difference_sum,
+                "dropped": self.dropped,
+            }
+
+
+class TrafficSplitter:
+    """Routes /predict requests between a primary and a candidate model version"""
+
+    def __init__(self, primary_version: str, load_model: Callable[[str], Any], workers: int = 2):
+        self.primary_version = primary_version
+        self.load_model = load_model
+        self.models: Dict[str, Any] = {primary_version: load_model(primary_version)}
+        self.candidate_version: Optional[str] = None
+        self.mode = OFF
+        self.weight = 0.0
+        self.stats: Dict[str, VersionStats] = {primary_version: VersionStats()}
+        # Scorings made only to compare the two versions
+        self.background_stats: Dict[str, VersionStats] = {primary_version: VersionStats()}
+        self.comparison = ComparisonStats()
+        self._lock = threading.Lock()
+        self._comparisons: "queue.Queue" = queue.Queue(maxsize=COMPARISON_QUEUE)
+        for index in range(workers):
+            threading.Thread(target=self._compare_loop, name=f"traffic-compare-{index}", daemon=True).start()
+
+    @property
+    def primary(self):
+        return self.models[self.primary_version]
+
+    def configure(self, candidate_version: Optional[str], mode: str = OFF, weight: float = 0.0):
+        """Load candidate_version (if not loaded yet) and start sending it traffic in mode"""
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        if mode != OFF and not candidate_version:
+            raise ValueError(f"{mode} mode needs a candidate version")
+        if mode == CANARY and not 0 <= weight <= 1:
+            raise ValueError("weight must be between 0 and 1")
+        if candidate_version == self.primary_version:
+            raise ValueError("the candidate must differ from the primary version")
+
+        model = None
+        if candidate_version and candidate_version not in self.models:
+            model = self.load_model(candidate_version)
+        with self._lock:
+            if model is not None:
+                self.models[candidate_version] = model
+            if candidate_version != self.candidate_version:
+                # Comparisons so far were against another candidate
+                self.comparison = ComparisonStats()
+            self.candidate_version = candidate_version if mode != OFF else None
+            self.mode = mode
+            self.weight = weight if mode == CANARY else 0.0
+            # Only the primary and the current candidate stay loaded
+            for version in [v for v in self.models if v not in (self.primary_version, self.candidate_version)]:
+                del self.models[version]
+            if self.candidate_version:
+                self.stats.setdefault(self.candidate_version, VersionStats())
+                self.background_stats.setdefault(self.candidate_version, VersionStats())
+            self.stats = {version: self.stats[version] for version in self.models}
+            self.background_stats = {version: self.background_stats[version] for version in self.models}
+        logger.info(f"Traffic: primary {self.primary_version}, candidate {self.candidate_version} "
+                    f"({self.mode}, weight {self.weight})")
+
+    @staticmethod
+    def _timed(stats: Optional[VersionStats], model, features) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            result = model.predict(features)
+        except Exception:
+            if stats is not None:
+                stats.record(time.perf_counter() - started, error=True)
+            raise
+        if stats is not None:
+            stats.record(time.perf_counter() - started)
+        return result
+
+    def predict(self, features) -> Tuple[str, Dict[str, Any]]:
+        """(version that answered, its prediction); comparisons are queued, never awaited"""
+        with self._lock:
+            mode, weight, candidate = self.mode, self.weight, self.candidate_version
+            candidate_model = self.models.get(candidate) if candidate else None
+
+        if mode == CANARY and candidate_model is not None and random.random() < weight:
+            result = self._timed(self.stats.get(candidate), candidate_model, features)
+            # Score with the primary in the background to measure agreement
+            self._submit(features, None, result, candidate)
+            return candidate, result
+
+        result = self._timed(self.stats.get(self.primary_version), self.primary, features)
+        if mode == SHADOW and candidate_model is not None:
+            self._submit(features, result, None, candidate)
+        return self.primary_version, result
+
+    def _submit(self, features, primary_result, candidate_result, candidate: str):
+        try:
+            self._comparisons.put_nowait((features, primary_result, candidate_result, candidate))
+        except queue.Full:
+            self.comparison.drop()
+
+    def _compare_loop(self):
+        while True:
+            features, primary_result, candidate_result, candidate = self._comparisons.get()
+            try:
+                if primary_result is None:
+                    primary_result = self._timed(self.background_stats.get(self.primary_version), self.primary,
+                                                 features)
+                else:
+                    model = self.models.get(candidate)
+                    if model is None:
+                        continue
+                    candidate_result = self._timed(self.background_stats.get(candidate), model, features)
+                if candidate == self.candidate_version:
+                    self.comparison.record(primary_result, candidate_result)
+            except Exception as e:
+                logger.debug(f"Background comparison failed: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Traffic configuration with per-version and comparison statistics"""
+        with self._lock:
+            versions = {version: dict(stats.snapshot(), background=self.background_stats[version].snapshot())
+                        for version, stats in self.stats.items()}
+            config = {
+                "primary_version": self.primary_version,
+                "candidate_version": self.candidate_version,
+                "mode": self.mode,
+                "weight": self.weight,
+            }
+        for version, stats in versions.items():
+            stats["role"] = "primary" if version == self.primary_version else "candidate"
+        return dict(config, versions=versions, comparison=self.comparison.snapshot(),
+                    comparison_queue=self._comparisons.qsize())
+
+    def render_prometheus(self, labels: str) -> str:
+        """Per-version and comparison statistics in Prometheus text format"""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP model_version_requests_total Requests scored per model version, answered (kind=served) "
+            "or only compared (kind=background)",
+            "# TYPE model_version_requests_total counter",
+        ]
+        errors = []
+        latency = []
+        scored = [(version, version_stats["role"], kind, stats)
+                  for version, version_stats in snapshot["versions"].items()
+                  for kind, stats in (("served", version_stats), ("background", version_stats["background"]))]
+        for version, role, kind, stats in scored:
+            version_labels = f'{labels},served_version="{version}",role="{role}",kind="{kind}"'
+            lines.append(f"model_version_requests_total{{{version_labels}}} {stats['requests']}")
+            errors.append(f"model_version_errors_total{{{version_labels}}} {stats['errors']}")
+            for name, q in (("p50", "0.5"), ("p95", "0.95"), ("p99", "0.99")):
+                if f"latency_{name}" in stats:
+                    latency.append(
+                        f'model_version_latency_seconds{{{version_labels},quantile="{q}"}} {stats[f"latency_{name}"]}')
+            # Failed scorings are counted as errors and have no latency
+            latency += [f"model_version_latency_seconds_sum{{{version_labels}}} {stats['latency_sum']}",
+                        f"model_version_latency_seconds_count{{{version_labels}}} {stats['requests'] - stats['errors']}"]
+        lines += ["# TYPE model_version_errors_total counter"] + errors
+        lines += ["# HELP model_version_latency_seconds Latency per model version (quantiles over recent requests)",
+                  "# TYPE model_version_latency_seconds summary"] + latency
+
+        comparison = snapshot["comparison"]
+        candidate = f'{labels},candidate_version="{snapshot["candidate_version"] or ""}",mode="{snapshot["mode"]}"'
+        for name in ("comparisons", "disagreements", "dropped"):
+            lines += [f"# TYPE model_candidate_{name}_total counter",
+                      f"model_candidate_{name}_total{{{candidate}}} {comparison[name]}"]
+        lines += ["# TYPE model_candidate_score_difference_sum counter",
+                  f"model_candidate_score_difference_sum{{{candidate}}} {comparison['score_difference_sum']}",
+                  "# TYPE model_canary_weight gauge",
+                  f"model_canary_weight{{{candidate}}} {snapshot['weight']}"]
+        return "\n".join(lines) + "\n\n"
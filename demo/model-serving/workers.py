@@ -0,0 +1,94 @@
+"""
+Process pool for CPU-bound batch scoring
+
+One Flask process scores on one core because of the GIL. ScoringPool runs
+predict_batch in worker processes instead. On platforms with fork the
+workers are forked after the model is loaded and share its memory
+copy-on-write (gc.freeze() keeps the collector from touching, and so
+copying, those pages); elsewhere the model is pickled to each worker once
+at start-up.
+
+Chunks are submitted with a bounded number in flight and results are
+returned in submission order, so a stream of any length is scored at
+constant memory.
+"""
+
+import atexit
+import gc
+import multiprocessing
+import os
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Model used by worker processes (inherited on fork, set by _init_worker otherwise)
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _score(features_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return _worker_model.predict_batch(features_list)
+
+
+def worker_count(setting: Optional[str]) -> int:
+    """Parse a worker count setting: a number, "auto" (one per core) or empty (0, in-process)"""
+    if not setting:
+        return 0
+    if setting.strip().lower() == "auto":
+        return os.cpu_count() or 1
+    return int(setting)
+
+
+class ScoringPool:
+    """Scores feature chunks with model.predict_batch across worker processes"""
+
+    def __init__(self, model, processes: Optional[int] = None, max_in_flight: Optional[int] = None,
+                 timeout: float = 300):
+        global _worker_model
+        self.processes = processes or os.cpu_count() or 1
+        # Enough queued chunks to keep every worker busy while results are collected
+        self.max_in_flight = max_in_flight or 2 * self.processes
+        self.timeout = timeout
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            _worker_model = model
+            gc.collect()
+            gc.freeze()
+            try:
+                self._pool = multiprocessing.get_context("fork").Pool(self.processes)
+            finally:
+                gc.unfreeze()
+        else:
+            self._pool = multiprocessing.get_context().Pool(self.processes, initializer=_init_worker,
+                                                            initargs=(model,))
+        atexit.register(self.close)
+
+    def imap(self, items: Iterable[T],
+             features_of: Callable[[T], List[Dict[str, Any]]]) -> Iterator[Tuple[T, List[Dict[str, Any]]]]:
+        """(item, predictions for features_of(item)) in input order, at most max_in_flight chunks ahead"""
+        pending: deque = deque()
+        for item in items:
+            features = features_of(item)
+            pending.append((item, self._pool.apply_async(_score, (features,)) if features else None))
+            if len(pending) >= self.max_in_flight:
+                yield self._collect(pending.popleft())
+        while pending:
+            yield self._collect(pending.popleft())
+
+    def _collect(self, entry):
+        item, result = entry
+        return item, result.get(self.timeout) if result is not None else []
+
+    def map(self, chunks: List[List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+        """Predictions for each chunk of features, in order"""
+        return [predictions for _, predictions in self.imap(chunks, lambda chunk: chunk)]
+
+    def close(self):
+        """Stop the worker processes"""
+        self._pool.terminate()
+        self._pool.join()
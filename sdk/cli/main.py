@@ -3,7 +3,6 @@
 import click
 import sys
 import os
-from datetime import datetime
 
 # Add parent directory to path to import mlops_sdk
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -25,13 +24,28 @@ def cli():
 @click.option('--replicas', '-r', default=2, type=int, help='Number of replicas')
 @click.option('--cpu', default='500m', help='CPU request (e.g., 500m, 1)')
 @click.option('--memory', default='1Gi', help='Memory request (e.g., 512Mi, 1Gi)')
-def deploy(model_name, version, environment, replicas, cpu, memory):
+@click.option('--apply', 'apply_plan', is_flag=True,
+              help='Start the replicas locally behind a load balancer instead of printing the plan')
+@click.option('--port', '-p', type=int, help='Load balancer port for --apply (default: keep the current one, or any free port)')
+@click.option('--strategy', default='round-robin', type=click.Choice(['round-robin', 'least-connections']),
+              help='Load balancing strategy for --apply')
+@click.option('--timeout', default=60.0, type=float, help='Seconds each replica may take to become healthy')
+def deploy(model_name, version, environment, replicas, cpu, memory, apply_plan, port, strategy, timeout):
     """
     Generate and display a deployment plan for a model
     
+    With --apply, the registered model version is served locally: all
+    replicas start and are health-checked in parallel, then a load balancer
+    is pointed at them (replacing any earlier replicas of the deployment).
+    
     Example:
         mlops deploy -m my_model -v 1.2.0 -e production
+        mlops deploy -m my_model -v 1.2.0 -r 8 --apply
     """
+    if apply_plan:
+        _apply_deployment(model_name, version, environment, replicas, port, strategy, timeout)
+        return
+    
     click.echo()
     click.secho("=" * 70, fg='cyan', bold=True)
     click.secho("  MLOps Deployment Plan", fg='cyan', bold=True)
@@ -126,48 +140,280 @@ def deploy(model_name, version, environment, replicas, cpu, memory):
     click.echo()
 
 
+def _apply_deployment(model_name, version, environment, replicas, port, strategy, timeout):
+    """Roll out replicas locally and report the timings"""
+    from mlops_sdk.deployment import DeploymentError, LocalRuntime
+    
+    if environment == 'production':
+        click.secho("  WARNING: Deploying to PRODUCTION environment!", fg='red', bold=True)
+        if not click.confirm('Do you want to proceed with this deployment?'):
+            click.secho(" Deployment cancelled", fg='red')
+            return
+    
+    click.echo()
+    try:
+        deployment = LocalRuntime().apply(model_name, version, environment, replicas, port=port, strategy=strategy,
+                                          ready_timeout=timeout, progress=lambda message: click.echo(f"   {message}"))
+    except DeploymentError as e:
+        raise click.ClickException(str(e))
+    
+    click.echo()
+    click.secho(f" Deployed {model_name}:{deployment['version']} to {environment}", fg='green', bold=True)
+    click.echo(f"   Endpoint:   {deployment['url']}/predict")
+    click.echo(f"   Replicas:   {len(deployment['replicas'])} "
+               f"(ready in {deployment['rollout_seconds']:.2f}s)")
+    for replica in deployment['replicas']:
+        click.echo(f"     - port {replica['port']}  pid {replica['pid']}  ready in {replica['ready_seconds']:.2f}s")
+    click.echo()
+    click.echo(f"   Monitor: mlops status -m {model_name} -e {environment}")
+    click.echo(f"   Stop:    mlops stop -m {model_name} -e {environment}")
+    click.echo()
+
+
+_HEALTH_COLORS = {'healthy': 'green', 'degraded': 'yellow', 'down': 'red'}
+
+
 @cli.command()
 @click.option('--model-name', '-m', help='Filter by model name')
 def list(model_name):
     """List all deployed models"""
-    click.secho("\n  Deployed Models\n", fg='cyan', bold=True)
+    from mlops_sdk.deployment import LocalRuntime
     
-    # Mock data
-    models = [
-        {"name": "fraud-detector", "version": "1.2.3", "env": "production", "status": "healthy"},
-        {"name": "recommendation-engine", "version": "2.0.1", "env": "production", "status": "healthy"},
-        {"name": "sentiment-analyzer", "version": "1.0.5", "env": "staging", "status": "degraded"},
-    ]
+    click.secho("\n  Deployed Models\n", fg='cyan', bold=True)
     
+    runtime = LocalRuntime()
+    deployments = runtime.deployments()
     if model_name:
-        models = [m for m in models if model_name.lower() in m["name"].lower()]
+        deployments = [d for d in deployments if model_name.lower() in d["model_name"].lower()]
+    
+    if not deployments:
+        click.echo("  No local deployments (start one with: mlops deploy -m <model> --apply)")
     
-    for model in models:
-        status_color = 'green' if model['status'] == 'healthy' else 'yellow'
-        click.echo(f"  • {model['name']} (v{model['version']}) - {model['env']}")
-        click.secho(f"    Status: {model['status']}", fg=status_color)
+    for deployment in deployments:
+        current = runtime.status(deployment["model_name"], deployment["environment"])
+        click.echo(f"  • {current['model_name']} (v{current['version']}) - {current['environment']}  {current['url']}")
+        click.secho(f"    Status: {current['health']} ({current['ready']}/{len(current['replicas'])} replicas ready)",
+                    fg=_HEALTH_COLORS[current['health']])
     
     click.echo()
 
 
+def _find_deployment(runtime, model_name, environment):
+    """The (model, environment) deployment to report on; the environment may be omitted if there is only one"""
+    if environment:
+        return environment
+    environments = [d["environment"] for d in runtime.deployments() if d["model_name"] == model_name]
+    if not environments:
+        raise click.ClickException(f"{model_name} is not deployed (start it with: mlops deploy -m {model_name} --apply)")
+    if len(environments) > 1:
+        raise click.ClickException(f"{model_name} is deployed to {', '.join(environments)}; choose one with -e")
+    return environments[0]
+
+
 @cli.command()
 @click.option('--model-name', '-m', required=True, help='Name of the model')
-def status(model_name):
+@click.option('--environment', '-e', type=click.Choice(['dev', 'staging', 'production']),
+              help='Deployment environment (needed when the model is deployed to several)')
+def status(model_name, environment):
     """Check deployment status of a model"""
+    from mlops_sdk.deployment import LocalRuntime
+    
+    runtime = LocalRuntime()
+    environment = _find_deployment(runtime, model_name, environment)
+    current = runtime.status(model_name, environment)
+    if current is None:
+        raise click.ClickException(f"{model_name} is not deployed to {environment}")
+    
     click.secho(f"\n  Status for {model_name}\n", fg='cyan', bold=True)
     
-    click.echo("  Environment:  production")
-    click.echo("  Version:      1.2.3")
-    click.echo("  Replicas:     2/2 ready")
-    click.secho("  Health:       ✓ Healthy", fg='green')
-    click.echo("  Uptime:       5d 12h 34m")
-    click.echo("\n  Metrics (last 1h):")
-    click.echo("    Requests:   145,234")
-    click.echo("    Latency:    45ms (p95)")
-    click.echo("    Errors:     0.02%")
+    replicas = current['replicas']
+    click.echo(f"  Environment:  {environment}")
+    click.echo(f"  Version:      {current['version']}")
+    click.echo(f"  Endpoint:     {current['url']}  ({current['balancer']['strategy']})")
+    click.echo(f"  Replicas:     {current['ready']}/{len(replicas)} ready")
+    click.secho(f"  Health:       {current['health']}", fg=_HEALTH_COLORS[current['health']])
+    click.echo(f"  Deployed at:  {current['deployed_at']} (rollout {current['rollout_seconds']:.2f}s)")
+    
+    predictions = sum(replica.get('predictions', 0) for replica in replicas)
+    errors = sum(replica.get('errors', 0) for replica in replicas)
+    p95 = [replica['balancer']['latency_ms_p95'] for replica in replicas
+           if replica.get('balancer') and 'latency_ms_p95' in replica['balancer']]
+    click.echo("\n  Metrics (since the replicas started):")
+    click.echo(f"    Predictions: {predictions:,}")
+    click.echo(f"    Latency:     {max(p95):.1f}ms (p95, slowest replica)" if p95 else "    Latency:     -")
+    click.echo(f"    Errors:      {errors / (predictions + errors):.2%}" if predictions + errors else "    Errors:      -")
+    
+    click.echo("\n  Replicas:")
+    for replica in replicas:
+        state = 'healthy' if replica['healthy'] else ('unhealthy' if replica['alive'] else 'down')
+        line = f"    - port {replica['port']}  pid {replica['pid']}  {state:<9}"
+        if replica['healthy']:
+            line += f"  uptime {replica.get('uptime')}  predictions {replica.get('predictions', 0):,}"
+            if 'latency_ms_mean' in replica:
+                line += f"  mean {replica['latency_ms_mean']:.1f}ms"
+        balanced = replica.get('balancer')
+        if balanced:
+            line += f"  in flight {balanced['in_flight']}"
+        click.secho(line, fg='green' if replica['healthy'] else 'red')
+        if 'max_drift_psi' in replica:
+            drift = replica['max_drift_psi']
+            click.echo(f"      highest drift: {drift['feature']} (PSI {drift['psi']})")
+    
+    if current.get('traffic'):
+        _echo_traffic(current['version'], current['traffic'])
     click.echo()
 
 
+def _echo_traffic(primary_version, traffic):
+    """Print the traffic split and how the candidate compares with the deployed version"""
+    candidate_version = traffic['candidate_version']
+    share = f"canary, {traffic['weight']:.0%} of requests" if traffic['mode'] == 'canary' else "shadow"
+    click.echo(f"\n  Candidate:    {candidate_version} ({share})")
+    if 'versions' not in traffic:
+        click.echo("    No statistics (replicas not reachable)")
+        return
+    
+    for version in (primary_version, candidate_version):
+        stats = traffic['versions'].get(version)
+        if not stats:
+            continue
+        # A shadow candidate answers no requests; show its background scorings instead
+        background = stats.get('background', {})
+        shown, kind = (background, "in background") if not stats['requests'] and background else (stats, "served")
+        line = f"    {version:<12} {shown.get('requests', 0):>9,} {kind}"
+        if 'latency_ms_mean' in shown:
+            line += f"  mean {shown['latency_ms_mean']:.1f}ms"
+        if 'latency_ms_p95' in shown:
+            line += f"  p95 {shown['latency_ms_p95']:.1f}ms"
+        if shown.get('errors'):
+            line += f"  errors {shown['errors']:,}"
+        click.echo(line)
+    
+    if 'latency_change' in traffic:
+        change = traffic['latency_change']
+        verdict = f"{-change:.1%} faster" if change < 0 else f"{change:.1%} slower"
+        click.secho(f"    Latency:     candidate is {verdict} on average", fg='green' if change <= 0 else 'yellow')
+    comparison = traffic['comparison']
+    if comparison['comparisons']:
+        click.secho(f"    Agreement:   {comparison['agreement']:.2%} of {comparison['comparisons']:,} compared "
+                    f"predictions (mean risk score difference {comparison['score_difference_mean']:.4f})",
+                    fg='green' if comparison['disagreements'] == 0 else 'yellow')
+    else:
+        click.echo("    Agreement:   - (no predictions compared yet)")
+    if comparison['dropped']:
+        click.echo(f"    Skipped:     {comparison['dropped']:,} comparisons (background queue full)")
+
+
+@cli.command()
+@click.option('--model-name', '-m', required=True, help='Name of the model')
+@click.option('--environment', '-e', type=click.Choice(['dev', 'staging', 'production']),
+              help='Deployment environment (needed when the model is deployed to several)')
+@click.option('--candidate', '-c', default='latest', help='Candidate model version')
+@click.option('--mode', default='canary', type=click.Choice(['canary', 'shadow', 'off']),
+              help='canary: the candidate answers a share of requests; shadow: it sees copies only; off: stop')
+@click.option('--weight', '-w', default=0.1, type=click.FloatRange(0, 1),
+              help='Share of requests the candidate answers in canary mode')
+def traffic(model_name, environment, candidate, mode, weight):
+    """
+    Split a deployment's traffic with a candidate model version
+    
+    The candidate is loaded next to the deployed version on every replica.
+    Requests it does not answer are still compared in the background, so
+    `mlops status` shows its latency and agreement with the deployed version.
+    
+    Example:
+        mlops traffic -m my_model -c 1.3.0 --mode shadow
+        mlops traffic -m my_model -c 1.3.0 --weight 0.05
+        mlops traffic -m my_model --mode off
+    """
+    from mlops_sdk.deployment import DeploymentError, LocalRuntime
+    
+    runtime = LocalRuntime()
+    environment = _find_deployment(runtime, model_name, environment)
+    try:
+        deployment = runtime.set_traffic(model_name, environment, candidate, mode, weight)
+    except DeploymentError as e:
+        raise click.ClickException(str(e))
+    
+    split = deployment.get('traffic')
+    if split is None:
+        click.secho(f" All traffic for {model_name} in {environment} goes to {deployment['version']}", fg='green')
+    elif split['mode'] == 'canary':
+        click.secho(f" {split['weight']:.0%} of {model_name} requests in {environment} now go to "
+                    f"{split['candidate_version']}", fg='green')
+    else:
+        click.secho(f" {split['candidate_version']} now shadows {deployment['version']} in {environment}", fg='green')
+    if split is not None:
+        click.echo(f"   Compare: mlops status -m {model_name} -e {environment}")
+
+
+@cli.command()
+@click.option('--model-name', '-m', required=True, help='Name of the model')
+@click.option('--environment', '-e', type=click.Choice(['dev', 'staging', 'production']),
+              help='Deployment environment (needed when the model is deployed to several)')
+def stop(model_name, environment):
+    """Stop a local deployment's replicas and load balancer"""
+    from mlops_sdk.deployment import LocalRuntime
+    
+    runtime = LocalRuntime()
+    environment = _find_deployment(runtime, model_name, environment)
+    if not runtime.stop(model_name, environment):
+        raise click.ClickException(f"{model_name} is not deployed to {environment}")
+    click.secho(f" Stopped {model_name} in {environment}", fg='green')
+
+
+@cli.command(name='export')
+@click.argument('directory')
+@click.option('--id', 'experiment_ids', multiple=True, help='Experiment to export (repeatable; default: all)')
+@click.option('--param', 'param_filters', multiple=True, help='Parameter filter, e.g. learning_rate<0.01 (repeatable)')
+@click.option('--limit', type=int, help='Export only the newest matching experiments')
+@click.option('--format', 'file_format', default='parquet', type=click.Choice(['parquet', 'arrow']),
+              help='File format (arrow: Arrow IPC stream)')
+def export_runs(directory, experiment_ids, param_filters, limit, file_format):
+    """
+    Export experiments, parameters and metrics to columnar files in DIRECTORY
+    
+    Example:
+        mlops export runs/ --param optimizer=adam
+        mlops import runs/ --registry http://other-registry:5000
+    """
+    from mlops_sdk.archive import export_experiments
+    
+    try:
+        result = export_experiments(directory, experiment_ids=[*experiment_ids] or None,
+                                    param_filters=[*param_filters], limit=limit, file_format=file_format)
+    except (RuntimeError, ValueError) as e:
+        raise click.ClickException(str(e))
+    click.secho(f" Exported {result['experiments']:,} experiments ({result['bytes'] / 1e6:.1f} MB)", fg='green')
+    for table, path in result['files'].items():
+        click.echo(f"   {table + ':':<12} {path}")
+
+
+@cli.command(name='import')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--registry', help='Registry URL (default: MLOPS_BACKEND_URL)')
+@click.option('--chunk-rows', default=100_000, type=click.IntRange(min=1),
+              help='Rows per upload (one transaction each)')
+def import_runs(directory, registry, chunk_rows):
+    """
+    Import a directory written by `mlops export` into the registry
+    
+    An interrupted import is resumed by running it again with the same --chunk-rows.
+    """
+    from mlops_sdk.archive import import_experiments
+    from mlops_sdk.client import MLOpsClient
+    
+    try:
+        counts = import_experiments(directory, client=MLOpsClient(registry), chunk_rows=chunk_rows)
+    except (ImportError, OSError, RuntimeError) as e:
+        raise click.ClickException(str(e))
+    click.secho(f" Imported {counts['experiments']:,} experiments", fg='green')
+    click.echo(f"   Parameters: {counts['parameters']:,}")
+    click.echo(f"   Metrics:    {counts['metrics']:,}")
+    if counts['skipped']:
+        click.echo(f"   Skipped:    {counts['skipped']:,} experiments already in the registry")
+
+
 def _calculate_limit(request_value):
     """Calculate resource limit (2x the request)"""
     if request_value.endswith('m'):
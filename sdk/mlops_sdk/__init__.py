@@ -1,7 +1,52 @@
-"""MLOps SDK - Track experiments and deploy models"""
+"""MLOps SDK - Track experiments and deploy models
 
-from .tracking import track_experiment, log_metric, log_param, set_experiment
-from .client import MLOpsClient
+Submodules are imported on first attribute access, so `import mlops_sdk`
+stays cheap for short-lived scripts and CLI invocations.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
 
 __version__ = "0.1.0"
-__all__ = ["track_experiment", "log_metric", "log_param", "set_experiment", "MLOpsClient"]
+__all__ = ["track_experiment", "log_metric", "log_param", "set_experiment", "flush_metrics", "span", "Profiler",
+           "ResourceSampler", "build_reference_profile", "build_feature_spec", "export_experiments",
+           "import_experiments", "MLOpsClient"]
+
+# Public name -> submodule defining it
+_LAZY_ATTRIBUTES = {
+    "track_experiment": "tracking",
+    "log_metric": "tracking",
+    "log_param": "tracking",
+    "set_experiment": "tracking",
+    "flush_metrics": "tracking",
+    "span": "profiling",
+    "Profiler": "profiling",
+    "ResourceSampler": "resources",
+    "build_reference_profile": "drift",
+    "build_feature_spec": "features",
+    "export_experiments": "archive",
+    "import_experiments": "archive",
+    "MLOpsClient": "client",
+}
+
+if TYPE_CHECKING:
+    from .tracking import track_experiment, log_metric, log_param, set_experiment, flush_metrics
+    from .profiling import span, Profiler
+    from .resources import ResourceSampler
+    from .drift import build_reference_profile
+    from .features import build_feature_spec
+    from .archive import export_experiments, import_experiments
+    from .client import MLOpsClient
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,184 @@
+"""Bulk export and import of experiments as columnar files
+
+Usage:
+    export_experiments("runs/", param_filters=["optimizer=adam"])
+    import_experiments("runs/", client=MLOpsClient("http://other-registry:5000"))
+
+An export is a directory with one file per table (experiments, parameters,
+metrics), each a Parquet file or an Arrow IPC stream (.arrows) streamed to
+disk straight from the registry, so millions of metric points never sit in
+memory at once. The files are plain Parquet/Arrow and can be read directly
+with pandas, polars or DuckDB.
+
+An import reads the files back in chunks of chunk_rows and uploads each
+chunk as one request that the registry inserts in one transaction.
+Experiments go first, skipping those the target registry already has, then
+parameters and metrics. Each chunk of those says where its first
+experiment's rows start, and the registry skips rows an experiment already
+holds, so an interrupted import is resumed by running it again. Runs
+created while an export selected by filter is in progress may be missing
+from some of its files; importing drops parameter and metric rows whose
+experiment is not in the export.
+
+Importing requires pyarrow (pip install "mlops-sdk[columnar]").
+"""
+
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .client import MLOpsClient
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+TABLES = ("experiments", "parameters", "metrics")
+
+ARROW_STREAM_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+# format name -> file extension
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrows"}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError('Columnar import requires pyarrow (pip install "mlops-sdk[columnar]")')
+
+
+def export_experiments(directory: str, experiment_ids: Optional[List[str]] = None,
+                       param_filters: Optional[List[str]] = None, limit: Optional[int] = None,
+                       file_format: str = "parquet", client: Optional[MLOpsClient] = None) -> Dict[str, Any]:
+    """
+    Export experiments with their parameters and metrics to directory, one file per table
+
+    Selects experiment_ids, or else every experiment matching param_filters
+    (newest first, at most limit). Returns {"experiments": N, "files":
+    {table: path}, "bytes": total}; raises RuntimeError if a download fails.
+    """
+    if file_format not in EXTENSIONS:
+        raise ValueError(f"file_format must be one of {', '.join(EXTENSIONS)}")
+    client = client or MLOpsClient()
+    os.makedirs(directory, exist_ok=True)
+
+    files: Dict[str, str] = {}
+    total = 0
+    count = 0
+    for table in TABLES:
+        path = os.path.join(directory, f"{table}.{EXTENSIONS[file_format]}")
+        result = client.export_table(table, path, experiment_ids=experiment_ids, param_filters=param_filters,
+                                     limit=limit, file_format=file_format)
+        if "error" in result:
+            raise RuntimeError(f"Exporting {table} failed: {result['error']}")
+        files[table] = path
+        total += result["bytes"]
+        if table == "experiments":
+            count = result["experiments"]
+    return {"experiments": count, "files": files, "bytes": total}
+
+
+def _find_file(directory: str, table: str) -> Optional[str]:
+    for extension in EXTENSIONS.values():
+        path = os.path.join(directory, f"{table}.{extension}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _read_batches(path: str, chunk_rows: int) -> Iterator["pa.RecordBatch"]:
+    """Record batches of a Parquet file or Arrow IPC stream, never holding more than a batch"""
+    if path.endswith(".parquet"):
+        yield from pq.ParquetFile(path).iter_batches(batch_size=chunk_rows)
+        return
+    with pa.memory_map(path) as source:
+        yield from pa.ipc.open_stream(source)
+
+
+def _chunks(batches: Iterator["pa.RecordBatch"], chunk_rows: int) -> Iterator[List["pa.RecordBatch"]]:
+    """Record batches grouped into chunks of about chunk_rows rows"""
+    pending: List["pa.RecordBatch"] = []
+    rows = 0
+    for batch in batches:
+        pending.append(batch)
+        rows += batch.num_rows
+        if rows >= chunk_rows:
+            yield pending
+            pending, rows = [], 0
+    if rows:
+        yield pending
+
+
+def _encode(batches: List["pa.RecordBatch"]) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batches[0].schema, options=pa.ipc.IpcWriteOptions(compression="zstd")) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def _experiment_sizes(table: str, chunk: "pa.Table") -> List[Tuple[str, int]]:
+    """(experiment_id, rows) per experiment of a chunk, in order; metric rows count their samples"""
+    ids = chunk.column("experiment_id").to_pylist()
+    sizes = ([samples or 1 for samples in chunk.column("samples").to_pylist()] if table == "metrics"
+             else [1] * len(ids))
+    runs: List[Tuple[str, int]] = []
+    for experiment_id, size in zip(ids, sizes):
+        if runs and runs[-1][0] == experiment_id:
+            runs[-1] = (experiment_id, runs[-1][1] + size)
+        else:
+            runs.append((experiment_id, size))
+    return runs
+
+
+def import_experiments(directory: str, client: Optional[MLOpsClient] = None,
+                       chunk_rows: int = 100_000) -> Dict[str, int]:
+    """
+    Import an export directory into the registry behind client
+
+    Returns counts: {"experiments", "skipped", "parameters", "metrics"} of
+    rows inserted (and experiments already present); raises RuntimeError if
+    an upload fails. Chunks uploaded before it stay imported, and running the
+    import again with the same chunk_rows uploads only what the registry is
+    still missing.
+    """
+    _require_pyarrow()
+    client = client or MLOpsClient()
+    path = _find_file(directory, "experiments")
+    if path is None:
+        raise FileNotFoundError(f"No experiments.parquet or experiments.arrows in {directory}")
+
+    counts = {"experiments": 0, "skipped": 0, "parameters": 0, "metrics": 0}
+    exported: List[str] = []
+    for batches in _chunks(_read_batches(path, chunk_rows), chunk_rows):
+        result = client.import_table("experiments", _encode(batches), ARROW_STREAM_CONTENT_TYPE)
+        if "error" in result:
+            raise RuntimeError(f"Importing experiments failed: {result['error']}")
+        counts["experiments"] += result["count"]
+        counts["skipped"] += result["skipped"]
+        for batch in batches:
+            exported += batch.column("experiment_id").to_pylist()
+    if not exported:
+        return counts
+
+    # Experiments already present are included: the registry skips the rows they hold, and
+    # finishes those an interrupted import left incomplete
+    keep = pa.array(exported, type=pa.string())
+    for table in ("parameters", "metrics"):
+        path = _find_file(directory, table)
+        if path is None:
+            continue
+        batches = (batch.filter(pc.is_in(batch.column("experiment_id"), value_set=keep))
+                   for batch in _read_batches(path, chunk_rows))
+        # Experiment the previous chunk ended with, and its rows up to there
+        previous: Tuple[Optional[str], int] = (None, 0)
+        for chunk in _chunks((batch for batch in batches if batch.num_rows), chunk_rows):
+            sizes = _experiment_sizes(table, pa.Table.from_batches(chunk))
+            offset = previous[1] if sizes[0][0] == previous[0] else 0
+            result = client.import_table(table, _encode(chunk), ARROW_STREAM_CONTENT_TYPE, offset=offset)
+            if "error" in result:
+                raise RuntimeError(f"Importing {table} failed: {result['error']}")
+            counts[table] += result["count"]
+            previous = (sizes[-1][0], sizes[-1][1] + (offset if len(sizes) == 1 else 0))
+    return counts
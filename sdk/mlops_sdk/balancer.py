@@ -0,0 +1,305 @@
+"""Local HTTP load balancer in front of model serving replicas
+
+Usage:
+    python -m mlops_sdk.balancer --port 8000 --backend 127.0.0.1:9001 --backend 127.0.0.1:9002
+    python -m mlops_sdk.balancer --port 8000 --strategy least-connections --backend ...
+
+Requests are forwarded to a healthy backend chosen round-robin or by
+fewest requests in flight, over kept-alive connections. Backends are
+probed on /health every few seconds and skipped while down (or when a
+request to them fails). Admin endpoints, under /_lb/:
+
+    GET /_lb/stats      per-backend requests, errors, in flight, latency
+    PUT /_lb/backends   {"backends": ["host:port", ...]} replaces the set;
+                        requests already in flight finish on the old ones
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = "round-robin"
+LEAST_CONNECTIONS = "least-connections"
+STRATEGIES = (ROUND_ROBIN, LEAST_CONNECTIONS)
+
+# Hop-by-hop headers are not forwarded (RFC 7230 section 6.1)
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+              "transfer-encoding", "upgrade"}
+
+# Recent latencies kept per backend for percentiles
+LATENCY_WINDOW = 1024
+
+
+class Backend:
+    """One replica: its idle connections, health and request statistics"""
+
+    def __init__(self, address: str, timeout: float = 60):
+        self.address = address
+        host, _, port = address.rpartition(":")
+        self.host = host or "127.0.0.1"
+        self.port = int(port)
+        self.timeout = timeout
+        self.healthy = True
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.in_flight += 1
+            if self._idle:
+                return self._idle.pop()
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def release(self, conn: Optional[http.client.HTTPConnection], seconds: float, failed: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            if failed:
+                self.errors += 1
+            else:
+                self.latencies.append(seconds)
+            if conn is not None and not failed:
+                self._idle.append(conn)
+        if failed and conn is not None:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            stats = {
+                "address": self.address,
+                "healthy": self.healthy,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "errors": self.errors,
+            }
+        if latencies:
+            stats["latency_ms_mean"] = round(sum(latencies) / len(latencies) * 1000, 2)
+            stats["latency_ms_p95"] = round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000, 2)
+        return stats
+
+
+class LoadBalancer:
+    """Backend selection and health probing"""
+
+    def __init__(self, backends: List[str], strategy: str = ROUND_ROBIN, health_interval: float = 2.0):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {', '.join(STRATEGIES)}")
+        self.strategy = strategy
+        self.health_interval = health_interval
+        self.backends: List[Backend] = [Backend(address) for address in backends]
+        self._turn = itertools.count()
+        self._stop = threading.Event()
+        self._prober = threading.Thread(target=self._probe_loop, name="balancer-health", daemon=True)
+
+    def start(self):
+        self._prober.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def set_backends(self, addresses: List[str]):
+        """Switch to a new set of backends, keeping the statistics of those still present"""
+        current = {backend.address: backend for backend in self.backends}
+        self.backends = [current.get(address) or Backend(address) for address in addresses]
+        for address, backend in current.items():
+            if address not in addresses:
+                backend.close()
+
+    def choose(self) -> Backend:
+        backends = self.backends
+        candidates = [backend for backend in backends if backend.healthy] or backends
+        if not candidates:
+            raise LookupError("no backends configured")
+        start = next(self._turn) % len(candidates)
+        rotated = candidates[start:] + candidates[:start]
+        if self.strategy == LEAST_CONNECTIONS:
+            return min(rotated, key=lambda backend: backend.in_flight)
+        return rotated[0]
+
+    def _probe(self, backend: Backend):
+        conn = http.client.HTTPConnection(backend.host, backend.port, timeout=2)
+        try:
+            conn.request("GET", "/health")
+            healthy = conn.getresponse().status == 200
+        except OSError:
+            healthy = False
+        finally:
+            conn.close()
+        if healthy != backend.healthy:
+            logger.info(f"Backend {backend.address} is {'up' if healthy else 'down'}")
+        backend.healthy = healthy
+
+    def _probe_loop(self):
+        while not self._stop.wait(self.health_interval):
+            for backend in self.backends:
+                self._probe(backend)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"strategy": self.strategy, "backends": [backend.stats() for backend in self.backends]}
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    balancer: LoadBalancer
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> Optional[bytes]:
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            return None
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _admin(self, body: bytes):
+        if self.command == "GET" and self.path == "/_lb/stats":
+            return self._send_json(200, self.balancer.stats())
+        if self.command == "PUT" and self.path == "/_lb/backends":
+            try:
+                backends = json.loads(body)["backends"]
+                self.balancer.set_backends([str(address) for address in backends])
+            except (ValueError, KeyError, TypeError) as e:
+                return self._send_json(400, {"error": f"invalid backends: {e}"})
+            return self._send_json(200, self.balancer.stats())
+        return self._send_json(404, {"error": "unknown admin endpoint"})
+
+    def _proxy(self):
+        body = self._read_body()
+        if body is None:
+            self.close_connection = True
+            return self._send_json(411, {"error": "chunked request bodies are not supported; send Content-Length"})
+        if self.path.startswith("/_lb/"):
+            return self._admin(body)
+
+        headers = {name: value for name, value in self.headers.items() if name.lower() not in HOP_BY_HOP}
+        headers["X-Forwarded-For"] = self.client_address[0]
+        # One retry when a connection fails before any response (a kept-alive
+        # connection the backend closed, or a replica that went away)
+        for attempt in range(2):
+            try:
+                backend = self.balancer.choose()
+            except LookupError as e:
+                return self._send_json(503, {"error": str(e)})
+            conn = backend.acquire()
+            reused = conn.sock is not None
+            started = time.perf_counter()
+            try:
+                conn.request(self.command, self.path, body=body, headers=headers)
+                response = conn.getresponse()
+            except OSError as e:
+                backend.release(conn, 0, failed=True)
+                if not reused:
+                    backend.healthy = False
+                    logger.warning(f"Backend {backend.address} failed: {e}")
+                continue
+            try:
+                self._relay(response)
+            except OSError:
+                backend.release(conn, time.perf_counter() - started, failed=True)
+                self.close_connection = True
+                return
+            reusable = not response.will_close
+            backend.release(conn if reusable else None, time.perf_counter() - started, failed=False)
+            if not reusable:
+                conn.close()
+            return
+        self._send_json(502, {"error": "no backend answered"})
+
+    def _relay(self, response: http.client.HTTPResponse):
+        """Copy a backend response to the client, streaming bodies without a length as chunks"""
+        self.send_response_only(response.status, response.reason)
+        length = response.getheader("Content-Length")
+        bodyless = self.command == "HEAD" or response.status in (204, 304)
+        for name, value in response.getheaders():
+            if name.lower() not in HOP_BY_HOP:
+                self.send_header(name, value)
+        if length is None and not bodyless:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        if bodyless:
+            response.read()
+            return
+        if length is not None:
+            remaining = int(length)
+            while remaining > 0:
+                block = response.read(min(remaining, 1 << 16))
+                if not block:
+                    break
+                self.wfile.write(block)
+                remaining -= len(block)
+            return
+        while True:
+            block = response.read1(1 << 16)
+            if not block:
+                break
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(block), block))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_HEAD = do_OPTIONS = _proxy
+
+
+def serve(port: int, backends: List[str], strategy: str = ROUND_ROBIN, host: str = "127.0.0.1",
+          health_interval: float = 2.0) -> ThreadingHTTPServer:
+    """Start a balancer in a background thread; returns the server (call shutdown() to stop)"""
+    balancer = LoadBalancer(backends, strategy, health_interval)
+    handler = type("ProxyHandler", (_ProxyHandler,), {"balancer": balancer})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.balancer = balancer
+    balancer.start()
+    threading.Thread(target=server.serve_forever, name="balancer", daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local load balancer for model serving replicas")
+    parser.add_argument("--port", type=int, required=True, help="Port to listen on")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--backend", action="append", default=[], help="Replica host:port (repeatable)")
+    parser.add_argument("--strategy", choices=STRATEGIES, default=ROUND_ROBIN, help="Backend selection")
+    parser.add_argument("--health-interval", type=float, default=2.0, help="Seconds between health probes")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    server = serve(args.port, args.backend, args.strategy, args.host, args.health_interval)
+    logger.info(f"Balancing {len(args.backend)} backends on {args.host}:{args.port} ({args.strategy})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
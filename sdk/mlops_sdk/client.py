@@ -1,20 +1,34 @@
 """HTTP Client for communicating with MLOps backend"""
 
 import os
+import struct
 import requests
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import logging
 
+from .wire import METRIC_FRAME_CONTENT_TYPE, encode_metric_frame
+
 logger = logging.getLogger(__name__)
 
 
 class MLOpsClient:
     """Client for interacting with MLOps backend API"""
     
-    def __init__(self, base_url: Optional[str] = None):
+    EXPERIMENT_CACHE_SIZE = 128
+    
+    # Metric batches of at least this many points are zlib-compressed
+    COMPRESS_MIN_POINTS = 1000
+    
+    def __init__(self, base_url: Optional[str] = None, metric_format: Optional[str] = None):
         self.base_url = base_url or os.getenv("MLOPS_BACKEND_URL", "http://localhost:5000")
+        # "binary" (packed metric frames, falling back to JSON if the backend
+        # rejects them) or "json"
+        self.metric_format = metric_format or os.getenv("MLOPS_METRIC_FORMAT", "binary")
         self.session = requests.Session()
         self.session.headers.update({"Content-Type": "application/json"})
+        # Last (etag, document) per experiment, for conditional re-fetches
+        self._experiment_cache: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
     
     def track_experiment(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -55,15 +69,191 @@ class MLOpsClient:
             logger.error(f"Error logging metric: {e}")
             return {"error": str(e)}
     
+    def log_metrics(self, experiment_id: str, points: Sequence[Tuple[str, float, Optional[int]]]):
+        """Log a batch of (key, value, step) points for an experiment in one request"""
+        url = f"{self.base_url}/api/experiments/{experiment_id}/metrics/batch"
+        try:
+            response = None
+            frame = None
+            if self.metric_format == "binary":
+                try:
+                    frame = encode_metric_frame(points, compress=len(points) >= self.COMPRESS_MIN_POINTS)
+                except (struct.error, TypeError, ValueError, OverflowError) as e:
+                    logger.warning(f"Could not encode metric frame ({e}); sending the batch as JSON")
+            if frame is not None:
+                response = self.session.post(
+                    url,
+                    data=frame,
+                    headers={"Content-Type": METRIC_FRAME_CONTENT_TYPE},
+                    timeout=10
+                )
+                if response.status_code == 415:
+                    logger.info("Backend does not accept binary metric frames; using JSON")
+                    self.metric_format = "json"
+                    response = None
+            if response is None:
+                response = self.session.post(
+                    url,
+                    json={"metrics": [{"key": key, "value": value, "step": step} for key, value, step in points]},
+                    timeout=10
+                )
+            response.raise_for_status()
+            return response.json()
+        except (requests.exceptions.RequestException, TypeError, ValueError) as e:
+            logger.error(f"Error logging metrics: {e}")
+            return {"error": str(e)}
+    
+    def log_profile(self, experiment_id: str, profile: Dict[str, Any]):
+        """Attach timing spans and profiler samples to an experiment"""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/experiments/{experiment_id}/profile",
+                json=profile,
+                timeout=10
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error logging profile: {e}")
+            return {"error": str(e)}
+    
+    def register_model_version(self, model_name: str, version: str, experiment_id: Optional[str] = None,
+                               metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Register a model version (or update its experiment and metadata)"""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/models/{model_name}/versions",
+                json={"version": version, "experiment_id": experiment_id, "metadata": metadata},
+                timeout=10
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error registering model version: {e}")
+            return {"error": str(e)}
+    
+    def set_reference_profile(self, model_name: str, version: str, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Store the feature profile serving measures input drift against (see drift.build_reference_profile)"""
+        try:
+            response = self.session.put(
+                f"{self.base_url}/api/models/{model_name}/versions/{version}/reference",
+                json=profile,
+                timeout=30
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error saving reference profile: {e}")
+            return {"error": str(e)}
+    
+    def set_feature_spec(self, model_name: str, version: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Store the feature-transform spec serving compiles for a version (see features.build_feature_spec)"""
+        current = self.get_model_version(model_name, version)
+        if "error" in current:
+            return current
+        metadata = dict(current.get("metadata") or {}, feature_spec=spec)
+        return self.register_model_version(model_name, version, metadata=metadata)
+    
+    def get_model_version(self, model_name: str, version: str) -> Dict[str, Any]:
+        """Retrieve a registered model version ({"error": ...} if it is not registered)"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/models/{model_name}/versions/{version}", timeout=5)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error getting model version: {e}")
+            return {"error": str(e)}
+
+    def list_model_versions(self, model_name: str) -> Dict[str, Any]:
+        """Registered versions of a model, oldest first"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/models/{model_name}/versions", timeout=5)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error listing model versions: {e}")
+            return {"error": str(e)}
+
+    def export_table(self, table: str, path: str, experiment_ids: Optional[List[str]] = None,
+                     param_filters: Optional[List[str]] = None, limit: Optional[int] = None,
+                     file_format: str = "parquet") -> Dict[str, Any]:
+        """
+        Download the registry's columnar export of one table to path, streaming it to disk
+        
+        Args:
+            table: "experiments", "parameters" or "metrics"
+            experiment_ids: Experiments to export; without them, all matching param_filters
+            param_filters: Parameter filters such as "learning_rate<0.01"
+            limit: Export only the newest matching experiments
+            file_format: "parquet" or "arrow" (Arrow IPC stream)
+        
+        Returns:
+            {"path", "bytes", "experiments"} or {"error": ...}
+        """
+        params = [("format", file_format)] + [("id", experiment_id) for experiment_id in experiment_ids or []]
+        params += [("param", expr) for expr in param_filters or []]
+        if limit is not None:
+            params.append(("limit", str(limit)))
+        try:
+            with self.session.get(f"{self.base_url}/api/export/{table}", params=params, stream=True,
+                                  timeout=(10, 600)) as response:
+                response.raise_for_status()
+                size = 0
+                with open(path, "wb") as fh:
+                    for block in response.iter_content(chunk_size=1 << 20):
+                        fh.write(block)
+                        size += len(block)
+                return {"path": path, "bytes": size, "experiments": int(response.headers.get("X-Experiment-Count", 0))}
+        except (requests.exceptions.RequestException, OSError) as e:
+            logger.error(f"Error exporting {table}: {e}")
+            return {"error": str(e)}
+    
+    def import_table(self, table: str, body: bytes, content_type: str, offset: int = 0) -> Dict[str, Any]:
+        """
+        Upload one Arrow IPC stream or Parquet chunk of an exported table (inserted in one transaction)
+        
+        For parameters and metrics, offset is how many rows (metric samples) of the chunk's
+        first experiment earlier chunks uploaded; rows the registry already holds are skipped.
+        """
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/import/{table}",
+                params={"offset": offset} if offset else None,
+                data=body,
+                headers={"Content-Type": content_type},
+                timeout=600
+            )
+            if response.status_code in (400, 413):
+                # Invalid rows, rows that would overlap what the registry holds, or a chunk too large
+                return {"error": response.json().get("error", response.reason)}
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error importing {table}: {e}")
+            return {"error": str(e)}
+    
     def get_experiment(self, experiment_id: str) -> Dict[str, Any]:
-        """Retrieve experiment details"""
+        """Retrieve experiment details (revalidated with ETags when fetched before)"""
+        cached = self._experiment_cache.get(experiment_id)
+        headers = {"If-None-Match": cached[0]} if cached else {}
         try:
             response = self.session.get(
                 f"{self.base_url}/api/experiments/{experiment_id}",
+                headers=headers,
                 timeout=5
             )
+            if response.status_code == 304 and cached:
+                self._experiment_cache.move_to_end(experiment_id)
+                return cached[1]
             response.raise_for_status()
-            return response.json()
+            experiment = response.json()
+            etag = response.headers.get("ETag")
+            if etag:
+                self._experiment_cache[experiment_id] = (etag, experiment)
+                self._experiment_cache.move_to_end(experiment_id)
+                if len(self._experiment_cache) > self.EXPERIMENT_CACHE_SIZE:
+                    self._experiment_cache.popitem(last=False)
+            return experiment
         except requests.exceptions.RequestException as e:
             logger.error(f"Error getting experiment: {e}")
             return {"error": str(e)}
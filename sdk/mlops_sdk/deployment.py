@@ -0,0 +1,553 @@
+"""Local deployments: model serving replicas behind a load balancer
+
+Usage:
+    runtime = LocalRuntime()
+    deployment = runtime.apply("fraud-detector", "1.2.3", replicas=4)
+    runtime.set_traffic("fraud-detector", "staging", "1.3.0", mode="canary", weight=0.1)
+    runtime.status("fraud-detector", "staging")
+    runtime.stop("fraud-detector", "staging")
+
+apply() checks the version is registered, starts every replica (a serving
+process on its own port) at once and waits for their health checks in
+parallel, so a rollout takes as long as the slowest replica rather than
+the sum. The load balancer (mlops_sdk.balancer, its own process) is then
+pointed at them. Redeploying starts the new replicas first, switches the
+balancer over, then stops the old ones; if any new replica fails its
+health check the old ones keep serving.
+
+set_traffic() splits /predict traffic between the deployed version and a
+candidate on every replica, as a weighted canary or as shadow traffic
+(see demo/model-serving/traffic.py); status() then sums each version's
+latency and the candidate's agreement with the deployed version across
+replicas. The split is kept when the same version is redeployed.
+
+Replicas run the serving demo (demo/model-serving/serve.py of a source
+checkout, or the script named by MLOPS_SERVE_SCRIPT). Deployment state is
+kept as JSON under ~/.mlops/deployments (MLOPS_STATE_DIR) so later CLI
+invocations can report on and stop what earlier ones started. Each
+process is recorded with its start time, and a recorded pid whose process
+started at another time (the pid was reused after it exited) counts as
+gone, so it is never signalled.
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .balancer import ROUND_ROBIN
+
+SDK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SERVE_SCRIPT = os.path.join(os.path.dirname(SDK_DIR), "demo", "model-serving", "serve.py")
+
+# Seconds old replicas keep running after the balancer stops sending them requests
+DRAIN_SECONDS = 2.0
+
+# Traffic modes understood by the serving replicas
+TRAFFIC_MODES = ("off", "canary", "shadow")
+
+# (metric name, labels, value) parsed from a Prometheus text page
+Sample = Tuple[str, str, float]
+
+
+class DeploymentError(Exception):
+    """A rollout could not be completed"""
+
+
+def free_port() -> int:
+    """A TCP port that is free on localhost right now"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_command() -> List[str]:
+    """Command that starts one serving replica (configured through PORT/MODEL_* variables)"""
+    script = os.getenv("MLOPS_SERVE_SCRIPT", DEFAULT_SERVE_SCRIPT)
+    if not os.path.exists(script):
+        raise DeploymentError(f"Serving script not found at {script}; set MLOPS_SERVE_SCRIPT")
+    return [sys.executable, script]
+
+
+def _get(url: str, timeout: float = 2) -> Tuple[int, bytes]:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def _get_json(url: str, timeout: float = 2) -> Optional[Dict[str, Any]]:
+    try:
+        status, body = _get(url, timeout)
+        return json.loads(body) if status == 200 else None
+    except (OSError, ValueError):
+        return None
+
+
+def parse_metrics(text: str) -> List[Sample]:
+    """Samples of a Prometheus text exposition page"""
+    samples = []
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        series, _, value = line.rpartition(" ")
+        name, _, labels = series.partition("{")
+        try:
+            samples.append((name, labels.rstrip("}"), float(value)))
+        except ValueError:
+            continue
+    return samples
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    # An exited process nobody has reaped yet still has a pid
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            return fh.read().rpartition(")")[2].split()[0] != "Z"
+    except (OSError, IndexError):
+        return True
+
+
+def _start_time(pid: int) -> Optional[int]:
+    """When pid started, in clock ticks since boot; None without /proc or once pid is gone"""
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            return int(fh.read().rpartition(")")[2].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _same_process(record: Dict[str, Any]) -> bool:
+    """Whether record's pid still belongs to the process started for it"""
+    if "started" not in record:
+        # State written before start times were recorded cannot be verified
+        return False
+    return record["started"] is None or _start_time(record["pid"]) == record["started"]
+
+
+def _signal_group(pid: int, signum: int):
+    """Signal the process group pid leads (replicas start their own), or just pid without process groups"""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(pid, signum)
+        else:
+            os.kill(pid, signum)
+    except OSError:
+        pass
+
+
+class LocalRuntime:
+    """Starts, inspects and stops local deployments"""
+
+    def __init__(self, state_dir: Optional[str] = None, registry_url: Optional[str] = None):
+        self.state_dir = state_dir or os.getenv(
+            "MLOPS_STATE_DIR", os.path.join(os.path.expanduser("~"), ".mlops", "deployments"))
+        self.registry_url = registry_url or os.getenv("MLOPS_BACKEND_URL", "http://localhost:5000")
+        # Processes started by this runtime, so they can be reaped once stopped
+        self._processes: Dict[int, subprocess.Popen] = {}
+
+    def _state_path(self, model_name: str, environment: str) -> str:
+        return os.path.join(self.state_dir, f"{model_name}.{environment}.json")
+
+    def load(self, model_name: str, environment: str) -> Optional[Dict[str, Any]]:
+        """A deployment's recorded state, or None"""
+        try:
+            with open(self._state_path(model_name, environment)) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, deployment: Dict[str, Any]):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self._state_path(deployment["model_name"], deployment["environment"])
+        with open(path + ".tmp", "w") as fh:
+            json.dump(deployment, fh, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def deployments(self) -> List[Dict[str, Any]]:
+        """Recorded state of every deployment"""
+        if not os.path.isdir(self.state_dir):
+            return []
+        found = []
+        for name in sorted(os.listdir(self.state_dir)):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.state_dir, name)) as fh:
+                        found.append(json.load(fh))
+                except (OSError, ValueError):
+                    continue
+        return found
+
+    def resolve_version(self, model_name: str, version: str) -> str:
+        """The registered version to deploy ("latest" is the most recently registered)"""
+        from .client import MLOpsClient
+
+        response = MLOpsClient(self.registry_url).list_model_versions(model_name)
+        if "error" in response:
+            raise DeploymentError(f"Could not reach the model registry at {self.registry_url}: {response['error']}")
+        versions = [entry["version"] for entry in response.get("versions", [])]
+        if not versions:
+            raise DeploymentError(f"No versions of {model_name} are registered")
+        if version == "latest":
+            return versions[-1]
+        if version not in versions:
+            raise DeploymentError(f"{model_name}:{version} is not registered (registered: {', '.join(versions)})")
+        return version
+
+    def _alive(self, record: Dict[str, Any]) -> bool:
+        """Whether the process recorded at launch (a replica or balancer entry) is still running"""
+        process = self._processes.get(record["pid"])
+        if process is not None:
+            return process.poll() is None
+        return _alive(record["pid"]) and _same_process(record)
+
+    def _spawn(self, command: List[str], env: Dict[str, str], log_path: str) -> subprocess.Popen:
+        with open(log_path, "ab") as log:
+            process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT,
+                                       stdin=subprocess.DEVNULL, cwd=os.path.dirname(log_path),
+                                       start_new_session=True)
+        self._processes[process.pid] = process
+        return process
+
+    def _terminate(self, records: List[Dict[str, Any]], timeout: float = 10):
+        """Stop the recorded processes with their process groups (scoring workers included);
+        pids now held by other processes are left alone"""
+        for record in records:
+            if self._alive(record):
+                _signal_group(record["pid"], signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        for record in records:
+            while self._alive(record) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            if self._alive(record):
+                _signal_group(record["pid"], getattr(signal, "SIGKILL", signal.SIGTERM))
+            process = self._processes.pop(record["pid"], None)
+            if process is not None:
+                process.wait()
+
+    def _wait_ready(self, process: subprocess.Popen, url: str, timeout: float) -> float:
+        """Seconds until url answers 200; raises DeploymentError if the process dies or time runs out"""
+        started = time.monotonic()
+        while time.monotonic() - started < timeout:
+            if process.poll() is not None:
+                raise DeploymentError(f"process {process.pid} exited with status {process.returncode}")
+            try:
+                if _get(url, timeout=1)[0] == 200:
+                    return time.monotonic() - started
+            except OSError:
+                pass
+            time.sleep(0.05)
+        raise DeploymentError(f"{url} not ready after {timeout:.0f}s")
+
+    def _start_replicas(self, model_name: str, version: str, count: int, log_dir: str,
+                        ready_timeout: float, traffic: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Start count replicas at once and wait for all of their health checks in parallel"""
+        command = serve_command()
+        replicas = []
+        for index in range(count):
+            port = free_port()
+            env = dict(os.environ, PORT=str(port), HOST="127.0.0.1", MODEL_NAME=model_name,
+                       MODEL_VERSION=version, MODEL_REGISTRY_URL=self.registry_url, PYTHONUNBUFFERED="1")
+            if traffic:
+                env.update(TRAFFIC_MODE=traffic["mode"], CANDIDATE_VERSION=traffic["candidate_version"],
+                           CANARY_WEIGHT=str(traffic["weight"]))
+            log_path = os.path.join(log_dir, f"replica-{version}-{port}.log")
+            process = self._spawn(command, env, log_path)
+            replicas.append({"pid": process.pid, "started": _start_time(process.pid), "port": port,
+                             "log": log_path, "process": process})
+
+        def check(replica):
+            try:
+                return self._wait_ready(replica["process"], f"http://127.0.0.1:{replica['port']}/health",
+                                        ready_timeout), None
+            except DeploymentError as e:
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            results = list(pool.map(check, replicas))
+
+        failures = [(replica, error) for replica, (_, error) in zip(replicas, results) if error is not None]
+        if failures:
+            self._terminate(replicas)
+            replica, error = failures[0]
+            raise DeploymentError(f"{len(failures)} of {count} replicas failed their health check "
+                                  f"(port {replica['port']}: {error}; see {replica['log']})")
+        for replica, (seconds, _) in zip(replicas, results):
+            del replica["process"]
+            replica["ready_seconds"] = round(seconds, 3)
+        return replicas
+
+    def _start_balancer(self, port: int, backends: List[str], strategy: str, log_dir: str,
+                        ready_timeout: float) -> Dict[str, Any]:
+        command = [sys.executable, "-m", "mlops_sdk.balancer", "--port", str(port), "--strategy", strategy]
+        for backend in backends:
+            command += ["--backend", backend]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SDK_DIR, os.getenv("PYTHONPATH")])))
+        log_path = os.path.join(log_dir, "balancer.log")
+        process = self._spawn(command, env, log_path)
+        balancer = {"pid": process.pid, "started": _start_time(process.pid), "port": port, "strategy": strategy,
+                    "log": log_path}
+        try:
+            self._wait_ready(process, f"http://127.0.0.1:{port}/_lb/stats", ready_timeout)
+        except DeploymentError as e:
+            self._terminate([balancer])
+            raise DeploymentError(f"Load balancer did not start: {e} (see {log_path})")
+        return balancer
+
+    def apply(self, model_name: str, version: str = "latest", environment: str = "staging", replicas: int = 2,
+              port: Optional[int] = None, strategy: str = ROUND_ROBIN, ready_timeout: float = 60,
+              progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Roll out replicas of a registered model version behind the load balancer"""
+        if replicas < 1:
+            raise DeploymentError("replicas must be at least 1")
+        report = progress or (lambda message: None)
+        started = time.monotonic()
+        version = self.resolve_version(model_name, version)
+        previous = self.load(model_name, environment)
+        log_dir = os.path.join(self.state_dir, f"{model_name}.{environment}")
+        os.makedirs(log_dir, exist_ok=True)
+
+        # A traffic split only carries over to replicas of the same version
+        traffic = previous.get("traffic") if previous and previous["version"] == version else None
+
+        report(f"Starting {replicas} replicas of {model_name}:{version}")
+        new_replicas = self._start_replicas(model_name, version, replicas, log_dir, ready_timeout, traffic)
+        rollout_seconds = time.monotonic() - started
+        report(f"{replicas} replicas healthy after {rollout_seconds:.2f}s "
+               f"(slowest {max(r['ready_seconds'] for r in new_replicas):.2f}s)")
+
+        backends = [f"127.0.0.1:{replica['port']}" for replica in new_replicas]
+        balancer = previous.get("balancer") if previous else None
+        try:
+            if balancer and self._alive(balancer) and balancer["strategy"] == strategy and (
+                    port is None or port == balancer["port"]):
+                request = urllib.request.Request(f"http://127.0.0.1:{balancer['port']}/_lb/backends",
+                                                 data=json.dumps({"backends": backends}).encode("utf-8"),
+                                                 method="PUT", headers={"Content-Type": "application/json"})
+                with urllib.request.urlopen(request, timeout=5):
+                    pass
+                report(f"Load balancer on port {balancer['port']} switched to the new replicas")
+            else:
+                if balancer:
+                    self._terminate([balancer])
+                lb_port = port or (balancer["port"] if balancer else None) or free_port()
+                balancer = self._start_balancer(lb_port, backends, strategy, log_dir, ready_timeout)
+                report(f"Load balancer listening on port {lb_port} ({strategy})")
+        except (OSError, DeploymentError):
+            self._terminate(new_replicas)
+            raise
+
+        if previous:
+            old = previous.get("replicas", [])
+            if old:
+                time.sleep(DRAIN_SECONDS)
+                self._terminate(old)
+                report(f"Stopped {len(old)} replicas of {previous['version']}")
+
+        deployment = {
+            "model_name": model_name,
+            "version": version,
+            "environment": environment,
+            "deployed_at": datetime.utcnow().isoformat(),
+            "url": f"http://127.0.0.1:{balancer['port']}",
+            "balancer": balancer,
+            "replicas": new_replicas,
+            "rollout_seconds": round(rollout_seconds, 3),
+        }
+        if traffic:
+            deployment["traffic"] = traffic
+        self._save(deployment)
+        return deployment
+
+    def set_traffic(self, model_name: str, environment: str, candidate_version: Optional[str] = "latest",
+                    mode: str = "canary", weight: float = 0.1) -> Dict[str, Any]:
+        """Send a canary share of traffic to, or shadow traffic to, a candidate version on every replica"""
+        if mode not in TRAFFIC_MODES:
+            raise DeploymentError(f"mode must be one of {', '.join(TRAFFIC_MODES)}")
+        if mode == "canary" and not 0 <= weight <= 1:
+            raise DeploymentError("weight must be between 0 and 1")
+        deployment = self.load(model_name, environment)
+        if deployment is None:
+            raise DeploymentError(f"{model_name} is not deployed to {environment}")
+        traffic = None
+        if mode != "off":
+            candidate_version = self.resolve_version(model_name, candidate_version or "latest")
+            if candidate_version == deployment["version"]:
+                raise DeploymentError(f"{model_name}:{candidate_version} is already the deployed version")
+            traffic = {"candidate_version": candidate_version, "mode": mode,
+                       "weight": weight if mode == "canary" else 0.0}
+        body = json.dumps(traffic or {"mode": "off"}).encode("utf-8")
+
+        def configure(replica):
+            request = urllib.request.Request(f"http://127.0.0.1:{replica['port']}/traffic", data=body, method="PUT",
+                                             headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                return None
+            except urllib.error.HTTPError as e:
+                try:
+                    return json.loads(e.read()).get("error", str(e))
+                except ValueError:
+                    return str(e)
+            except OSError as e:
+                return str(e)
+
+        replicas = deployment.get("replicas", [])
+        with ThreadPoolExecutor(max_workers=max(1, len(replicas))) as pool:
+            errors = list(pool.map(configure, replicas))
+        failures = [(replica, error) for replica, error in zip(replicas, errors) if error is not None]
+        if failures:
+            replica, error = failures[0]
+            raise DeploymentError(f"{len(failures)} of {len(replicas)} replicas did not accept the traffic split "
+                                  f"(port {replica['port']}: {error})")
+
+        deployment.pop("traffic", None)
+        if traffic:
+            deployment["traffic"] = traffic
+        self._save(deployment)
+        return deployment
+
+    def _replica_status(self, replica: Dict[str, Any]) -> Dict[str, Any]:
+        base = f"http://127.0.0.1:{replica['port']}"
+        status = dict(replica, alive=self._alive(replica), healthy=False)
+        if not status["alive"]:
+            return status
+        health = _get_json(base + "/health")
+        status["healthy"] = bool(health and health.get("status") == "healthy")
+        if health:
+            status["uptime"] = health.get("uptime")
+        try:
+            code, body = _get(base + "/metrics")
+        except OSError:
+            return status
+        if code != 200:
+            return status
+        values: Dict[str, float] = {}
+        drift: Dict[str, float] = {}
+        for name, labels, value in parse_metrics(body.decode("utf-8", "replace")):
+            if name == "model_feature_drift_psi":
+                feature = labels.partition('feature="')[2].partition('"')[0]
+                drift[feature] = value
+            else:
+                values[name] = values.get(name, 0.0) + value
+        status["predictions"] = int(values.get("model_predictions_total", 0))
+        status["errors"] = int(values.get("model_prediction_errors_total", 0))
+        if values.get("model_latency_seconds_count"):
+            status["latency_ms_mean"] = round(
+                values["model_latency_seconds_sum"] / values["model_latency_seconds_count"] * 1000, 2)
+        if drift:
+            feature = max(drift, key=drift.get)
+            status["max_drift_psi"] = {"feature": feature, "psi": round(drift[feature], 4)}
+        traffic = _get_json(base + "/traffic")
+        if traffic:
+            status["traffic"] = traffic
+        return status
+
+    @staticmethod
+    def _traffic_summary(statuses: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Per-version latency and candidate agreement summed over the replicas' /traffic reports"""
+        reports = [replica["traffic"] for replica in statuses if replica.get("traffic")]
+        active = [report for report in reports if report.get("mode", "off") != "off"]
+        if not active:
+            return None
+        versions: Dict[str, Dict[str, Any]] = {}
+        comparison = {"comparisons": 0, "disagreements": 0, "dropped": 0, "score_difference_sum": 0.0}
+        for report in reports:
+            for version, stats in report.get("versions", {}).items():
+                total = versions.setdefault(version, {"role": stats.get("role"), "served": [], "background": []})
+                total["served"].append(stats)
+                total["background"].append(stats.get("background", {}))
+            if report.get("mode", "off") != "off":
+                for key in comparison:
+                    comparison[key] += report.get("comparison", {}).get(key, 0)
+
+        def combine(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+            combined = {"requests": sum(part.get("requests", 0) for part in parts),
+                        "errors": sum(part.get("errors", 0) for part in parts)}
+            answered = combined["requests"] - combined["errors"]
+            if answered:
+                combined["latency_ms_mean"] = round(sum(part.get("latency_sum", 0.0) for part in parts)
+                                                    / answered * 1000, 2)
+            p95 = [part["latency_p95"] for part in parts if "latency_p95" in part]
+            if p95:
+                combined["latency_ms_p95"] = round(max(p95) * 1000, 2)
+            return combined
+
+        for total in versions.values():
+            background = combine(total.pop("background"))
+            total.update(combine(total.pop("served")))
+            # Comparison scorings are reported apart from the requests a version answered
+            total["background"] = background
+        if comparison["comparisons"]:
+            comparison["agreement"] = 1 - comparison["disagreements"] / comparison["comparisons"]
+            comparison["score_difference_mean"] = comparison["score_difference_sum"] / comparison["comparisons"]
+        del comparison["score_difference_sum"]
+
+        summary = {
+            "candidate_version": active[0].get("candidate_version"),
+            "mode": active[0].get("mode"),
+            "weight": active[0].get("weight"),
+            "replicas": len(active),
+            "versions": versions,
+            "comparison": comparison,
+        }
+        primary = versions.get(active[0].get("primary_version"), {})
+        candidate = versions.get(summary["candidate_version"], {})
+        # A shadow candidate answers nothing, so its latency comes from its background scorings
+        candidate_mean = candidate.get("latency_ms_mean") or candidate.get("background", {}).get("latency_ms_mean")
+        if primary.get("latency_ms_mean") and candidate_mean:
+            summary["latency_change"] = candidate_mean / primary["latency_ms_mean"] - 1
+        return summary
+
+    def status(self, model_name: str, environment: str) -> Optional[Dict[str, Any]]:
+        """A deployment's state with live health, metrics and load balancer statistics, or None"""
+        deployment = self.load(model_name, environment)
+        if deployment is None:
+            return None
+        replicas = deployment.get("replicas", [])
+        with ThreadPoolExecutor(max_workers=max(1, len(replicas))) as pool:
+            statuses = list(pool.map(self._replica_status, replicas))
+
+        balancer = dict(deployment["balancer"], alive=self._alive(deployment["balancer"]))
+        stats = _get_json(f"http://127.0.0.1:{balancer['port']}/_lb/stats") if balancer["alive"] else None
+        by_address = {backend["address"]: backend for backend in (stats or {}).get("backends", [])}
+        for replica in statuses:
+            replica["balancer"] = by_address.get(f"127.0.0.1:{replica['port']}")
+
+        ready = sum(1 for replica in statuses if replica["healthy"])
+        if ready == len(statuses) and balancer["alive"]:
+            health = "healthy"
+        elif ready and balancer["alive"]:
+            health = "degraded"
+        else:
+            health = "down"
+        current = dict(deployment, replicas=statuses, balancer=balancer, ready=ready, health=health)
+        traffic = self._traffic_summary(statuses)
+        if traffic:
+            current["traffic"] = traffic
+        return current
+
+    def stop(self, model_name: str, environment: str) -> bool:
+        """Stop a deployment's balancer and replicas; False if there is no such deployment"""
+        deployment = self.load(model_name, environment)
+        if deployment is None:
+            return False
+        self._terminate([deployment["balancer"]] + deployment["replicas"])
+        os.remove(self._state_path(model_name, environment))
+        return True
@@ -0,0 +1,135 @@
+"""Reference feature profiles for drift monitoring in serving
+
+Usage:
+    profile = build_reference_profile(training_rows)
+    client.register_model_version("fraud-detector", "1.2.3", experiment_id=run_id)
+    client.set_reference_profile("fraud-detector", "1.2.3", profile)
+
+The serving process loads the profile of the version it serves and scores
+its recent inputs against it (PSI per feature, KS for numeric features).
+Numeric features are summarized by quantile bin edges and the share of
+training values in each bin; categorical features by the share of each of
+the most common categories, the rest pooled as "__other__". Bin edges and
+shares are computed from a uniform sample of at most sample_size values per
+feature, so profiling a large training set needs bounded memory.
+"""
+
+import math
+import random
+from bisect import bisect_right
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+OTHER = "__other__"
+PROFILE_VERSION = 1
+
+# Distinct categories counted exactly before new ones go to __other__
+_CATEGORY_TRACK_LIMIT = 10_000
+
+
+class _FeatureSummary:
+    def __init__(self, sample_size: int, rng: random.Random):
+        self.sample_size = sample_size
+        self.rng = rng
+        self.missing = 0
+        self.count = 0
+        self.numbers = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sample: List[float] = []
+        self.categories: Counter = Counter()
+
+    def add(self, value: Any):
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            self.missing += 1
+            return
+        self.count += 1
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self._add_number(float(value))
+        key = str(value)
+        if key in self.categories or len(self.categories) < _CATEGORY_TRACK_LIMIT:
+            self.categories[key] += 1
+        else:
+            self.categories[OTHER] += 1
+
+    def _add_number(self, value: float):
+        self.numbers += 1
+        delta = value - self.mean
+        self.mean += delta / self.numbers
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        # Reservoir sampling keeps a uniform sample of every value seen so far
+        if len(self.sample) < self.sample_size:
+            self.sample.append(value)
+        else:
+            index = self.rng.randrange(self.numbers)
+            if index < self.sample_size:
+                self.sample[index] = value
+
+    def profile(self, total: int, bins: int, max_categories: int) -> Dict[str, Any]:
+        missing = self.missing / total if total else 0.0
+        if self.count and self.numbers == self.count:
+            ordered = sorted(self.sample)
+            edges = sorted({ordered[len(ordered) * i // bins] for i in range(1, bins)})
+            counts = [0] * (len(edges) + 1)
+            for value in ordered:
+                counts[bisect_right(edges, value)] += 1
+            return {
+                "type": "numeric",
+                "count": self.count,
+                "missing": missing,
+                "mean": self.mean,
+                "std": math.sqrt(self.m2 / (self.numbers - 1)) if self.numbers > 1 else 0.0,
+                "min": self.min,
+                "max": self.max,
+                "edges": edges,
+                "fractions": [c / len(ordered) for c in counts],
+            }
+
+        other = self.categories.get(OTHER, 0)
+        common = [(name, c) for name, c in self.categories.most_common() if name != OTHER]
+        fractions = {name: c / self.count for name, c in common[:max_categories]}
+        other += sum(c for _, c in common[max_categories:])
+        if other:
+            fractions[OTHER] = other / self.count
+        return {"type": "categorical", "count": self.count, "missing": missing, "fractions": fractions}
+
+
+def build_reference_profile(rows: Iterable[Dict[str, Any]], bins: int = 10, max_categories: int = 50,
+                            sample_size: int = 100_000, seed: Optional[int] = 0) -> Dict[str, Any]:
+    """Summarize training feature rows (dicts of feature -> value) for drift monitoring
+
+    A feature is numeric when every non-missing value is a number, otherwise
+    categorical (values compared as strings). Nested values are ignored.
+    """
+    if bins < 2:
+        raise ValueError("bins must be at least 2")
+    rng = random.Random(seed)
+    summaries: Dict[str, _FeatureSummary] = {}
+    total = 0
+    for row in rows:
+        total += 1
+        for name, value in row.items():
+            if isinstance(value, (dict, list)):
+                continue
+            summary = summaries.get(name)
+            if summary is None:
+                summary = summaries[name] = _FeatureSummary(sample_size, rng)
+                # Rows seen before this feature first appeared were missing it
+                summary.missing = total - 1
+            summary.add(value)
+        for name in summaries.keys() - row.keys():
+            summaries[name].missing += 1
+
+    return {
+        "version": PROFILE_VERSION,
+        "count": total,
+        "features": {
+            name: summary.profile(total, bins, max_categories)
+            for name, summary in sorted(summaries.items())
+            if summary.count
+        },
+    }
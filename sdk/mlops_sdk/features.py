@@ -0,0 +1,68 @@
+"""Feature-transform specs stored with model versions
+
+Usage:
+    spec = build_feature_spec(training_rows)
+    client.register_model_version("fraud-detector", "1.2.3", experiment_id=run_id)
+    client.set_feature_spec("fraud-detector", "1.2.3", spec)
+
+The serving process compiles the spec of the version it loads into a
+vectorized transform (demo/model-serving/features.py) that turns whole
+batches of request feature dicts into the model's input matrix. A spec
+lists, in input-column order:
+
+    numeric      default, scale ("standard" with mean/std, "minmax" with
+                 min/max, or "none") and an optional clip range
+    categorical  categories, encoding ("onehot" or "ordinal") and an
+                 optional default category for missing or unknown values
+    boolean      default
+
+Specs can also be written by hand; build_feature_spec() derives one from
+training rows using the same summaries as build_reference_profile().
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from .drift import OTHER, build_reference_profile
+
+SPEC_VERSION = 1
+SCALES = ("none", "standard", "minmax")
+ENCODINGS = ("onehot", "ordinal")
+
+_BOOLEAN_VALUES = {"True", "False"}
+
+
+def build_feature_spec(rows: Iterable[Dict[str, Any]], scale: str = "standard", encoding: str = "onehot",
+                       max_categories: int = 50, clip: Optional[float] = None, sample_size: int = 100_000,
+                       seed: Optional[int] = 0) -> Dict[str, Any]:
+    """Derive a feature spec from training feature rows (dicts of feature -> value)
+
+    Numeric features default to their mean; categorical features keep their
+    max_categories most common values and default to the most common one.
+    With clip, scaled numeric values are limited to [-clip, clip].
+    """
+    if scale not in SCALES:
+        raise ValueError(f"scale must be one of {', '.join(SCALES)}")
+    if encoding not in ENCODINGS:
+        raise ValueError(f"encoding must be one of {', '.join(ENCODINGS)}")
+    profile = build_reference_profile(rows, max_categories=max_categories, sample_size=sample_size, seed=seed)
+
+    features: List[Dict[str, Any]] = []
+    for name, summary in profile["features"].items():
+        if summary["type"] == "numeric":
+            feature = {"name": name, "type": "numeric", "default": summary["mean"], "scale": scale}
+            if scale == "standard":
+                feature.update(mean=summary["mean"], std=summary["std"] or 1.0)
+            elif scale == "minmax":
+                feature.update(min=summary["min"], max=summary["max"])
+            if clip is not None:
+                feature["clip"] = [-clip, clip]
+            features.append(feature)
+            continue
+        categories = sorted((category for category in summary["fractions"] if category != OTHER),
+                            key=lambda category: -summary["fractions"][category])
+        if categories and set(categories) <= _BOOLEAN_VALUES:
+            features.append({"name": name, "type": "boolean", "default": categories[0] == "True"})
+        elif categories:
+            features.append({"name": name, "type": "categorical", "categories": categories,
+                             "encoding": encoding, "default": categories[0]})
+    return {"version": SPEC_VERSION, "features": features}
@@ -0,0 +1,225 @@
+"""Timed spans and sampling profiler for tracked runs
+
+Usage:
+    from mlops_sdk import span, track_experiment
+
+    @track_experiment("train", profile=True)
+    def train():
+        with span("data_loading"):
+            ...
+        for epoch in range(10):
+            with span("epoch"):
+                ...
+
+Spans nest per thread ("train/epoch/forward") and are aggregated by path,
+so a span inside a hot loop costs a few microseconds and a fixed amount of
+memory. Each path records its count, total and max wall time, process CPU
+time and the process' peak RSS when it last finished. The optional
+sampling profiler walks the tracked thread's stack from a background
+thread every interval seconds and reports the hottest stacks and
+functions and how samples split across spans.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+_MAXRSS_SCALE = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_SCALE
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size of this process, in MB (Linux only)"""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class SpanRecorder:
+    """Aggregates finished spans by path"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats: Dict[str, List[Any]] = {}
+        # Innermost open span path per thread, read by the sampling profiler
+        self.current_paths: Dict[int, str] = {}
+
+    def reset(self):
+        """Drop all recorded spans (open spans still record when they finish)"""
+        with self._lock:
+            self._stats = {}
+
+    @contextmanager
+    def span(self, name: str):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        path = f"{stack[-1]}/{name}" if stack else name
+        thread_id = threading.get_ident()
+        stack.append(path)
+        self.current_paths[thread_id] = path
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            rss = peak_rss_mb()
+            stack.pop()
+            if stack:
+                self.current_paths[thread_id] = stack[-1]
+            else:
+                self.current_paths.pop(thread_id, None)
+            with self._lock:
+                stats = self._stats.get(path)
+                if stats is None:
+                    # count, wall total, wall max, cpu total, peak rss
+                    self._stats[path] = [1, wall, wall, cpu, rss]
+                else:
+                    stats[0] += 1
+                    stats[1] += wall
+                    stats[2] = max(stats[2], wall)
+                    stats[3] += cpu
+                    stats[4] = rss
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Aggregated spans, parents before children"""
+        with self._lock:
+            items = sorted((path, list(stats)) for path, stats in self._stats.items())
+        return [
+            {
+                "path": path,
+                "name": path.rsplit("/", 1)[-1],
+                "depth": path.count("/"),
+                "count": count,
+                "wall_s": round(wall, 6),
+                "max_wall_s": round(max_wall, 6),
+                "cpu_s": round(cpu, 6),
+                "peak_rss_mb": round(rss, 1) if rss is not None else None,
+            }
+            for path, (count, wall, max_wall, cpu, rss) in items
+        ]
+
+
+_recorder = SpanRecorder()
+
+
+def span(name: str):
+    """
+    Time a phase of the current run
+
+    Usage:
+        with span("data_loading"):
+            load()
+    """
+    return _recorder.span(name)
+
+
+class Profiler:
+    """
+    Statistical profiler for one thread
+
+    A daemon thread samples the target thread's Python stack (and the
+    process' RSS) every interval seconds; the target thread itself does no
+    extra work, so overhead stays around a percent at the default 10ms.
+    """
+
+    MAX_DEPTH = 64
+
+    def __init__(self, interval: float = 0.01, thread_id: Optional[int] = None,
+                 recorder: Optional[SpanRecorder] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.recorder = recorder or _recorder
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.span_samples: Counter = Counter()
+        self.rss_peak_mb: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._elapsed = 0.0
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None and len(stack) < self.MAX_DEPTH:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}")
+            frame = frame.f_back
+        stack.reverse()
+        self.stacks[tuple(stack)] += 1
+        self.span_samples[self.recorder.current_paths.get(self.thread_id, "(none)")] += 1
+        self.samples += 1
+
+        rss = current_rss_mb()
+        if rss is not None and (self.rss_peak_mb is None or rss > self.rss_peak_mb):
+            self.rss_peak_mb = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="mlops-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._elapsed = time.perf_counter() - self._started
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def report(self, top: int = 50) -> Dict[str, Any]:
+        """Hottest stacks (folded, root first), functions by total samples, and samples per span"""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            for function in set(stack):
+                total_counts[function] += count
+
+        return {
+            "interval_s": self.interval,
+            "duration_s": round(self._elapsed, 6),
+            "samples": self.samples,
+            "rss_peak_mb": round(self.rss_peak_mb, 1) if self.rss_peak_mb is not None else None,
+            "stacks": [{"stack": ";".join(stack), "samples": count} for stack, count in self.stacks.most_common(top)],
+            "functions": [
+                {"function": function, "self": self_counts[function], "total": count}
+                for function, count in total_counts.most_common(top)
+            ],
+            "spans": dict(self.span_samples.most_common(top)),
+        }
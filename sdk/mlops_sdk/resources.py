@@ -0,0 +1,148 @@
+"""Background sampler for process resource usage during tracked runs
+
+Usage:
+    @track_experiment("train", sample_resources=True, resource_interval=5)
+    def train():
+        ...
+
+Every interval seconds the sampler reads /proc/self (Linux) and logs one
+point per metric through the buffered metric path, with the sample number
+as step:
+
+    system/cpu_percent      process CPU since the previous sample (100 = one core)
+    system/rss_mb           resident set size
+    system/io_read_mb       bytes read from storage since the run started
+    system/io_write_mb      bytes written to storage since the run started
+    system/threads          OS threads in the process
+
+Elsewhere CPU comes from time.process_time() and the thread count from the
+threading module; metrics that cannot be read are skipped.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .profiling import current_rss_mb
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+try:
+    _CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+except (AttributeError, ValueError, OSError):  # pragma: no cover - not available on Windows
+    _CLOCK_TICKS = 100
+
+
+def _read_proc_stat() -> Optional[Tuple[float, int]]:
+    """(user + system CPU seconds, thread count) from /proc/self/stat"""
+    try:
+        with open("/proc/self/stat") as fh:
+            # The command name may contain spaces; fields after it are fixed
+            fields = fh.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS, int(fields[17])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _read_proc_io() -> Optional[Tuple[int, int]]:
+    """(read_bytes, write_bytes) from /proc/self/io"""
+    try:
+        counters = {}
+        with open("/proc/self/io") as fh:
+            for line in fh:
+                name, _, value = line.partition(":")
+                counters[name] = int(value)
+        return counters["read_bytes"], counters["write_bytes"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class ResourceSampler:
+    """
+    Samples process resource usage from a daemon thread
+
+    Points go to log_points as (key, value, step) tuples; tracked runs hand
+    them to the metric buffer, so sampling adds no requests of its own.
+    A last sample is taken on stop(), so even short runs get one point.
+    """
+
+    PREFIX = "system/"
+
+    def __init__(self, log_points: Callable[[List[Tuple[str, float, Optional[int]]]], None],
+                 interval: float = 10.0):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.log_points = log_points
+        self.interval = interval
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_cpu = 0.0
+        self._last_wall = 0.0
+        self._io_start: Optional[Tuple[int, int]] = None
+
+    def _cpu_and_threads(self) -> Tuple[float, Optional[int]]:
+        stat = _read_proc_stat()
+        if stat is not None:
+            return stat
+        return time.process_time(), threading.active_count()
+
+    def sample(self) -> Dict[str, float]:
+        """Read the counters, log one point per metric and return them"""
+        now = time.perf_counter()
+        cpu, threads = self._cpu_and_threads()
+        values: Dict[str, float] = {}
+
+        elapsed = now - self._last_wall
+        if elapsed > 0:
+            values["cpu_percent"] = round(100 * (cpu - self._last_cpu) / elapsed, 2)
+        self._last_cpu, self._last_wall = cpu, now
+
+        rss = current_rss_mb()
+        if rss is not None:
+            values["rss_mb"] = round(rss, 2)
+        io = _read_proc_io()
+        if io is not None and self._io_start is not None:
+            values["io_read_mb"] = round((io[0] - self._io_start[0]) / _MB, 3)
+            values["io_write_mb"] = round((io[1] - self._io_start[1]) / _MB, 3)
+        if threads is not None:
+            values["threads"] = threads
+
+        step = self.samples
+        self.samples += 1
+        self.log_points([(self.PREFIX + name, float(value), step) for name, value in values.items()])
+        return values
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                # Never let a failed upload kill sampling for the rest of the run
+                logger.warning(f"Resource sample failed: {e}")
+
+    def start(self):
+        self._last_cpu, _ = self._cpu_and_threads()
+        self._last_wall = time.perf_counter()
+        self._io_start = _read_proc_io()
+        self._thread = threading.Thread(target=self._run, name="mlops-resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self.sample()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
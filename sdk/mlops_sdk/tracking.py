@@ -1,19 +1,46 @@
 """Experiment tracking decorators and functions"""
 
 import functools
+import threading
 import time
-import inspect
-from typing import Any, Callable, Dict, Optional
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
 import logging
 from datetime import datetime
 
-from .client import MLOpsClient
+from .profiling import Profiler, _recorder, span
+from .resources import ResourceSampler
+
+if TYPE_CHECKING:
+    from .client import MLOpsClient
 
 logger = logging.getLogger(__name__)
 
+# Buffered metric points are sent once this many accumulate, or at most this long after they were logged
+METRIC_FLUSH_POINTS = 1000
+METRIC_FLUSH_SECONDS = 5.0
+
+# Longest metric key, in UTF-8 bytes, a metric frame can carry
+MAX_METRIC_KEY_BYTES = 65535
+
 # Global state
 _active_experiment = None
-_client = MLOpsClient()
+_active_experiment_id = None
+_client: Optional["MLOpsClient"] = None
+_client_lock = threading.Lock()
+_metric_buffer: List[Tuple[str, float, Optional[int]]] = []
+_metric_lock = threading.Lock()
+_last_flush = time.time()
+
+
+def _get_client() -> "MLOpsClient":
+    """Backend client, created (and requests imported) on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from .client import MLOpsClient
+                _client = MLOpsClient()
+    return _client
 
 
 def set_experiment(experiment_name: str):
@@ -32,14 +59,85 @@ def log_param(key: str, value: Any):
 
 
 def log_metric(key: str, value: float, step: Optional[int] = None):
-    """Log a metric for the current experiment"""
+    """
+    Log a metric for the current experiment
+    
+    Inside a tracked experiment, points are buffered and sent in batches
+    (see flush_metrics).
+    """
     if _active_experiment is None:
         logger.warning("No active experiment. Call set_experiment() first.")
         return
+    
+    # Bad points are dropped with a warning; metric logging must never fail the run
+    try:
+        value = float(value)
+        # Steps are whole numbers, as the registry stores them (3.0 or numpy integers are fine)
+        step = None if step is None else int(step)
+    except (TypeError, ValueError, OverflowError) as e:
+        logger.warning(f"Ignoring metric {key!r}: {e}")
+        return
+    if not isinstance(key, str) or len(key.encode("utf-8")) > MAX_METRIC_KEY_BYTES:
+        logger.warning(f"Ignoring metric {str(key)[:80]!r}: keys are strings of at most {MAX_METRIC_KEY_BYTES} bytes")
+        return
+    
+    if _active_experiment_id is not None:
+        _buffer_metrics([(key, value, step)])
     logger.info(f"Logged metric: {key}={value}" + (f" (step {step})" if step else ""))
 
 
-def track_experiment(experiment_name: Optional[str] = None):
+def _buffer_metrics(points: List[Tuple[str, float, Optional[int]]]):
+    """Queue points for the tracked experiment, sending the buffer when it is due"""
+    with _metric_lock:
+        _metric_buffer.extend(points)
+        due = (len(_metric_buffer) >= METRIC_FLUSH_POINTS
+               or time.time() - _last_flush >= METRIC_FLUSH_SECONDS)
+    if due:
+        flush_metrics()
+
+
+def flush_metrics():
+    """Send buffered metric points of the tracked experiment to the backend"""
+    global _last_flush
+    with _metric_lock:
+        points = list(_metric_buffer)
+        _metric_buffer.clear()
+        _last_flush = time.time()
+        experiment_id = _active_experiment_id
+    
+    if points and experiment_id not in (None, "offline", "unknown"):
+        try:
+            _get_client().log_metrics(experiment_id, points)
+        except Exception as e:
+            logger.warning(f"Could not send {len(points)} metric points: {e}")
+
+
+def _flush_periodically(stop: threading.Event):
+    """Send the buffer every METRIC_FLUSH_SECONDS, so runs that log rarely still show up live"""
+    while not stop.wait(METRIC_FLUSH_SECONDS):
+        with _metric_lock:
+            pending = bool(_metric_buffer)
+        if pending:
+            flush_metrics()
+
+
+def _send_profile(experiment_id: str, profiler: Optional[Profiler]):
+    """Ship the run's spans (and sampling profile) to the backend"""
+    if profiler is not None:
+        profiler.stop()
+    spans = _recorder.snapshot()
+    # The run itself is always the root span; only send when there is more to see
+    if experiment_id in ("offline", "unknown") or (profiler is None and len(spans) <= 1):
+        return
+    _get_client().log_profile(experiment_id, {
+        "spans": spans,
+        "sampling": profiler.report() if profiler is not None else None
+    })
+
+
+def track_experiment(experiment_name: Optional[str] = None, profile: bool = False,
+                     profile_interval: float = 0.01, sample_resources: bool = False,
+                     resource_interval: float = 10.0):
     """
     Decorator to automatically track ML experiments
     
@@ -50,12 +148,25 @@ def track_experiment(experiment_name: Optional[str] = None):
             accuracy = 0.95
             return accuracy
     
+    Phases timed with span() inside the function are sent to the backend
+    with the run, nested under a root span named after the experiment.
+    With sample_resources, process CPU%, RSS, I/O and thread count are
+    logged as system/* metrics every resource_interval seconds.
+    
     Args:
         experiment_name: Optional name for the experiment. If not provided, uses function name.
+        profile: Also run the sampling profiler over the function
+        profile_interval: Seconds between profiler samples
+        sample_resources: Log process resource usage as metrics during the run
+        resource_interval: Seconds between resource samples
     """
     def decorator(func: Callable) -> Callable:
+        import inspect
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            global _active_experiment_id
+            
             # Determine experiment name
             exp_name = experiment_name or func.__name__
             set_experiment(exp_name)
@@ -84,17 +195,34 @@ def track_experiment(experiment_name: Optional[str] = None):
             }
             
             # Track experiment start
-            response = _client.track_experiment(experiment_data)
+            response = _get_client().track_experiment(experiment_data)
             experiment_id = response.get("experiment_id", "unknown")
+            _active_experiment_id = experiment_id
+            
+            _recorder.reset()
+            profiler = Profiler(profile_interval) if profile else None
+            if profiler is not None:
+                profiler.start()
+            sampler = ResourceSampler(_buffer_metrics, resource_interval) if sample_resources else None
+            if sampler is not None:
+                sampler.start()
+            stop_flusher = threading.Event()
+            threading.Thread(target=_flush_periodically, args=(stop_flusher,), name="mlops-metric-flush",
+                             daemon=True).start()
             
             try:
                 # Execute the actual function
-                result = func(*args, **kwargs)
+                with span(exp_name):
+                    result = func(*args, **kwargs)
                 
                 # Calculate execution time
                 end_time = time.time()
                 duration = end_time - start_time
                 end_timestamp = datetime.utcnow().isoformat()
+                if sampler is not None:
+                    sampler.stop()
+                flush_metrics()
+                _send_profile(experiment_id, profiler)
                 
                 # Update experiment with results
                 final_data = {
@@ -108,7 +236,7 @@ def track_experiment(experiment_name: Optional[str] = None):
                     "result": str(result) if result is not None else None
                 }
                 
-                _client.track_experiment(final_data)
+                _get_client().track_experiment(final_data)
                 
                 logger.info(f"Experiment completed: {exp_name} (duration: {duration:.2f}s)")
                 logger.info(f"Result: {result}")
@@ -120,6 +248,10 @@ def track_experiment(experiment_name: Optional[str] = None):
                 end_time = time.time()
                 duration = end_time - start_time
                 end_timestamp = datetime.utcnow().isoformat()
+                if sampler is not None:
+                    sampler.stop()
+                flush_metrics()
+                _send_profile(experiment_id, profiler)
                 
                 error_data = {
                     "experiment_id": experiment_id,
@@ -132,9 +264,21 @@ def track_experiment(experiment_name: Optional[str] = None):
                     "error": str(e)
                 }
                 
-                _client.track_experiment(error_data)
+                _get_client().track_experiment(error_data)
                 logger.error(f"Experiment failed: {exp_name} - {e}")
                 raise
+            
+            finally:
+                stop_flusher.set()
+                if profiler is not None:
+                    profiler.stop()
+                if sampler is not None:
+                    sampler.stop()
+                # Points left behind by a KeyboardInterrupt or a failed tracking call
+                # must not be sent with the next run's flush
+                with _metric_lock:
+                    _metric_buffer.clear()
+                    _active_experiment_id = None
         
         return wrapper
     return decorator
@@ -0,0 +1,76 @@
+"""Compact binary encoding for batched metric uploads
+
+A packed columnar frame: the distinct metric keys once, then the points as
+parallel arrays of key indexes, int64 steps and float64 values, optionally
+zlib-compressed. Compared with one JSON object per point this removes the
+repeated field names and keys and the decimal formatting of every number.
+All integers are little-endian:
+
+    4s  magic b"MLMF"
+    B   version (1)
+    B   flags (bit 0: payload is zlib-compressed)
+    payload:
+        I       number of keys K
+        K x     H byte length + UTF-8 key
+        I       number of points N
+        N x I   key index
+        N x q   step (INT64_MIN = no step)
+        N x d   value
+
+The registry decodes it in backend/model-registry/wire.py.
+"""
+
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+
+METRIC_FRAME_CONTENT_TYPE = "application/x-mlops-metric-frame"
+
+FRAME_MAGIC = b"MLMF"
+FRAME_VERSION = 1
+FLAG_ZLIB = 0x01
+
+# Step value meaning "no step"
+NO_STEP = -2 ** 63
+
+
+def encode_metric_frame(points: Iterable[Tuple[str, float, Optional[int]]],
+                        compress: bool = False, level: int = 1) -> bytes:
+    """
+    Encode (key, value, step) points as a packed metric frame
+
+    Args:
+        points: Metric points in logging order
+        compress: zlib-compress the payload (worth it for large batches)
+        level: zlib compression level
+    """
+    key_ids: Dict[str, int] = {}
+    indexes = array("I")
+    steps = array("q")
+    values = array("d")
+    for key, value, step in points:
+        index = key_ids.get(key)
+        if index is None:
+            index = key_ids[key] = len(key_ids)
+        indexes.append(index)
+        steps.append(NO_STEP if step is None else step)
+        values.append(value)
+
+    if sys.byteorder == "big":
+        for column in (indexes, steps, values):
+            column.byteswap()
+
+    parts = [struct.pack("<I", len(key_ids))]
+    for key in key_ids:
+        encoded = key.encode("utf-8")
+        parts.append(struct.pack("<H", len(encoded)) + encoded)
+    parts += [struct.pack("<I", len(indexes)), indexes.tobytes(), steps.tobytes(), values.tobytes()]
+    payload = b"".join(parts)
+
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, level)
+        flags |= FLAG_ZLIB
+    return FRAME_MAGIC + bytes([FRAME_VERSION, flags]) + payload
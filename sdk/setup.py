@@ -30,6 +30,9 @@ setup(
         "requests>=2.28.0",
         "click>=8.0.0",
     ],
+    extras_require={
+        "columnar": ["pyarrow>=12.0.0"],
+    },
     entry_points={
         "console_scripts": [
             "mlops=cli.main:cli",